@@ -0,0 +1,199 @@
+"""Command-line bulk import and export of match history.
+
+Rows are streamed, so large seasons never have to fit in a spreadsheet-sized form:
+
+    python badminton_cli.py import season.csv [--club north] [--batch-size 25000] [--dry-run]
+    python badminton_cli.py export matches.jsonl [--club north] [--ids] [--include-archived]
+
+CSV files have the columns timestamp, team_a, team_b, score_a, score_b and optionally id,
+winning_team, notes and rallies (the live-scoring rally log). Teams list player names (or IDs)
+separated by "&". JSONL files hold one match object per line with the same fields, teams as lists.
+
+Rows whose ID is already recorded, in the live history or an archived season, are skipped, so an
+--include-archived export can be imported again. Other rows dated inside an archived season are invalid.
+Rows older than the latest recorded match are merged into the history in time order, and ratings replayed.
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import sys
+import time
+
+# The app module runs its Streamlit setup on import; outside `streamlit run` that only logs noise
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import streamlit_app as app
+
+TEAM_SEPARATOR = "&"
+EXPORT_FIELDS = ["id", "timestamp", "team_a", "team_b", "score_a", "score_b", "winning_team", "notes", "rallies"]
+
+def open_text(path, mode):
+    """File object for path, or stdin/stdout for '-'"""
+    if path == "-":
+        return sys.stdin if mode == "r" else sys.stdout
+    return open(path, mode, newline="", encoding="utf-8")
+
+def detect_format(path, file_format):
+    """csv or jsonl, from --format or the file extension"""
+    if file_format:
+        return file_format
+    return "jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+def read_entries(f, file_format):
+    """Yield a match dict for every row; CSV teams and scores are parsed here"""
+    if file_format == "jsonl":
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+        return
+    for row in csv.DictReader(f):
+        entry = dict(row)
+        for team in ("team_a", "team_b"):
+            entry[team] = [p.strip() for p in (row.get(team) or "").split(TEAM_SEPARATOR) if p.strip()]
+        for score in ("score_a", "score_b"):
+            try:
+                entry[score] = int(row.get(score) or "")
+            except ValueError:
+                pass  # Left as text, so validation reports it
+        entry["winning_team"] = row.get("winning_team") or None
+        entry["notes"] = row.get("notes") or ""
+        yield entry
+
+def resolve_club(club):
+    """Validated club ID"""
+    club = club.strip().lower()
+    if club != app.DEFAULT_CLUB and club not in app.load_config().get("clubs", {}):
+        raise SystemExit(f"Error: Unknown club '{club}'")
+    return club
+
+def import_matches(args):
+    club = resolve_club(args.club)
+    service = app.get_club_data_service(club)
+    _, data = service.snapshot()
+    players_by_id = {p["id"]: p for p in data["predefined_players"]}
+    name_index = {p["name"].strip().lower(): p["id"] for p in data["predefined_players"]}
+
+    start_time = time.perf_counter()
+    imported = skipped = invalid = 0
+    errors = []  # The first --max-errors messages; later invalid rows are only counted
+    with open_text(args.path, "r") as f:
+        entries = read_entries(f, detect_format(args.path, args.format))
+        row_number = 0
+        exhausted = False
+        while not exhausted:
+            batch = []
+            for row_number, entry in zip(itertools.count(row_number + 1), entries):
+                record = app.build_match_record(entry, name_index)
+                error = app.validate_submitted_match(record) or app.validate_match_record(record, players_by_id)
+                if not error:
+                    already_archived, error = app.check_archived_match(record, data["archived_seasons"], club)
+                    if already_archived:
+                        skipped += 1
+                        continue
+                if error:
+                    invalid += 1
+                    if len(errors) < args.max_errors:
+                        errors.append(f"Row {row_number}: {error[len('Error: '):]}")
+                    if not args.skip_invalid and invalid >= args.max_errors:
+                        break
+                    continue
+                batch.append(record)
+                if len(batch) >= args.batch_size:
+                    break
+            else:
+                exhausted = True
+            if invalid and not args.skip_invalid:
+                break  # Nothing from a batch with invalid rows is imported
+            if not batch:
+                continue
+            if not args.dry_run:
+                result, payload = app.ingest_matches(club, batch, app.load_config(), operation="cli_import", sync=False, validated=True)
+                if result.startswith("Error"):
+                    raise SystemExit(result)
+                imported += len(payload["recorded"])
+                skipped += len(payload["skipped"])
+            else:
+                imported += len(batch)
+            print(f"{'Checked' if args.dry_run else 'Imported'} {imported} matches ({row_number} rows read)", file=sys.stderr)
+
+    for error in errors:
+        print(error, file=sys.stderr)
+    if invalid > len(errors):
+        print(f"... and {invalid - len(errors)} more invalid rows", file=sys.stderr)
+    if invalid and not args.skip_invalid:
+        print(f"Stopped after {invalid} invalid rows{'' if exhausted else f' at row {row_number}'}; {imported} matches from earlier batches "
+              "were imported. Fix the rows or pass --skip-invalid.", file=sys.stderr)
+    if imported and not args.dry_run and not args.no_sync:
+        # One Drive upload for the whole import
+        app.push_to_gdrive(match_history=True, club=club, config=app.load_config())
+    service.wait_for_snapshot()
+    elapsed = time.perf_counter() - start_time
+    print(f"{'Would import' if args.dry_run else 'Imported'} {imported} matches, skipped {skipped} already recorded or archived, "
+          f"{invalid} invalid, in {elapsed:.1f}s")
+    app.logger.info(f"CLI import of {args.path} for club '{club}': {imported} imported, {skipped} skipped, {invalid} invalid")
+    return 1 if (invalid and not args.skip_invalid) or not exhausted else 0
+
+def iter_export_matches(club, data, include_archived):
+    """Archived seasons (oldest first, read from their segments) and then the live history"""
+    if include_archived:
+        for season in data["archived_seasons"]:
+            path = app.club_file(season["segment"], club)
+            yield from app.read_season_segment(path, season)
+    yield from data["match_history"]
+
+def export_matches(args):
+    club = resolve_club(args.club)
+    _, data = app.get_club_data_service(club).snapshot()
+    names_by_id = {p["id"]: p["name"] for p in data["predefined_players"]}
+    file_format = detect_format(args.path, args.format)
+
+    def team(player_ids):
+        return player_ids if args.ids else [names_by_id.get(pid, pid) for pid in player_ids]
+
+    count = 0
+    with open_text(args.path, "w") as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS) if file_format == "csv" else None
+        if writer:
+            writer.writeheader()
+        for match in iter_export_matches(club, data, args.include_archived):
+            row = {field: match.get(field, "") for field in EXPORT_FIELDS}
+            row["team_a"], row["team_b"] = team(match["team_a"]), team(match["team_b"])
+            if writer:
+                row["team_a"] = f" {TEAM_SEPARATOR} ".join(row["team_a"])
+                row["team_b"] = f" {TEAM_SEPARATOR} ".join(row["team_b"])
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row) + "\n")
+            count += 1
+    print(f"Exported {count} matches to {args.path}", file=sys.stderr)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import and export of badminton match history")
+    parser.add_argument("--club", default=app.DEFAULT_CLUB, help="Club ID (default: the main club)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Stream matches from a CSV or JSONL file ('-' for stdin)")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"])
+    import_parser.add_argument("--batch-size", type=int, default=25000, help="Matches per commit")
+    import_parser.add_argument("--skip-invalid", action="store_true", help="Import valid rows and report invalid ones")
+    import_parser.add_argument("--max-errors", type=int, default=50, help="Invalid rows listed; without --skip-invalid, the import stops after this many")
+    import_parser.add_argument("--dry-run", action="store_true", help="Validate without importing")
+    import_parser.add_argument("--no-sync", action="store_true", help="Skip the Google Drive upload")
+    import_parser.set_defaults(handler=import_matches)
+
+    export_parser = subparsers.add_parser("export", help="Stream matches to a CSV or JSONL file ('-' for stdout)")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=["csv", "jsonl"])
+    export_parser.add_argument("--ids", action="store_true", help="Write player IDs instead of names")
+    export_parser.add_argument("--include-archived", action="store_true", help="Also export archived seasons")
+    export_parser.set_defaults(handler=export_matches)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
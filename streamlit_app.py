@@ -1,15 +1,34 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import random
 import pandas as pd
 import datetime
 import uuid
 import json
 import os
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
 import hashlib
 import pytz
 import shutil
 import time
+import math
+import threading
+import bisect
+import calendar
+import csv
+import heapq
+import itertools
+import functools
+import operator
+import tempfile
+import re
+import gzip
+import html
+import hmac
+import secrets
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
 
 # for plotting
 import numpy as np
@@ -27,6 +46,20 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.http import MediaIoBaseDownload
 
+# optional columnar export (falls back to CSV when missing)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# advisory file locking (unavailable on Windows, where the data file is only guarded in-process)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 # Configure logging
 import logging
 from logging.handlers import RotatingFileHandler
@@ -80,8 +113,9 @@ ADMIN_SESSION_TIMEOUT = int(os.getenv("ADMIN_SESSION_TIMEOUT", 7200))  # Default
 logger.info(f"Admin session timeout set to {ADMIN_SESSION_TIMEOUT} seconds")
 
 # Initialize session state variables if they don't exist
-if 'predefined_players' not in st.session_state:
-    st.session_state.predefined_players = [
+def default_predefined_players():
+    """Starter roster used until a data file exists"""
+    return [
         {"id": str(uuid.uuid4()), "name": "Saurabh", "skill_level": 2, "games_played": 0, "wins": 0, "points_scored": 0},
         {"id": str(uuid.uuid4()), "name": "Golu", "skill_level": 4, "games_played": 0, "wins": 0, "points_scored": 0},
         {"id": str(uuid.uuid4()), "name": "Shraddha", "skill_level": 3, "games_played": 0, "wins": 0, "points_scored": 0},
@@ -89,6 +123,9 @@ if 'predefined_players' not in st.session_state:
         {"id": str(uuid.uuid4()), "name": "Lala", "skill_level": 3, "games_played": 0, "wins": 0, "points_scored": 0},
     ]
 
+if 'predefined_players' not in st.session_state:
+    st.session_state.predefined_players = default_predefined_players()
+
 if 'temp_players' not in st.session_state:
     st.session_state.temp_players = []
 
@@ -98,6 +135,9 @@ if 'current_teams' not in st.session_state:
 if 'match_history' not in st.session_state:
     st.session_state.match_history = []
 
+if 'archived_seasons' not in st.session_state:
+    st.session_state.archived_seasons = []
+
 if 'waiting_queue' not in st.session_state:
     st.session_state.waiting_queue = []
 
@@ -107,10 +147,22 @@ if 'player_rotation_history' not in st.session_state:
 if 'data_updated' not in st.session_state:
     st.session_state.data_updated = False
 
+if 'player_ratings' not in st.session_state:
+    st.session_state.player_ratings = {}
+
+if 'data_version' not in st.session_state:
+    st.session_state.data_version = -1  # Below every service version, so the first load_data() copies the shared data
+
+if 'tournaments' not in st.session_state:
+    st.session_state.tournaments = {}
+
 # Admin and Super Admin authentication variables
 if 'admin_password_hash' not in st.session_state:
     st.session_state.admin_password_hash = hashlib.sha256("admin123".encode()).hexdigest()
 
+if 'api_token_hash' not in st.session_state:
+    st.session_state.api_token_hash = None
+
 if 'is_admin' not in st.session_state:
     st.session_state.is_admin = False
 
@@ -164,33 +216,673 @@ if 'match_type' not in st.session_state:
 SUPER_ADMIN_PASSWORD = os.getenv('SUPER_ADMIN_PASSWORD', 'SuperAdmin123!')  # Fallback for local testing
 SUPER_ADMIN_PASSWORD_HASH = hashlib.sha256(SUPER_ADMIN_PASSWORD.encode()).hexdigest()
 
+# Clubs: one deployment hosts several groups, each with its own data files and Drive folder
+DEFAULT_CLUB = "default"  # Keeps its files in the working directory, as before clubs existed
+CLUBS_DIR = "clubs"
+CLUB_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+CLUB_CACHE_SIZE = 8  # Clubs kept loaded; the least recently used one is evicted beyond this
+CLUB_IDLE_SECONDS = 3600  # Clubs unused for this long are evicted on the next lookup
+DRIVE_FOLDER_ID = '1u5w1ESII4eCx9CE6LGp-ehPJd3rTriZf'  # Drive folder of the default club
+
+def current_club():
+    """Club of this session, chosen by the ?club= query parameter when the session started"""
+    return st.session_state.get("club", DEFAULT_CLUB)
+
+def club_dir(club=None):
+    """Directory holding a club's data, chat, visitor, index and export files"""
+    club = club or current_club()
+    if club == DEFAULT_CLUB:
+        return "."
+    path = os.path.join(CLUBS_DIR, club)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def club_file(name, club=None):
+    """Path of a per-club file"""
+    club = club or current_club()
+    return name if club == DEFAULT_CLUB else os.path.join(club_dir(club), name)
+
 # Utility functions
+DATA_FILE = 'badminton_data.json'
+CLUB_FILES = (DATA_FILE, 'chat_history.json', 'visitor_count.json')  # Files each club keeps in its own directory
+DATA_CHANGE_LOG_SIZE = 200  # Commits kept for incremental refresh; sessions further behind reload fully
+DATA_COMMIT_RETRIES = 3
+DATA_WATCH_INTERVAL = 15  # Seconds between checks for commits made by other sessions
+JOURNAL_FILE = 'badminton_journal.jsonl'  # One line per committed data version, for point-in-time recovery
+SNAPSHOTS_DIR = 'snapshots'
+SNAPSHOT_NAME_PATTERN = re.compile(r"^snapshot_(\d+)_(\d{14})\.json\.gz$")
+SNAPSHOT_EVERY_COMMITS = 50
+SNAPSHOT_MAX_AGE = 6 * 3600  # Seconds after which the next commit also triggers a snapshot
+SNAPSHOT_KEEP = 20
+RECOVERY_POINTS_SHOWN = 200
+SHARED_RECORD_LISTS = ("predefined_players", "match_history", "archived_seasons")  # Lists of records keyed by "id"
+SHARED_MAPPINGS = ("player_rotation_history", "player_ratings", "tournaments")
+SHARED_VALUES = ("admin_password_hash", "api_token_hash")
+SHARED_DATA_FIELDS = SHARED_RECORD_LISTS + SHARED_MAPPINGS + SHARED_VALUES
+SESSION_DATA_FIELDS = ("temp_players",)  # Session-only data that transactions change; restored before a retry
+
+class DataConflictError(Exception):
+    """A commit was based on a data version that is no longer current"""
+
+@contextmanager
+def data_file_lock(path, exclusive):
+    """Advisory lock on a data file, shared for reads and exclusive for writes, across processes"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def write_file_atomically(path, text):
+    """Write text (or bytes) to a temporary file and rename it over path, so readers never see a partial file"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(text, bytes) else 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+class FrozenRecord(dict):
+    """Read-only dict for records shared by every session; copy() and dict(record) give editable copies"""
+    __slots__ = ()
+    is_frozen_record = True
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Shared records are read-only; edit a copy inside a data transaction")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenRecord, (dict(self),))
+
+def is_frozen(value):
+    """Whether value is shared frozen data; checked by marker because each script rerun redefines the class"""
+    return getattr(value, "is_frozen_record", False)
+
+def freeze(value):
+    """Immutable copy of JSON-like data: dicts become FrozenRecords and lists become tuples"""
+    # Containers are checked first, since most values are scalars (this runs for every record of a bulk import)
+    if isinstance(value, dict):
+        if is_frozen(value):
+            return value
+        return FrozenRecord({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple([freeze(v) for v in value])
+    return value
+
+def thaw(value):
+    """Editable deep copy of frozen data"""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+def diff_records(old, new):
+    """Removed, updated and added records between two ID-keyed lists; None if kept records were reordered"""
+    old_by_id = {r["id"]: r for r in old}
+    new_ids = {r["id"] for r in new}
+    # Unchanged records are the shared objects themselves, so the identity check skips most comparisons
+    updated = [r for r in new if r["id"] in old_by_id and old_by_id[r["id"]] is not r and old_by_id[r["id"]] != r]
+    added = [r for r in new if r["id"] not in old_by_id]
+    # Changes are applied as remove, replace in place, then append, which must reproduce the new order
+    kept_ids = [rid for rid in old_by_id if rid in new_ids]
+    if [r["id"] for r in new] != kept_ids + [r["id"] for r in added]:
+        return None
+    return {"removed": [rid for rid in old_by_id if rid not in new_ids], "updated": updated, "added": added}
+
+def diff_mapping(old, new):
+    """Keys set or removed between two dicts"""
+    return {
+        "set": {k: v for k, v in new.items() if k not in old or old[k] != v},
+        "removed": [k for k in old if k not in new]
+    }
+
+def apply_data_changes(data, changes):
+    """New frozen shared data with one commit's frozen changes applied, reusing every unchanged record"""
+    data = dict(data)
+    for name, change in changes["records"].items():
+        if "replaced" in change:
+            data[name] = change["replaced"]
+            continue
+        removed = set(change["removed"])
+        updated = {r["id"]: r for r in change["updated"]}
+        data[name] = tuple(updated.get(r["id"], r) for r in data[name] if r["id"] not in removed) + change["added"]
+    for name, change in changes["mappings"].items():
+        removed = set(change["removed"])
+        mapping = {k: v for k, v in data[name].items() if k not in removed}
+        mapping.update(change["set"])
+        data[name] = FrozenRecord(mapping)
+    data.update(changes["values"])
+    return data
+
+def default_shared_data():
+    """Shared data for a club without a data file yet"""
+    return {
+        "predefined_players": default_predefined_players(),
+        "match_history": [],
+        "archived_seasons": [],
+        "player_rotation_history": {},
+        "player_ratings": {},
+        "tournaments": {},
+        "admin_password_hash": hashlib.sha256("admin123".encode()).hexdigest(),
+        "api_token_hash": None
+    }
+
+def data_file_text(version, data):
+    """Serialized data file for a version; snapshots and journal checksums use the exact same text"""
+    return json.dumps({
+        'data_version': version,
+        **{name: data[name] for name in SHARED_DATA_FIELDS},
+        'rated_match_count': len(data["match_history"])
+    })
+
+def load_data_file_text(text):
+    """Version and frozen shared data from a serialized data file, with missing fields defaulted"""
+    data = json.loads(text)
+    defaults = default_shared_data()
+    for name in SHARED_DATA_FIELDS:
+        data.setdefault(name, defaults[name])
+    if data.get('rated_match_count') != len(data["match_history"]):
+        data["player_ratings"] = replay_ratings(data["match_history"], data["predefined_players"], archived_ratings(data["archived_seasons"]))[0]
+        logger.info(f"Replayed ratings over {len(data['match_history'])} matches")
+    return data.get('data_version', 0), {name: freeze(data[name]) for name in SHARED_DATA_FIELDS}
+
+def list_snapshots(snapshot_dir):
+    """Snapshots as (version, "YYYY-MM-DD HH:MM:SS", path), oldest first"""
+    snapshots = []
+    if os.path.isdir(snapshot_dir):
+        for name in os.listdir(snapshot_dir):
+            match = SNAPSHOT_NAME_PATTERN.match(name)
+            if match:
+                taken_at = datetime.datetime.strptime(match.group(2), "%Y%m%d%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+                snapshots.append((int(match.group(1)), taken_at, os.path.join(snapshot_dir, name)))
+    return sorted(snapshots)
+
+def read_journal(journal_path):
+    """Journal entries (one per commit), oldest first"""
+    try:
+        with open(journal_path, 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def replay_journal(snapshot_path, entries, target_version):
+    """Shared data at target_version: a snapshot with the journaled commits after it applied in order"""
+    with open(snapshot_path, 'rb') as f:
+        version, data = load_data_file_text(gzip.decompress(f.read()).decode())
+    for entry in entries:
+        if entry["version"] <= version:
+            continue
+        if entry["version"] > target_version:
+            break
+        if entry["version"] != version + 1:
+            raise ValueError(f"Journal is missing versions {version + 1} to {entry['version'] - 1}")
+        data = apply_data_changes(data, freeze(entry["changes"]))
+        version = entry["version"]
+    if version != target_version:
+        raise ValueError(f"Journal ends at version {version}, before version {target_version}")
+    return data
+
+class DataService:
+    """Authoritative shared data for every session in this process, with versioned compare-and-swap commits.
+
+    Every commit is appended to an operation journal, and compressed snapshots are written in the
+    background every few commits, so the data can be rebuilt as of any journaled version.
+    """
+
+    def __init__(self, path=DATA_FILE):
+        self._lock = threading.RLock()
+        self.path = path
+        self.journal_path = os.path.join(os.path.dirname(path), JOURNAL_FILE)
+        self.snapshot_dir = os.path.join(os.path.dirname(path), SNAPSHOTS_DIR)
+        self.version = 0
+        self.data = None  # Frozen snapshot of the current version, referenced by every session
+        self._file_stamp = None
+        self.changes = deque(maxlen=DATA_CHANGE_LOG_SIZE)
+        snapshots = list_snapshots(self.snapshot_dir)
+        self.last_snapshot_version = snapshots[-1][0] if snapshots else None
+        self.last_snapshot_time = os.path.getmtime(snapshots[-1][2]) if snapshots else 0
+        self._snapshot_thread = None
+        self.refresh()
+
+    def _start_snapshot(self):
+        """Snapshot the current version on a background thread; the frozen data cannot change underneath it"""
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return
+        self.last_snapshot_version = self.version
+        self.last_snapshot_time = time.time()
+        self._snapshot_thread = threading.Thread(target=self._write_snapshot, args=(self.version, self.data), daemon=True)
+        self._snapshot_thread.start()
+
+    def _write_snapshot(self, version, data):
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            taken_at = datetime.datetime.now(pytz.timezone('Asia/Kolkata')).strftime("%Y%m%d%H%M%S")
+            path = os.path.join(self.snapshot_dir, f"snapshot_{version:08d}_{taken_at}.json.gz")
+            write_file_atomically(path, gzip.compress(data_file_text(version, data).encode()))
+            snapshots = list_snapshots(self.snapshot_dir)
+            for _, _, old_path in snapshots[:-SNAPSHOT_KEEP]:
+                os.unlink(old_path)
+            # Journal entries older than the oldest kept snapshot can no longer be replayed
+            oldest_version = snapshots[-SNAPSHOT_KEEP:][0][0]
+            with data_file_lock(self.path, exclusive=True):
+                entries = read_journal(self.journal_path)
+                if entries and entries[0]["version"] <= oldest_version:
+                    kept = "".join(json.dumps(e) + "\n" for e in entries if e["version"] > oldest_version)
+                    write_file_atomically(self.journal_path, kept)
+            logger.info(f"Wrote snapshot of data version {version} to {path}")
+        except Exception as e:
+            logger.error(f"Error writing snapshot of data version {version}: {str(e)}")
+
+    def wait_for_snapshot(self):
+        """Block until a running background snapshot has finished"""
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+
+    def _reload_if_changed(self):
+        """Reload the file if it was replaced outside this service (restore, download, another process)"""
+        stamp = self._stat()
+        if self.data is not None and stamp == self._file_stamp:
+            return
+        if stamp is None:
+            file_version, data = 0, {name: freeze(value) for name, value in default_shared_data().items()}
+        else:
+            # Ratings are replayed if the file predates the rating engine or was edited externally
+            with open(self.path, 'r') as f:
+                file_version, data = load_data_file_text(f.read())
+        first_load = self.data is None
+        previous_version = self.version
+        self.data = data
+        self._file_stamp = stamp
+        # Versions only move forward, so sessions always notice a replaced file
+        self.version = file_version if first_load else max(file_version, self.version + 1)
+        if not first_load:
+            self.changes.clear()
+            logger.info(f"Reloaded {self.path} as data version {self.version}")
+        # The journal only continues from a snapshot, so one is needed at the start and after an outside replacement
+        # (a newer version written by another process is already journaled by it)
+        if stamp is not None and (self.last_snapshot_version is None if first_load else file_version <= previous_version):
+            self._start_snapshot()
+
+    def refresh(self):
+        """Pick up outside changes to the data file; returns the current version"""
+        with self._lock:
+            if self.data is None or self._stat() != self._file_stamp:
+                with data_file_lock(self.path, exclusive=False):
+                    self._reload_if_changed()
+            return self.version
+
+    def snapshot(self):
+        """Version and the frozen shared data; never copied, so every session references the same objects"""
+        with self._lock:
+            return self.version, self.data
+
+    def file_stamp(self):
+        """Version and (mtime, size) of the data file it was read from or written to"""
+        with self._lock:
+            return self.version, self._file_stamp
+
+    def write_derived_file(self, path, text, version, file_stamp):
+        """Atomically write a file derived from the data, unless a commit or reload replaced that version since"""
+        with self._lock:
+            if (self.version, self._file_stamp) != (version, file_stamp):
+                return False
+            write_file_atomically(path, text)
+            return True
+
+    def changes_since(self, version):
+        """Current version and the commits after version, or None if the log no longer reaches back that far"""
+        with self._lock:
+            if version == self.version:
+                return self.version, []
+            if not self.changes or not self.changes[0]["version"] <= version + 1 <= self.version:
+                return self.version, None
+            return self.version, [c for c in self.changes if c["version"] > version]
+
+    def commit(self, base_version, data, operation="save"):
+        """Persist data if base_version is still current; returns the new version, or None on a conflict"""
+        with self._lock, data_file_lock(self.path, exclusive=True):
+            self._reload_if_changed()
+            if base_version != self.version:
+                return None
+
+            changes = {"records": {}, "mappings": {}, "values": {}}
+            for name in SHARED_RECORD_LISTS:
+                change = diff_records(self.data[name], data[name])
+                if change is None:
+                    changes["records"][name] = {"replaced": data[name]}
+                elif change["removed"] or change["updated"] or change["added"]:
+                    changes["records"][name] = change
+            for name in SHARED_MAPPINGS:
+                change = diff_mapping(self.data[name], data[name])
+                if change["set"] or change["removed"]:
+                    changes["mappings"][name] = change
+            for name in SHARED_VALUES:
+                if data[name] != self.data[name]:
+                    changes["values"][name] = data[name]
+            if not (changes["records"] or changes["mappings"] or changes["values"]):
+                return self.version
+
+            # Freezing copies the session's edited values, so later edits to its private copies cannot leak in
+            changes = freeze(changes)
+            new_data = apply_data_changes(self.data, changes)
+            text = data_file_text(self.version + 1, new_data)
+            write_file_atomically(self.path, text)
+            try:
+                with open(self.journal_path, 'a') as f:
+                    f.write(json.dumps({
+                        "version": self.version + 1,
+                        "timestamp": datetime.datetime.now(pytz.timezone('Asia/Kolkata')).strftime("%Y-%m-%d %H:%M:%S"),
+                        "operation": operation,
+                        "checksum": hashlib.sha256(text.encode()).hexdigest(),
+                        "changes": changes
+                    }) + "\n")
+            except OSError as e:
+                # The commit itself is on disk; a fresh snapshot restarts the journal after the gap
+                logger.error(f"Error journaling data version {self.version + 1}: {str(e)}")
+                self.last_snapshot_version = None
+
+            self.version += 1
+            self.data = new_data
+            self._file_stamp = self._stat()
+            self.changes.append(FrozenRecord(changes, version=self.version))
+            logger.info(f"Committed data version {self.version} ({operation}): changed {', '.join([*changes['records'], *changes['mappings'], *changes['values']])}")
+            if (self.last_snapshot_version is None or self.version - self.last_snapshot_version >= SNAPSHOT_EVERY_COMMITS
+                    or time.time() - self.last_snapshot_time >= SNAPSHOT_MAX_AGE):
+                self._start_snapshot()
+            return self.version
+
+class ClubResources:
+    """Everything one club's sessions share (data service, indexes, caches), each created on first use"""
+
+    def __init__(self, club):
+        self._lock = threading.Lock()
+        self.club = club
+        self.last_used = time.monotonic()
+        self._resources = {}
+
+    def get(self, name, factory):
+        with self._lock:
+            if name not in self._resources:
+                self._resources[name] = factory()
+            return self._resources[name]
+
+class ClubRegistry:
+    """Loaded clubs in least-recently-used order; a club loads on first request and is evicted when idle"""
+
+    def __init__(self, capacity=CLUB_CACHE_SIZE, idle_seconds=CLUB_IDLE_SECONDS):
+        self._lock = threading.Lock()
+        self._clubs = OrderedDict()
+        self.capacity = capacity
+        self.idle_seconds = idle_seconds
+
+    def get(self, club):
+        with self._lock:
+            now = time.monotonic()
+            resources = self._clubs.pop(club, None)
+            if resources is None:
+                resources = ClubResources(club)
+                logger.info(f"Loaded club '{club}'")
+            resources.last_used = now
+            self._clubs[club] = resources
+            # Every commit is already on disk, so an evicted club simply reloads on its next request
+            for name in list(self._clubs):
+                if name != club and (len(self._clubs) > self.capacity or now - self._clubs[name].last_used > self.idle_seconds):
+                    del self._clubs[name]
+                    logger.info(f"Evicted club '{name}'")
+            return resources
+
+    def loaded(self):
+        """Loaded clubs with seconds since last use, least recently used first"""
+        with self._lock:
+            now = time.monotonic()
+            return [(name, now - resources.last_used) for name, resources in self._clubs.items()]
+
+@st.cache_resource
+def get_club_registry():
+    """Registry of loaded clubs shared by every session in this process"""
+    return ClubRegistry()
+
+def get_club_resource(name, factory):
+    """A process-shared object of the current club, created on first use"""
+    return get_club_registry().get(current_club()).get(name, factory)
+
+def get_club_data_service(club):
+    """Data service of a club, shared by its sessions and the ingestion API"""
+    return get_club_registry().get(club).get("data_service", lambda: DataService(club_file(DATA_FILE, club)))
+
+def get_data_service():
+    """Data service shared by every session of the current club"""
+    return get_club_data_service(current_club())
+
+def sync_session_data(force=False):
+    """Point this session at the latest shared snapshot; force also drops any private copies it holds"""
+    service = get_data_service()
+    version = service.refresh()
+    if version == st.session_state.data_version and not force:
+        return
+    version, data = service.snapshot()
+    for name in SHARED_DATA_FIELDS:
+        st.session_state[name] = data[name]
+    st.session_state.data_version = version
+
+def thaw_session_data():
+    """Copy-on-write: give this session editable copies of the shared data for the length of a transaction"""
+    # Match records are never edited in place (edits replace the record), so only the list itself is copied
+    st.session_state.match_history = list(st.session_state.match_history)
+    st.session_state.archived_seasons = list(st.session_state.archived_seasons)
+    for name in ("predefined_players",) + SHARED_MAPPINGS:
+        st.session_state[name] = thaw(st.session_state[name])
+
 def load_data():
-    """Load data from JSON files if they exist"""
-    if os.path.exists('badminton_data.json'):
-        with open('badminton_data.json', 'r') as f:
-            data = json.load(f)
-            st.session_state.predefined_players = data.get('predefined_players', st.session_state.predefined_players)
-            st.session_state.match_history = data.get('match_history', st.session_state.match_history)
-            st.session_state.player_rotation_history = data.get('player_rotation_history', st.session_state.player_rotation_history)
-            if 'admin_password_hash' in data:
-                st.session_state.admin_password_hash = data['admin_password_hash']
+    """Refresh this session from the shared data service"""
+    sync_session_data()
 
 def save_data():
-    """Save data to JSON file"""
-    data = {
-        'predefined_players': st.session_state.predefined_players,
-        'match_history': st.session_state.match_history,
-        'player_rotation_history': st.session_state.player_rotation_history,
-        'admin_password_hash': st.session_state.admin_password_hash
-    }
-    with open('badminton_data.json', 'w') as f:
-        json.dump(data, f)
+    """Commit this session's data through the shared data service, bumping the data version"""
+    version = get_data_service().commit(st.session_state.data_version, {name: st.session_state[name] for name in SHARED_DATA_FIELDS},
+                                        st.session_state.get("data_operation", "save"))
+    if version is None:
+        raise DataConflictError(f"Data changed after this session read version {st.session_state.data_version}")
+    st.session_state.data_version = version
+    if get_data_service().last_snapshot_version == version:
+        save_player_match_index()
+    st.session_state.data_updated = True
+
+def data_transaction(operation):
+    """Run a data-changing operation on the latest shared data, retrying it if another writer commits first"""
+    @functools.wraps(operation)
+    def wrapper(*args, **kwargs):
+        for attempt in range(DATA_COMMIT_RETRIES):
+            sync_session_data()
+            thaw_session_data()
+            # Journaled with the commit, so restores can be picked by operation
+            st.session_state.data_operation = operation.__name__
+            # Resyncing only resets shared data, so session-only data is put back by hand before a retry
+            session_data = {name: thaw(st.session_state[name]) for name in SESSION_DATA_FIELDS}
+            try:
+                return operation(*args, **kwargs)
+            except DataConflictError as e:
+                st.session_state.update(session_data)
+                logger.warning(f"Retrying {operation.__name__} after a conflicting commit: {str(e)}")
+            finally:
+                # Drop the private copies, whether committed or not, and share the latest snapshot again
+                st.session_state.pop("data_operation", None)
+                sync_session_data(force=True)
+        raise DataConflictError(f"{operation.__name__} conflicted with other writers {DATA_COMMIT_RETRIES} times")
+    return wrapper
+
+@st.fragment(run_every=DATA_WATCH_INTERVAL)
+def data_change_watcher():
+    """Rerun the app when another session commits, so open pages show new results"""
+    if get_data_service().refresh() != st.session_state.data_version:
+        st.rerun()
+
+def get_recovery_points():
+    """Versions the data can be restored to, as (version, timestamp, operation), newest first"""
+    service = get_data_service()
+    snapshots = list_snapshots(service.snapshot_dir)
+    if not snapshots:
+        return []
+    points = {version: (version, taken_at, "snapshot") for version, taken_at, _ in snapshots}
+    for entry in read_journal(service.journal_path):
+        if entry["version"] >= snapshots[0][0]:
+            points[entry["version"]] = (entry["version"], entry["timestamp"], entry["operation"])
+    return sorted(points.values(), reverse=True)
+
+def verify_in_scratch_copy(version, data, checksum=None):
+    """Write restored data to a scratch copy and read it back as the data service would, before it is swapped in"""
+    text = data_file_text(version, data)
+    if checksum is not None and hashlib.sha256(text.encode()).hexdigest() != checksum:
+        raise ValueError(f"Replayed data does not match the checksum journaled for version {version}")
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(get_data_service().path)), prefix=".restore.") as scratch_dir:
+        scratch_path = os.path.join(scratch_dir, DATA_FILE)
+        write_file_atomically(scratch_path, text)
+        with open(scratch_path, 'r') as f:
+            _, loaded = load_data_file_text(f.read())
+    for name in SHARED_RECORD_LISTS:
+        ids = [record["id"] for record in loaded[name]]
+        if len(ids) != len(set(ids)):
+            raise ValueError(f"Duplicate IDs in {name}")
+    return loaded
+
+def commit_restored_data(data, operation):
+    """Swap verified data in as a new version, so the restore itself is journaled and can be undone"""
+    service = get_data_service()
+    version = service.commit(service.refresh(), data, operation)
+    if version is None:
+        return "Error: Data changed while restoring. Please try again."
+    sync_session_data(force=True)
     st.session_state.data_updated = True
+    logger.info(f"Committed {operation} as data version {version}")
+    return f"Success: {operation[0].upper()}{operation[1:]} committed as data version {version}"
+
+def restore_data_version(target_version):
+    """Rebuild the data as of a journaled version from the nearest snapshot and commit it as a new version"""
+    service = get_data_service()
+    snapshots = [s for s in list_snapshots(service.snapshot_dir) if s[0] <= target_version]
+    if not snapshots:
+        return f"Error: No snapshot at or before version {target_version}"
+    entries = read_journal(service.journal_path)
+    checksum = next((e["checksum"] for e in entries if e["version"] == target_version), None)
+    try:
+        data = replay_journal(snapshots[-1][2], entries, target_version)
+        data = verify_in_scratch_copy(target_version, data, checksum)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Error restoring data version {target_version}: {str(e)}")
+        return f"Error: Could not restore version {target_version}: {str(e)}"
+    logger.info(f"Replayed {target_version - snapshots[-1][0]} journaled commits onto the snapshot of version {snapshots[-1][0]}")
+    return commit_restored_data(data, f"restore to version {target_version}")
+
+def restore_data_as_of(timestamp):
+    """Restore the data as it was at a timestamp ("YYYY-MM-DD HH:MM:SS")"""
+    points = [point for point in get_recovery_points() if point[1] <= timestamp]
+    if not points:
+        return f"Error: No recovery point at or before {timestamp}"
+    return restore_data_version(points[0][0])
+
+def restore_uploaded_data(content):
+    """Verify an uploaded data file in a scratch copy and commit it as a new version"""
+    try:
+        version, data = load_data_file_text(content.decode())
+        data = verify_in_scratch_copy(version, data)
+    except (UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        logger.error(f"Error restoring uploaded data file: {str(e)}")
+        return f"Error: Uploaded data file is not valid: {str(e)}"
+    return commit_restored_data(data, "restore from uploaded file")
+
+class AggregateCache:
+    """Process-wide cache of heavy aggregates and serialized figures, keyed by data version"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._latest_version = -1
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get((key, version))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, value):
+        with self._lock:
+            if version > self._latest_version:
+                # Every session reloads the latest data on rerun, so older versions are never read again
+                self._entries = {k: v for k, v in self._entries.items() if k[1] >= version}
+                self._latest_version = version
+            self._entries[(key, version)] = value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total * 100, 1) if total else 0,
+                "entries": len(self._entries),
+                "version": self._latest_version
+            }
+
+def get_aggregate_cache():
+    """Aggregate cache shared by every session of the current club"""
+    return get_club_resource("aggregate_cache", AggregateCache)
+
+def aggregate_cache_key(name):
+    """Cache key for an aggregate; temporary players are session-local, so they are part of the key"""
+    temp_key = tuple((p["id"], p["games_played"]) for p in st.session_state.temp_players)
+    return (name, temp_key)
+
+def get_cached_aggregate(name, compute):
+    """Return a cached aggregate for the current data version, computing it once per write"""
+    key = aggregate_cache_key(name)
+    cache = get_aggregate_cache()
+    value = cache.get(key, st.session_state.data_version)
+    if value is None:
+        start_time = time.time()
+        value = compute()
+        cache.put(key, st.session_state.data_version, value)
+        logger.info(f"Computed aggregate '{name}' for data version {st.session_state.data_version} in {(time.time() - start_time) * 1000:.1f} ms")
+    return value
 
 def log_chat_question_answer(question, answer):
     """Log the question and answer to a JSON file"""
-    chat_log_file = 'chat_history.json'
+    chat_log_file = club_file('chat_history.json')
     ist = pytz.timezone('Asia/Kolkata')
     timestamp = datetime.datetime.now(ist).strftime("%Y-%m-%d %H:%M:%S")
     log_entry = {
@@ -232,32 +924,255 @@ def get_player_id_by_name(name):
             return player["id"]
     return None
 
-def update_player_stats(player_id, points, is_winner):
-    """Update a player's statistics by ID"""
+def update_player_stats(player_id, points, is_winner, revert=False):
+    """Update a player's statistics by ID (revert=True removes a previously counted match)"""
+    sign = -1 if revert else 1
     for i, player in enumerate(st.session_state.predefined_players):
         if player["id"] == player_id:
-            st.session_state.predefined_players[i]["games_played"] += 1
-            st.session_state.predefined_players[i]["points_scored"] += points
+            st.session_state.predefined_players[i]["games_played"] += sign
+            st.session_state.predefined_players[i]["points_scored"] += sign * points
             if is_winner:
-                st.session_state.predefined_players[i]["wins"] += 1
+                st.session_state.predefined_players[i]["wins"] += sign
             return True
     
     for i, player in enumerate(st.session_state.temp_players):
         if player["id"] == player_id:
-            st.session_state.temp_players[i]["games_played"] += 1
-            st.session_state.temp_players[i]["points_scored"] += points
+            st.session_state.temp_players[i]["games_played"] += sign
+            st.session_state.temp_players[i]["points_scored"] += sign * points
             if is_winner:
-                st.session_state.temp_players[i]["wins"] += 1
+                st.session_state.temp_players[i]["wins"] += sign
             return True
     
     return False
 
+def apply_match_stats(match, revert=False):
+    """Add (or remove) one match's contribution to every participant's statistics"""
+    for pid in match["team_a"]:
+        update_player_stats(pid, match["score_a"], match["winning_team"] == "A", revert)
+    for pid in match["team_b"]:
+        update_player_stats(pid, match["score_b"], match["winning_team"] == "B", revert)
+
 def get_all_available_players():
     """Get list of all available players (predefined + temporary)"""
-    return st.session_state.predefined_players + st.session_state.temp_players
+    return [*st.session_state.predefined_players, *st.session_state.temp_players]
+
+# Rating engine (Elo-style, works for singles and doubles)
+RATING_BASE = 1500
+RATING_SCALE = 400
+RATING_K_FACTOR = 24
+RATING_SKILL_STEP = 100  # Rating offset per skill level away from 3, used to seed new players
+RATING_REFERENCE_MARGIN = 5  # A win by this many points moves ratings by exactly K * (actual - expected)
+
+def initial_rating(player):
+    """Seed rating for a player who has not been rated yet, based on their skill level"""
+    skill_level = player.get("skill_level", 3) if player else 3
+    return RATING_BASE + (skill_level - 3) * RATING_SKILL_STEP
+
+def expected_score(rating_a, rating_b):
+    """Probability that a side rated rating_a beats a side rated rating_b"""
+    return 1 / (1 + 10 ** ((rating_b - rating_a) / RATING_SCALE))
+
+def split_team_delta(team_ratings, team_delta):
+    """Split a team's rating change between partners.
+
+    The lower-rated partner takes the larger share of a win and the higher-rated
+    partner the larger share of a loss. Shares always average to 1, so the team's
+    mean rating moves by exactly team_delta.
+    """
+    n = len(team_ratings)
+    if n == 1:
+        return [team_delta]
+    total = sum(team_ratings)
+    if team_delta >= 0:
+        return [team_delta * n * (total - r) / ((n - 1) * total) for r in team_ratings]
+    return [team_delta * n * r / total for r in team_ratings]
+
+def compute_rating_deltas(ratings_a, ratings_b, score_a, score_b):
+    """Return per-player rating deltas for Team A and Team B of a single match"""
+    team_rating_a = sum(ratings_a) / len(ratings_a)
+    team_rating_b = sum(ratings_b) / len(ratings_b)
+    expected_a = expected_score(team_rating_a, team_rating_b)
+    actual_a = 1.0 if score_a > score_b else 0.0 if score_b > score_a else 0.5
+
+    # Weight by score margin, damped when the favourite wins to avoid rating inflation
+    margin = abs(score_a - score_b)
+    margin_multiplier = math.log(margin + 1) / math.log(RATING_REFERENCE_MARGIN + 1)
+    winner_gap = (team_rating_a - team_rating_b) if actual_a > 0.5 else (team_rating_b - team_rating_a)
+    margin_multiplier *= 2.2 / (max(winner_gap, 0) * 0.001 + 2.2)
+
+    team_delta = RATING_K_FACTOR * margin_multiplier * (actual_a - expected_a)
+    return split_team_delta(ratings_a, team_delta), split_team_delta(ratings_b, -team_delta)
+
+def apply_match_ratings(match, ratings, history=None, players_by_id=None):
+    """Apply one match to a ratings dict in place (O(team size)) and optionally append to rating history"""
+    def current(pid):
+        if pid not in ratings:
+            player = players_by_id.get(pid) if players_by_id is not None else get_player_by_id(pid)
+            ratings[pid] = initial_rating(player)
+        return ratings[pid]
+
+    if not match["team_a"] or not match["team_b"]:
+        if history is not None:
+            history["expected_a"].append(0.5)
+        return
+    ratings_a = [current(pid) for pid in match["team_a"]]
+    ratings_b = [current(pid) for pid in match["team_b"]]
+    if history is not None:
+        # Pre-match expectation, aligned with match history offsets
+        history["expected_a"].append(expected_score(sum(ratings_a) / len(ratings_a), sum(ratings_b) / len(ratings_b)))
+    deltas_a, deltas_b = compute_rating_deltas(ratings_a, ratings_b, match["score_a"], match["score_b"])
+
+    for pid, delta in zip(match["team_a"] + match["team_b"], deltas_a + deltas_b):
+        ratings[pid] = round(ratings[pid] + delta, 2)
+        if history is not None:
+            player_history = history["players"].setdefault(pid, {"match_ids": [], "timestamps": [], "ratings": []})
+            player_history["match_ids"].append(match["id"])
+            player_history["timestamps"].append(match["timestamp"])
+            player_history["ratings"].append(ratings[pid])
+    if history is not None:
+        history["match_count"] += 1
+
+def replay_ratings(match_history, players, start_ratings=None):
+    """Recompute all ratings and rating history in a single pass over match history, from archived ratings if given"""
+    players_by_id = {p["id"]: p for p in players}
+    ratings = dict(start_ratings or {})
+    history = {"match_count": 0, "players": {}, "expected_a": []}
+    for match in match_history:
+        apply_match_ratings(match, ratings, history, players_by_id)
+    return ratings, history
+
+def archived_ratings(archived_seasons=None):
+    """Ratings at the end of the latest archived season, where the replay of live matches starts"""
+    if archived_seasons is None:
+        archived_seasons = st.session_state.archived_seasons
+    return archived_seasons[-1]["end_ratings"] if archived_seasons else {}
+
+def rebuild_ratings():
+    """Full rating replay, used after match edits and deletions"""
+    ratings, history = replay_ratings(st.session_state.match_history, get_all_available_players(), archived_ratings())
+    st.session_state.player_ratings = ratings
+    logger.info(f"Replayed ratings over {history['match_count']} matches")
+
+def update_ratings_for_match(match_record):
+    """Incrementally update ratings for a newly recorded match"""
+    apply_match_ratings(match_record, st.session_state.player_ratings)
+
+def get_player_rating(player_id):
+    """Get a player's current rating"""
+    rating = st.session_state.player_ratings.get(player_id)
+    if rating is None:
+        rating = initial_rating(get_player_by_id(player_id))
+    return rating
+
+def get_rating_replay():
+    """Rating history of the live matches, replayed once per data version and shared by all sessions"""
+    return get_cached_aggregate("rating_history", lambda: replay_ratings(st.session_state.match_history, get_all_available_players(), archived_ratings())[1])
+
+def get_rating_history():
+    """Get per-player rating history arrays"""
+    return get_rating_replay()["players"]
+
+def get_pre_match_expectations():
+    """Team A's rating-based win expectation before each match, by match offset"""
+    return np.array(get_rating_replay()["expected_a"], dtype=float)
+
+def get_last_played(player_id):
+    """Epoch of the player's most recent recorded match, or None if they have not played"""
+    offset = get_player_match_index().last_match_offset(player_id)
+    if offset is None:
+        return None
+    return timestamp_to_epoch(st.session_state.match_history[offset]["timestamp"])
+
+def rotation_priority(player, rng):
+    """Heap key for who plays next: most sat out, fewest consecutive plays, longest since last match, then random"""
+    rotation = st.session_state.player_rotation_history.get(player["id"], {})
+    last_played = get_last_played(player["id"])
+    return (
+        -rotation.get("sat_out_count", 0),
+        rotation.get("consecutive_plays", 0),
+        last_played if last_played is not None else float("-inf"),
+        rng.random()
+    )
+
+def schedule_rotation(players, count, rng):
+    """Pick the count players due to play next and return (selected, waiting), both in priority order"""
+    heap = [(rotation_priority(player, rng), i, player) for i, player in enumerate(players)]
+    heapq.heapify(heap)
+    ordered = [heapq.heappop(heap)[2] for _ in range(len(heap))]
+    return ordered[:count], ordered[count:]
+
+# Team balancing
+TEAM_BALANCE_REPEAT_PENALTY = 30  # Rating points added for each teammate pair repeated from recent matches
+TEAM_BALANCE_LOOKBACK = 10  # Recent matches checked for repeated pairings
+
+RATING_SOURCES = {
+    "Ratings": lambda player: get_player_rating(player["id"]),
+    "Skill Levels": initial_rating,
+}
+
+def recent_partner_pairs(previous_teams=None, lookback=TEAM_BALANCE_LOOKBACK):
+    """Teammate pairs from the most recent matches and the previous teams, as frozensets of player IDs"""
+    pairs = set()
+    teams = [team for match in st.session_state.match_history[-lookback:] for team in (match["team_a"], match["team_b"])]
+    if previous_teams:
+        teams.extend([p["id"] for p in previous_teams.get(side, [])] for side in ("team_a", "team_b"))
+    for team in teams:
+        for i, pid in enumerate(team):
+            for other in team[i + 1:]:
+                pairs.add(frozenset((pid, other)))
+    return pairs
+
+def repeated_pairings(team_a, team_b, repeat_pairs):
+    """Number of teammate pairs in the two teams that appear in repeat_pairs"""
+    return sum(
+        frozenset((team[i]["id"], other["id"])) in repeat_pairs
+        for team in (team_a, team_b) for i in range(len(team)) for other in team[i + 1:]
+    )
 
-def generate_random_teams(players, previous_teams=None):
-    """Generate random teams with consideration for player sitting out history"""
+def split_cost(team_a, team_b, rating_source, repeat_pairs):
+    """Expected strength gap between two teams plus the penalty for repeated pairings"""
+    gap = abs(team_strength(team_a, rating_source) - team_strength(team_b, rating_source))
+    return gap + repeated_pairings(team_a, team_b, repeat_pairs) * TEAM_BALANCE_REPEAT_PENALTY
+
+def balance_teams(players, rating_source=None, repeat_pairs=None, rng=None):
+    """Split the players picked for one match (two or four) into the two teams with the smallest expected gap.
+
+    Every split is enumerated; with ratings they are scored by the win model, so partner
+    synergy counts too. Repeated pairings add a penalty. Returns (team_a, team_b, cost).
+    """
+    rating_source = rating_source or RATING_SOURCES["Ratings"]
+    repeat_pairs = repeat_pairs or set()
+    rng = rng or random.Random()
+    team_size = len(players) // 2
+    start = time.perf_counter()
+
+    rest = players[1:]
+    splits = []
+    for partners in itertools.combinations(range(len(rest)), team_size - 1):
+        splits.append(([players[0]] + [rest[i] for i in partners], [p for i, p in enumerate(rest) if i not in partners]))
+    if rating_source is RATING_SOURCES["Ratings"]:
+        # Score every split in one batch; the win probability maps back to an equivalent rating gap
+        probabilities, _ = predict_matchups(splits)
+        probabilities = np.clip(probabilities, 1e-6, 1 - 1e-6)
+        gaps = np.abs(np.log(probabilities / (1 - probabilities))) * RATING_SCALE / math.log(10)
+        costs = [gap + repeated_pairings(team_a, team_b, repeat_pairs) * TEAM_BALANCE_REPEAT_PENALTY
+                 for gap, (team_a, team_b) in zip(gaps, splits)]
+    else:
+        costs = [split_cost(team_a, team_b, rating_source, repeat_pairs) for team_a, team_b in splits]
+    best = min(range(len(splits)), key=costs.__getitem__)
+    (team_a, team_b), cost = splits[best], float(costs[best])
+
+    if rng.random() < 0.5:
+        team_a, team_b = team_b, team_a
+    logger.info(f"Balanced {len(players)} players in {(time.perf_counter() - start) * 1000:.2f} ms with cost {cost:.1f}")
+    return team_a, team_b, cost
+
+def generate_random_teams(players, previous_teams=None, seed=None, rating_source="Ratings"):
+    """Generate teams, choosing who plays from the rotation history (deterministic for a given seed).
+
+    With a rating source the selected players are split into the most balanced teams,
+    avoiding pairings from previous_teams and recent matches; with None they are shuffled.
+    """
     logger.info(f"Generating teams for match type: {st.session_state.match_type}")
     
     min_players_required = 4 if st.session_state.match_type.lower() == "doubles" else 2
@@ -265,27 +1180,25 @@ def generate_random_teams(players, previous_teams=None):
         logger.warning(f"Not enough players: {len(players)} available, need {min_players_required}")
         return None, None
     
-    waiting_priority = []
-    for player in players:
-        sat_out_count = np.random.randint(1, 100)
-        waiting_priority.append((player, sat_out_count))
-    
-    waiting_priority.sort(key=lambda x: x[1], reverse=True)
+    rng = random.Random(seed)
     players_per_team = 2 if st.session_state.match_type.lower() == "doubles" else 1
     total_players_needed = players_per_team * 2
     
     logger.info(f"Players per team: {players_per_team}, Total players needed: {total_players_needed}")
     
-    selected_players = [p[0] for p in waiting_priority[:total_players_needed]]
-    waiting_players = [p[0] for p in waiting_priority[total_players_needed:]]
+    selected_players, waiting_players = schedule_rotation(players, total_players_needed, rng)
     
     if len(selected_players) < total_players_needed:
         logger.warning(f"Could not select enough players: {len(selected_players)} selected, needed {total_players_needed}")
         return None, None
     
-    random.shuffle(selected_players)
-    team_a = selected_players[:players_per_team]
-    team_b = selected_players[players_per_team:total_players_needed]
+    if rating_source:
+        repeat_pairs = recent_partner_pairs(previous_teams)
+        team_a, team_b, _ = balance_teams(selected_players, RATING_SOURCES[rating_source], repeat_pairs, rng)
+    else:
+        rng.shuffle(selected_players)
+        team_a = selected_players[:players_per_team]
+        team_b = selected_players[players_per_team:total_players_needed]
     
     logger.info(f"Team A: {[p['name'] for p in team_a]}")
     logger.info(f"Team B: {[p['name'] for p in team_b]}")
@@ -294,6 +1207,9 @@ def generate_random_teams(players, previous_teams=None):
         logger.error(f"Team size mismatch: Team A has {len(team_a)}, Team B has {len(team_b)}, expected {players_per_team} per team")
         return None, None
     
+    # Copy-on-write: rotation counts stay private to this session until its next transaction commits them
+    if is_frozen(st.session_state.player_rotation_history):
+        st.session_state.player_rotation_history = thaw(st.session_state.player_rotation_history)
     for player in selected_players:
         if player["id"] not in st.session_state.player_rotation_history:
             st.session_state.player_rotation_history[player["id"]] = {"sat_out_count": 0, "consecutive_plays": 0}
@@ -308,30 +1224,749 @@ def generate_random_teams(players, previous_teams=None):
     st.session_state.waiting_queue = waiting_players
     return team_a, team_b
 
-def record_match_result(team_a, team_b, score_a, score_b, notes=""):
-    """Record match results, update player statistics, and push to Google Drive"""
-    match_id = str(uuid.uuid4())
-    ist = pytz.timezone('Asia/Kolkata')
-    timestamp = datetime.datetime.now(ist).strftime("%Y-%m-%d %H:%M:%S")
-    winning_team = "A" if score_a > score_b else "B"
-    
-    for player in team_a:
-        update_player_stats(player["id"], score_a, winning_team == "A")
-    for player in team_b:
-        update_player_stats(player["id"], score_b, winning_team == "B")
-    
-    match_record = {
-        "id": match_id,
-        "timestamp": timestamp,
+# Multi-court session planning
+SESSION_MATCH_MINUTES = 15
+SESSION_SWAP_ITERATIONS = 200  # Player swaps tried between courts per round
+SESSION_PARTNER_REPEAT_COST = 3.0  # Cost per previous game together as partners
+SESSION_OPPONENT_REPEAT_COST = 1.0  # Cost per previous game against each other
+SESSION_BALANCE_COST = 1 / 100  # Cost per rating point of gap between the two teams on a court
+
+def court_split(group, players_per_team, partners, opponents, ratings):
+    """Cheapest split of one court's players into two teams, as (cost, team_a, team_b)"""
+    best = None
+    rest = group[1:]
+    for others in itertools.combinations(range(len(rest)), players_per_team - 1):
+        team_a = [group[0]] + [rest[i] for i in others]
+        team_b = [p for i, p in enumerate(rest) if i not in others]
+        partner_repeats = sum(partners[x][y] for team in (team_a, team_b) for i, x in enumerate(team) for y in team[i + 1:])
+        opponent_repeats = sum(opponents[x][y] for x in team_a for y in team_b)
+        gap = abs(sum(ratings[x] for x in team_a) - sum(ratings[y] for y in team_b)) / players_per_team
+        cost = (partner_repeats * SESSION_PARTNER_REPEAT_COST + opponent_repeats * SESSION_OPPONENT_REPEAT_COST
+                + gap * SESSION_BALANCE_COST)
+        if best is None or cost < best[0]:
+            best = (cost, team_a, team_b)
+    return best
+
+def assign_courts(playing, players_per_team, partners, opponents, ratings, rng, iterations=SESSION_SWAP_ITERATIONS):
+    """Group the round's players onto courts, then swap players between courts while it lowers the total cost"""
+    players_per_court = players_per_team * 2
+    playing = list(playing)
+    rng.shuffle(playing)
+    groups = [playing[i:i + players_per_court] for i in range(0, len(playing), players_per_court)]
+    splits = [court_split(group, players_per_team, partners, opponents, ratings) for group in groups]
+    if len(groups) > 1:
+        for _ in range(iterations):
+            c1, c2 = rng.sample(range(len(groups)), 2)
+            i, j = rng.randrange(players_per_court), rng.randrange(players_per_court)
+            groups[c1][i], groups[c2][j] = groups[c2][j], groups[c1][i]
+            split_1 = court_split(groups[c1], players_per_team, partners, opponents, ratings)
+            split_2 = court_split(groups[c2], players_per_team, partners, opponents, ratings)
+            if split_1[0] + split_2[0] < splits[c1][0] + splits[c2][0]:
+                splits[c1], splits[c2] = split_1, split_2
+            else:
+                groups[c1][i], groups[c2][j] = groups[c2][j], groups[c1][i]
+    return [(team_a, team_b) for _, team_a, team_b in splits]
+
+def plan_session(attendees, courts, rounds, match_type="doubles", seed=None, fixed_rounds=None, credits=None):
+    """Plan every round of a session across courts.
+
+    Each round the players with the fewest games (then the longest rest) play, and the
+    court assignment minimizes repeated partners, repeated opponents and rating gaps.
+    fixed_rounds are kept as they are and counted toward the totals; credits gives
+    late arrivals a starting game count so they do not jump the queue.
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    players_per_team = 2 if match_type == "doubles" else 1
+    index = {pid: i for i, pid in enumerate(attendees)}
+    n = len(attendees)
+    partners = [[0] * n for _ in range(n)]
+    opponents = [[0] * n for _ in range(n)]
+    games = [(credits or {}).get(pid, 0) for pid in attendees]
+    last_round = [-1] * n
+    ratings = [get_player_rating(pid) for pid in attendees]
+
+    def count_round(round_number, court_teams):
+        for team_a, team_b in court_teams:
+            for team in (team_a, team_b):
+                for i, x in enumerate(team):
+                    games[x] += 1
+                    last_round[x] = round_number
+                    for y in team[i + 1:]:
+                        partners[x][y] += 1
+                        partners[y][x] += 1
+            for x in team_a:
+                for y in team_b:
+                    opponents[x][y] += 1
+                    opponents[y][x] += 1
+
+    planned = []
+    for round_number, fixed in enumerate(fixed_rounds or []):
+        court_teams = [([index[pid] for pid in court["team_a"] if pid in index], [index[pid] for pid in court["team_b"] if pid in index])
+                       for court in fixed["courts"]]
+        count_round(round_number, court_teams)
+        planned.append(fixed)
+
+    courts_used = min(courts, n // (players_per_team * 2))
+    for round_number in range(len(planned), rounds):
+        order = sorted(range(n), key=lambda i: (games[i], last_round[i], rng.random()))
+        playing, sitting = order[:courts_used * players_per_team * 2], order[courts_used * players_per_team * 2:]
+        court_teams = assign_courts(playing, players_per_team, partners, opponents, ratings, rng)
+        count_round(round_number, court_teams)
+        planned.append({
+            "courts": [{"team_a": [attendees[i] for i in team_a], "team_b": [attendees[i] for i in team_b]} for team_a, team_b in court_teams],
+            "sitting_out": [attendees[i] for i in sitting]
+        })
+
+    logger.info(f"Planned {rounds - len(fixed_rounds or [])} round(s) for {n} players on {courts_used} court(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return planned
+
+def new_session_plan(attendees, courts, session_minutes, match_minutes=SESSION_MATCH_MINUTES, match_type="doubles", seed=None):
+    """Create a session plan covering session_minutes with rounds of match_minutes"""
+    seed = seed if seed is not None else random.randrange(2 ** 32)
+    rounds = max(session_minutes // match_minutes, 1)
+    return {
+        "attendees": list(attendees),
+        "courts": courts,
+        "match_minutes": match_minutes,
+        "match_type": match_type,
+        "seed": seed,
+        "completed": 0,
+        "credits": {},
+        "rounds": plan_session(attendees, courts, rounds, match_type, seed)
+    }
+
+def replan_session(plan, attendees):
+    """Replan the rounds not yet played after players arrive or leave, keeping completed rounds"""
+    completed_rounds = plan["rounds"][:plan["completed"]]
+    played = defaultdict(int)
+    for round_plan in completed_rounds:
+        for court in round_plan["courts"]:
+            for pid in court["team_a"] + court["team_b"]:
+                played[pid] += 1
+    continuing = [pid for pid in attendees if pid in plan["attendees"]]
+    baseline = min((played[pid] + plan["credits"].get(pid, 0) for pid in continuing), default=0)
+    # Credits of players who left are kept; anyone (re)joining starts level with the least-played
+    # continuing player, counting the games they already played, which fixed_rounds include
+    credits = dict(plan["credits"])
+    for pid in attendees:
+        if pid not in plan["attendees"]:
+            credits[pid] = max(credits.get(pid, 0), baseline - played[pid])
+    plan.update({
+        "attendees": list(attendees),
+        "credits": credits,
+        "rounds": plan_session(attendees, plan["courts"], len(plan["rounds"]), plan["match_type"],
+                               plan["seed"] + plan["completed"], completed_rounds, credits)
+    })
+    return plan
+
+def session_plan_summary(plan):
+    """Per-player games and sit-outs plus repeat counts for a session plan.
+
+    Players only count the rounds they were there for, so the sit-out variance compares
+    each player's sit-out rate scaled to the whole session rather than raw counts.
+    """
+    games, sat_out, present = defaultdict(int), defaultdict(int), defaultdict(int)
+    partner_counts, opponent_counts = defaultdict(int), defaultdict(int)
+    for round_plan in plan["rounds"]:
+        for court in round_plan["courts"]:
+            for team in (court["team_a"], court["team_b"]):
+                for i, pid in enumerate(team):
+                    games[pid] += 1
+                    present[pid] += 1
+                    for other in team[i + 1:]:
+                        partner_counts[frozenset((pid, other))] += 1
+            for pid in court["team_a"]:
+                for other in court["team_b"]:
+                    opponent_counts[frozenset((pid, other))] += 1
+        for pid in round_plan["sitting_out"]:
+            sat_out[pid] += 1
+            present[pid] += 1
+    names_by_id = get_player_names_by_id()
+    table = pd.DataFrame([{
+        "Player": names_by_id.get(pid, pid),
+        "Rounds": present[pid],
+        "Games": games[pid],
+        "Sit Outs": sat_out[pid]
+    } for pid in plan["attendees"]])
+    rounds = len(plan["rounds"])
+    sit_out_rates = [sat_out[pid] / present[pid] * rounds for pid in plan["attendees"] if present[pid]]
+    return {
+        "table": table,
+        "sit_out_variance": float(np.var(sit_out_rates)) if sit_out_rates else 0.0,
+        "repeated_partners": sum(count - 1 for count in partner_counts.values() if count > 1),
+        "repeated_opponents": sum(count - 1 for count in opponent_counts.values() if count > 1)
+    }
+
+# Tournaments
+TOURNAMENT_FORMATS = {
+    "round_robin": "Round Robin",
+    "swiss": "Swiss",
+    "single_elimination": "Single Elimination",
+    "double_elimination": "Double Elimination",
+}
+BYE = "bye"  # Entrant ID of an empty bracket slot
+
+def make_tournament_entrants(player_ids, match_type):
+    """Entrants seeded by rating; for doubles the strongest remaining player partners the weakest"""
+    ranked = sorted(player_ids, key=get_player_rating, reverse=True)
+    if match_type == "doubles":
+        teams = [[ranked[i], ranked[-1 - i]] for i in range(len(ranked) // 2)]
+    else:
+        teams = [[pid] for pid in ranked]
+    names_by_id = get_player_names_by_id()
+    teams.sort(key=lambda team: sum(get_player_rating(pid) for pid in team) / len(team), reverse=True)
+    return [{
+        "id": f"e{seed}",
+        "name": " & ".join(names_by_id.get(pid, pid) for pid in team),
+        "player_ids": team,
+        "seed": seed,
+        "rating": round(sum(get_player_rating(pid) for pid in team) / len(team))
+    } for seed, team in enumerate(teams, start=1)]
+
+def new_fixture(tournament, round_number, stage, entrant_a=None, entrant_b=None):
+    """Append an unplayed fixture to the tournament"""
+    fixture = {
+        "id": len(tournament["fixtures"]),
+        "round": round_number,
+        "stage": stage,
+        "entrant_a": entrant_a,
+        "entrant_b": entrant_b,
+        "winner": None,
+        "loser": None,
+        "score_a": None,
+        "score_b": None,
+        "match_id": None,
+        "winner_to": None,
+        "loser_to": None
+    }
+    tournament["fixtures"].append(fixture)
+    return fixture
+
+def round_robin_pairings(entrant_ids):
+    """Round-robin rounds by the circle method; odd fields get a bye each round"""
+    ids = list(entrant_ids) + ([BYE] if len(entrant_ids) % 2 else [])
+    rounds = []
+    for _ in range(len(ids) - 1):
+        rounds.append([(ids[i], ids[-1 - i]) for i in range(len(ids) // 2)])
+        ids = [ids[0], ids[-1]] + ids[1:-1]
+    return rounds
+
+def bracket_seed_order(size):
+    """Seed numbers in bracket slot order, so seeds 1 and 2 can only meet in the final"""
+    order = [1]
+    while len(order) < size:
+        order = [s for seed in order for s in (seed, len(order) * 2 + 1 - seed)]
+    return order
+
+def build_winners_bracket(tournament):
+    """Single-elimination fixtures as lists per round, plus the first-round slots in seed order (byes for the top seeds)"""
+    entrants = tournament["entrants"]
+    size = 1 << (len(entrants) - 1).bit_length()
+    slots = [entrants[seed - 1]["id"] if seed <= len(entrants) else BYE for seed in bracket_seed_order(size)]
+    rounds = [[new_fixture(tournament, 1, "Winners") for _ in range(size // 2)]]
+    while len(rounds[-1]) > 1:
+        previous = rounds[-1]
+        current = [new_fixture(tournament, len(rounds) + 1, "Winners") for _ in range(len(previous) // 2)]
+        for i, fixture in enumerate(previous):
+            fixture["winner_to"] = [current[i // 2]["id"], "a" if i % 2 == 0 else "b"]
+        rounds.append(current)
+    return rounds, slots
+
+def seed_bracket(tournament, first_round, slots):
+    """Place seeded entrants into the first round, which settles bye fixtures straight away"""
+    for i, fixture in enumerate(first_round):
+        place_entrant(tournament, [fixture["id"], "a"], slots[2 * i])
+        place_entrant(tournament, [fixture["id"], "b"], slots[2 * i + 1])
+
+def build_double_elimination(tournament):
+    """Winners bracket, a losers bracket fed by winners-bracket losers, and a grand final"""
+    winners, slots = build_winners_bracket(tournament)
+    losers_round = 1
+    losers = [new_fixture(tournament, losers_round, "Losers") for _ in range(len(winners[0]) // 2)]
+    for i, fixture in enumerate(winners[0]):
+        fixture["loser_to"] = [losers[i // 2]["id"], "a" if i % 2 == 0 else "b"]
+    for r in range(1, len(winners)):
+        # Winners-bracket losers drop in, in reverse order to delay rematches
+        losers_round += 1
+        drop_in = [new_fixture(tournament, losers_round, "Losers") for _ in losers]
+        for fixture, previous, dropped in zip(drop_in, losers, reversed(winners[r])):
+            previous["winner_to"] = [fixture["id"], "a"]
+            dropped["loser_to"] = [fixture["id"], "b"]
+        losers = drop_in
+        if r < len(winners) - 1:
+            losers_round += 1
+            consolidation = [new_fixture(tournament, losers_round, "Losers") for _ in range(len(drop_in) // 2)]
+            for i, fixture in enumerate(drop_in):
+                fixture["winner_to"] = [consolidation[i // 2]["id"], "a" if i % 2 == 0 else "b"]
+            losers = consolidation
+
+    grand_final = new_fixture(tournament, 1, "Grand Final")
+    winners[-1][0]["winner_to"] = [grand_final["id"], "a"]
+    losers[0]["winner_to"] = [grand_final["id"], "b"]
+    # Seed last, so first-round byes flow into losers-bracket fixtures that already exist
+    seed_bracket(tournament, winners[0], slots)
+
+def swiss_pairings(ranked, opponents):
+    """Pair entrants in order, each with the highest placed one it has not met, backtracking before any rematch.
+
+    When every pairing of the field contains a rematch, each entrant in turn takes the first
+    one it has not met, or the next in line if it has met them all.
+    """
+    dead_ends = set()
+
+    def pair(remaining):
+        if not remaining:
+            return []
+        if remaining in dead_ends:
+            return None
+        first, rest = remaining[0], remaining[1:]
+        for i, eid in enumerate(rest):
+            if eid not in opponents[first]:
+                pairs = pair(rest[:i] + rest[i + 1:])
+                if pairs is not None:
+                    return [(first, eid)] + pairs
+        dead_ends.add(remaining)
+        return None
+
+    pairs = pair(tuple(ranked))
+    if pairs is None:
+        pairs, remaining = [], list(ranked)
+        while remaining:
+            first = remaining.pop(0)
+            partner = next((eid for eid in remaining if eid not in opponents[first]), remaining[0])
+            remaining.remove(partner)
+            pairs.append((first, partner))
+    return pairs
+
+def pair_swiss_round(tournament):
+    """Pair the next Swiss round by current standing, avoiding rematches; the lowest entrant without a bye gets one"""
+    round_number = max((f["round"] for f in tournament["fixtures"]), default=0) + 1
+    ranked = [row["id"] for row in tournament_standings(tournament)]
+    bye = None
+    if len(ranked) % 2:
+        bye = next((eid for eid in reversed(ranked) if not tournament["standings"][eid]["byes"]), ranked[-1])
+        ranked.remove(bye)
+    if round_number == 1:
+        # Top half meets bottom half: 1 v n/2+1, 2 v n/2+2, ...
+        half = len(ranked) // 2
+        ranked = [eid for pair in zip(ranked[:half], ranked[half:]) for eid in pair]
+    opponents = {eid: tournament["standings"][eid]["opponents"] for eid in ranked}
+    for first, partner in swiss_pairings(ranked, opponents):
+        new_fixture(tournament, round_number, "League", first, partner)
+    if bye:
+        # Settled after the real pairings exist, so the round is not mistaken for finished
+        complete_fixture(tournament, new_fixture(tournament, round_number, "League", bye, BYE), bye, BYE)
+
+@data_transaction
+def create_tournament(name, tournament_format, match_type, player_ids, swiss_rounds=None):
+    """Create a seeded tournament and store it with the rest of the data"""
+    if not name.strip():
+        return "Error: Tournament name is required"
+    if tournament_format not in TOURNAMENT_FORMATS:
+        return f"Error: Unknown tournament format {tournament_format}"
+    if match_type == "doubles" and len(player_ids) % 2:
+        return "Error: Doubles tournaments need an even number of players"
+    entrants = make_tournament_entrants(player_ids, match_type)
+    min_entrants = 3 if tournament_format == "double_elimination" else 2
+    if len(entrants) < min_entrants:
+        return f"Error: {TOURNAMENT_FORMATS[tournament_format]} needs at least {min_entrants} teams"
+
+    tournament = {
+        "id": str(uuid.uuid4()),
+        "name": name.strip(),
+        "format": tournament_format,
+        "match_type": match_type,
+        "entrants": entrants,
+        "fixtures": [],
+        "standings": {e["id"]: {"played": 0, "wins": 0, "losses": 0, "points_for": 0, "points_against": 0, "byes": 0, "opponents": []} for e in entrants},
+        "head_to_head": {},
+        "swiss_rounds": swiss_rounds or max(1, math.ceil(math.log2(len(entrants)))),
+        "status": "active",
+        "champion": None,
+        "created": datetime.datetime.now(pytz.timezone('Asia/Kolkata')).strftime(TIMESTAMP_FORMAT)
+    }
+    if tournament_format == "round_robin":
+        for round_number, pairings in enumerate(round_robin_pairings([e["id"] for e in entrants]), start=1):
+            for entrant_a, entrant_b in pairings:
+                if BYE not in (entrant_a, entrant_b):
+                    new_fixture(tournament, round_number, "League", entrant_a, entrant_b)
+    elif tournament_format == "swiss":
+        pair_swiss_round(tournament)
+    elif tournament_format == "single_elimination":
+        rounds, slots = build_winners_bracket(tournament)
+        seed_bracket(tournament, rounds[0], slots)
+    else:
+        build_double_elimination(tournament)
+
+    st.session_state.tournaments[tournament["id"]] = tournament
+    save_data()
+    push_to_gdrive(match_history=True)
+    logger.info(f"Created {TOURNAMENT_FORMATS[tournament_format]} tournament '{tournament['name']}' with {len(entrants)} entrants")
+    return f"Success: Created tournament '{tournament['name']}' with {len(entrants)} entrants"
+
+@data_transaction
+def delete_tournament(tournament_id):
+    """Remove a tournament from the shared data"""
+    tournament = st.session_state.tournaments.pop(tournament_id, None)
+    if tournament is None:
+        return "Error: Tournament not found"
+    save_data()
+    push_to_gdrive(match_history=True)
+    logger.info(f"Deleted tournament '{tournament['name']}'")
+    return f"Success: Deleted tournament '{tournament['name']}'"
+
+def place_entrant(tournament, target, entrant_id):
+    """Move an entrant into a fixture slot, settling the fixture at once if the other side is a bye"""
+    if target is None:
+        return
+    fixture = tournament["fixtures"][target[0]]
+    fixture[f"entrant_{target[1]}"] = entrant_id
+    if fixture["winner"] is None and fixture["entrant_a"] is not None and fixture["entrant_b"] is not None and BYE in (fixture["entrant_a"], fixture["entrant_b"]):
+        winner = fixture["entrant_b"] if fixture["entrant_a"] == BYE else fixture["entrant_a"]
+        complete_fixture(tournament, fixture, winner, BYE)
+
+def complete_fixture(tournament, fixture, winner, loser, score_a=None, score_b=None, match_id=None):
+    """Record a fixture result, update standings and head-to-head incrementally, and advance the bracket"""
+    fixture.update({"winner": winner, "loser": loser, "score_a": score_a, "score_b": score_b, "match_id": match_id})
+    tally_fixture(tournament, fixture)
+
+    place_entrant(tournament, fixture["winner_to"], winner)
+    place_entrant(tournament, fixture["loser_to"], loser)
+
+    if fixture["stage"] == "Grand Final" and fixture["round"] == 1 and winner == fixture["entrant_b"]:
+        # The losers-bracket finalist won, so both now have one loss: play a deciding final
+        new_fixture(tournament, 2, "Grand Final", fixture["entrant_a"], fixture["entrant_b"])
+    update_tournament_status(tournament)
+
+def tally_fixture(tournament, fixture, sign=1):
+    """Add a played fixture's result to the standings and head-to-head, or take it out again with sign=-1"""
+    winner, loser = fixture["winner"], fixture["loser"]
+    standings = tournament["standings"]
+    if BYE not in (winner, loser):
+        points = {fixture["entrant_a"]: (fixture["score_a"], fixture["score_b"]), fixture["entrant_b"]: (fixture["score_b"], fixture["score_a"])}
+        for entrant_id, won in ((winner, True), (loser, False)):
+            record = standings[entrant_id]
+            record["played"] += sign
+            record["wins" if won else "losses"] += sign
+            record["points_for"] += sign * points[entrant_id][0]
+            record["points_against"] += sign * points[entrant_id][1]
+            if sign > 0:
+                record["opponents"].append(loser if won else winner)
+            else:
+                record["opponents"].remove(loser if won else winner)
+        tournament["head_to_head"][f"{winner}>{loser}"] = tournament["head_to_head"].get(f"{winner}>{loser}", 0) + sign
+    elif winner != BYE and tournament["format"] == "swiss":
+        standings[winner]["wins"] += sign
+        standings[winner]["byes"] += sign
+
+def reopen_fixture(tournament, fixture):
+    """Undo a played fixture: its standings, the slots its entrants advanced to and any bye fixture that settled.
+
+    Returns an "Error: ..." message if a later result depends on it (a played fixture it fed, or a later Swiss round).
+    """
+    fixtures = tournament["fixtures"]
+    if tournament["format"] == "swiss" and fixture["round"] < max(f["round"] for f in fixtures):
+        return f"Error: Later rounds of tournament '{tournament['name']}' were paired from this result"
+    if fixture["stage"] == "Grand Final" and fixture["round"] == 1 and fixtures[-1] is not fixture and fixtures[-1]["stage"] == "Grand Final":
+        if fixtures[-1]["winner"] is not None:
+            return f"Error: The deciding final of tournament '{tournament['name']}' was already played"
+        fixtures.pop()
+    for target in (fixture["winner_to"], fixture["loser_to"]):
+        if target is None:
+            continue
+        downstream = fixtures[target[0]]
+        if downstream["winner"] is not None:
+            if BYE not in (downstream["entrant_a"], downstream["entrant_b"]):
+                return f"Error: A later fixture of tournament '{tournament['name']}' was already played"
+            error = reopen_fixture(tournament, downstream)  # Settled by a bye as soon as this entrant arrived
+            if error:
+                return error
+        downstream[f"entrant_{target[1]}"] = None
+    tally_fixture(tournament, fixture, -1)
+    fixture.update({"winner": None, "loser": None, "score_a": None, "score_b": None, "match_id": None})
+    tournament["status"] = "active"
+    tournament.pop("champion", None)
+    return None
+
+def update_tournament_status(tournament):
+    """Start the next Swiss round or mark the tournament complete once every fixture is played"""
+    if any(f["winner"] is None for f in tournament["fixtures"]):
+        return
+    if tournament["format"] == "swiss":
+        played_rounds = max(f["round"] for f in tournament["fixtures"])
+        if played_rounds < tournament["swiss_rounds"]:
+            pair_swiss_round(tournament)
+            return
+    final = tournament["fixtures"][-1]
+    if tournament["format"] in ("single_elimination", "double_elimination"):
+        tournament["champion"] = final["winner"]
+    else:
+        tournament["champion"] = tournament_standings(tournament)[0]["id"]
+    tournament["status"] = "complete"
+    logger.info(f"Tournament '{tournament['name']}' complete")
+
+def tournament_standings(tournament):
+    """Entrants ranked by wins, then point difference, then head-to-head among the tied, then seed"""
+    standings = tournament["standings"]
+
+    def base_key(entrant):
+        record = standings[entrant["id"]]
+        return (-record["wins"], record["points_against"] - record["points_for"])
+
+    ranked = []
+    for _, group in itertools.groupby(sorted(tournament["entrants"], key=base_key), key=base_key):
+        group = list(group)
+        tied = {e["id"] for e in group}
+        head_to_head = {e["id"]: sum(tournament["head_to_head"].get(f"{e['id']}>{other}", 0) for other in tied) for e in group}
+        group.sort(key=lambda e: (-head_to_head[e["id"]], e["seed"]))
+        ranked.extend(group)
+    return [dict(standings[e["id"]], id=e["id"], name=e["name"], seed=e["seed"]) for e in ranked]
+
+def find_tournament_fixture(team_a, team_b, tournaments=None):
+    """Pending fixture in an active tournament between these teams, as (tournament, fixture, swapped) or None"""
+    key_a, key_b = frozenset(team_a), frozenset(team_b)
+    if tournaments is None:
+        tournaments = st.session_state.tournaments
+    for tournament in tournaments.values():
+        if tournament["status"] != "active":
+            continue
+        players = {e["id"]: frozenset(e["player_ids"]) for e in tournament["entrants"]}
+        for fixture in tournament["fixtures"]:
+            if fixture["winner"] is not None or fixture["entrant_a"] in (None, BYE) or fixture["entrant_b"] in (None, BYE):
+                continue
+            fixture_teams = (players[fixture["entrant_a"]], players[fixture["entrant_b"]])
+            if fixture_teams == (key_a, key_b):
+                return tournament, fixture, False
+            if fixture_teams == (key_b, key_a):
+                return tournament, fixture, True
+    return None
+
+def record_tournament_result(match_record, tournaments=None):
+    """Apply a recorded match to the matching pending tournament fixture, if there is one"""
+    found = find_tournament_fixture(match_record["team_a"], match_record["team_b"], tournaments)
+    if not found:
+        return
+    tournament, fixture, swapped = found
+    complete_fixture_from_match(tournament, fixture, match_record, swapped)
+    logger.info(f"Recorded fixture {fixture['id']} of tournament '{tournament['name']}' from match {match_record['id']}")
+
+def complete_fixture_from_match(tournament, fixture, match_record, swapped):
+    """Complete a fixture with a match's result; swapped when the match's Team A is the fixture's entrant B"""
+    score_a, score_b = match_record["score_a"], match_record["score_b"]
+    if swapped:
+        score_a, score_b = score_b, score_a
+    entrant_a_won = (match_record["winning_team"] == "A") != swapped
+    winner, loser = (fixture["entrant_a"], fixture["entrant_b"]) if entrant_a_won else (fixture["entrant_b"], fixture["entrant_a"])
+    complete_fixture(tournament, fixture, winner, loser, score_a, score_b, match_record["id"])
+
+def find_match_fixture(match_id, tournaments=None):
+    """The tournament fixture a recorded match completed, as (tournament, fixture), or None"""
+    if tournaments is None:
+        tournaments = st.session_state.tournaments
+    for tournament in tournaments.values():
+        for fixture in tournament["fixtures"]:
+            if fixture["match_id"] == match_id:
+                return tournament, fixture
+    return None
+
+def revise_tournament_result(match_id, match_record=None):
+    """Reopen the fixture a deleted match completed, or re-score it from the edited match_record.
+
+    Returns an "Error: ..." message if a later result depends on a changed winner, else None.
+    """
+    found = find_match_fixture(match_id)
+    if not found:
+        return None
+    tournament, fixture = found
+    if match_record is not None:
+        entrant_a = next(e for e in tournament["entrants"] if e["id"] == fixture["entrant_a"])
+        swapped = frozenset(match_record["team_a"]) != frozenset(entrant_a["player_ids"])
+        if ((match_record["winning_team"] == "A") != swapped) == (fixture["winner"] == fixture["entrant_a"]):
+            # Same winner: only the scores in the standings change, the bracket stays as it is
+            tally_fixture(tournament, fixture, -1)
+            score_a, score_b = match_record["score_a"], match_record["score_b"]
+            fixture.update({"score_a": score_b if swapped else score_a, "score_b": score_a if swapped else score_b})
+            tally_fixture(tournament, fixture)
+            return None
+    error = reopen_fixture(tournament, fixture)
+    if error:
+        return error
+    if match_record is not None:
+        complete_fixture_from_match(tournament, fixture, match_record, swapped)
+    logger.info(f"{'Re-scored' if match_record else 'Reopened'} fixture {fixture['id']} of tournament '{tournament['name']}' after match {match_id} changed")
+    return None
+
+# Live rally scoring: a match's rallies are kept as one byte per point, b"A" or b"B" for the side that won it,
+# and stored on the finished match record as the string "rallies" (about 40 bytes for a 21-19 game)
+RALLY_TEAMS = b"AB"
+RALLY_POINT_CAP = 30  # At 29-all the next rally wins the game
+MOMENTUM_WINDOW = 5  # Rallies in the rolling momentum of the rally chart
+LIVE_RECENT_RESULTS = 5  # Finished live matches the scoreboard keeps showing
+SCOREBOARD_REFRESH_SECONDS = 2
+
+def rally_score(rallies):
+    """(score_a, score_b) after a rally log"""
+    score_a = rallies.count(RALLY_TEAMS[:1])
+    return score_a, len(rallies) - score_a
+
+def rally_game_winner(score_a, score_b):
+    """"A" or "B" once a side has won the game (21 by two clear points, or 30), else None"""
+    high = max(score_a, score_b)
+    if high >= RALLY_POINT_CAP or (high >= WINNING_SCORE and abs(score_a - score_b) >= 2):
+        return "A" if score_a > score_b else "B"
+    return None
+
+def validate_rallies(match_record):
+    """Check an optional rally log against the final score; "Error: ..." or None"""
+    rallies = match_record.get("rallies")
+    if rallies is None:
+        return None
+    if not isinstance(rallies, str) or not rallies or rallies.strip("AB"):
+        return "Error: Rallies must be a string of A and B, one letter per point"
+    if rally_score(rallies.encode("ascii")) != (match_record["score_a"], match_record["score_b"]):
+        return "Error: Rallies do not add up to the score"
+    return None
+
+class LiveMatches:
+    """Matches being scored rally by rally, shared by a club's sessions; version changes with every rally"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matches = {}
+        self._recent = deque(maxlen=LIVE_RECENT_RESULTS)
+        self._board = (None, None)
+        self.version = 0
+
+    def _view(self, match):
+        return {**match, "rallies": bytes(match["rallies"])}
+
+    def start(self, team_a, team_b, court=""):
+        match_id = str(uuid.uuid4())
+        with self._lock:
+            self._matches[match_id] = {
+                "id": match_id,
+                "team_a": [{"id": p["id"], "name": p["name"]} for p in team_a],
+                "team_b": [{"id": p["id"], "name": p["name"]} for p in team_b],
+                "court": court,
+                "started_at": time.time(),
+                "rallies": bytearray()
+            }
+            self.version += 1
+        return match_id
+
+    def get(self, match_id):
+        """The match with its rallies so far, or None once it is finished or discarded"""
+        with self._lock:
+            match = self._matches.get(match_id)
+            return self._view(match) if match else None
+
+    def list(self):
+        with self._lock:
+            return [self._view(match) for match in self._matches.values()]
+
+    def add_rally(self, match_id, team):
+        """Record one rally won by team ("A" or "B"); ignored once the game is won"""
+        with self._lock:
+            match = self._matches.get(match_id)
+            if match and rally_game_winner(*rally_score(match["rallies"])) is None:
+                match["rallies"].extend(team.encode("ascii"))
+                self.version += 1
+
+    def undo(self, match_id):
+        with self._lock:
+            match = self._matches.get(match_id)
+            if match and match["rallies"]:
+                del match["rallies"][-1]
+                self.version += 1
+
+    def remove(self, match_id):
+        with self._lock:
+            if self._matches.pop(match_id, None) is not None:
+                self.version += 1
+
+    def claim(self, match_id):
+        """Take a match off the live list to record it; only one caller gets it, the others get None"""
+        with self._lock:
+            match = self._matches.pop(match_id, None)
+            if match is not None:
+                self.version += 1
+            return match
+
+    def restore(self, match):
+        """Put back a claimed match whose recording failed, rallies intact"""
+        with self._lock:
+            self._matches[match["id"]] = match
+            self.version += 1
+
+    def finish(self, match):
+        """Show a claimed match that was recorded among the recent results"""
+        with self._lock:
+            self._recent.appendleft(self._view(match))
+            self.version += 1
+
+    def board(self, render):
+        """render(live, recent) for the current version, computed once per change and shared by every viewer"""
+        version, rendered = self._board
+        if version != self.version:
+            with self._lock:
+                version = self.version
+                rendered = render([self._view(match) for match in self._matches.values()], list(self._recent))
+                self._board = (version, rendered)
+        return rendered
+
+@st.cache_resource
+def get_live_match_store():
+    """Live matches of every club, kept out of the club registry so evicting an idle club never drops a game in progress"""
+    return threading.Lock(), {}
+
+def get_live_matches():
+    """Live matches shared by every session of the current club (kept in memory until recorded)"""
+    lock, clubs = get_live_match_store()
+    with lock:
+        if current_club() not in clubs:
+            clubs[current_club()] = LiveMatches()
+        return clubs[current_club()]
+
+def record_live_match(match_id, notes=""):
+    """Record a finished live match, with the score derived from its rally log"""
+    live_matches = get_live_matches()
+    # Claimed before recording, so two admins pressing record at once cannot both record it
+    match = live_matches.claim(match_id)
+    if match is None:
+        return "Error: The live match is no longer in progress."
+    score_a, score_b = rally_score(match["rallies"])
+    if rally_game_winner(score_a, score_b) is None:
+        live_matches.restore(match)
+        return f"Error: The game is not finished yet ({score_a}-{score_b})."
+    try:
+        result = record_match_result(match["team_a"], match["team_b"], score_a, score_b, notes, rallies=match["rallies"].decode("ascii"))
+    except Exception:
+        live_matches.restore(match)
+        raise
+    if isinstance(result, str):
+        live_matches.restore(match)
+        return result
+    live_matches.finish(match)
+    logger.info(f"Recorded live match {match_id} ({score_a}-{score_b}, {len(match['rallies'])} rallies)")
+    return f"Success: Match recorded {score_a}-{score_b}."
+
+@data_transaction
+def record_match_result(team_a, team_b, score_a, score_b, notes="", rallies=None):
+    """Record a match from the form or live scoring, update player statistics, and push to Google Drive"""
+    match_record = build_match_record({
         "team_a": [p["id"] for p in team_a],
         "team_b": [p["id"] for p in team_b],
         "score_a": score_a,
         "score_b": score_b,
-        "winning_team": winning_team,
-        "notes": notes
-    }
-    
-    st.session_state.match_history.append(match_record)
+        "notes": notes,
+        "rallies": rallies
+    }, {})
+    # Same checks as every other way in, so a tie is refused rather than recorded as a Team B win
+    error = validate_submitted_match(match_record) or validate_match_record(match_record, {p["id"] for p in get_all_available_players()})
+    if error:
+        return error
+    append_match_record(match_record)
     save_data()
     push_to_gdrive(match_history=True)
     return match_record
@@ -339,7 +1974,7 @@ def record_match_result(team_a, team_b, score_a, score_b, notes=""):
 def process_prompt_match_result(prompt):
     """Process user prompt with LLM to generate a match record JSON"""
     try:
-        with open('badminton_data.json', 'r', encoding='utf-8') as file:
+        with open(club_file(DATA_FILE), 'r', encoding='utf-8') as file:
             badminton_data = json.load(file)
 
         expected_json_format = \
@@ -451,42 +2086,159 @@ def process_prompt_match_result(prompt):
     except Exception as e:
         logger.error(f"Prompt processing error: {str(e)}")
         return f"Error: Failed to process prompt: {str(e)}"
+
+# Batch prompts: a pasted list is parsed locally when every line reads like "Golu & Saurabh vs Pavan & Shraddha 21-18",
+# otherwise the whole description goes to the LLM in one call that returns every match
+BATCH_LINE_PATTERN = re.compile(
+    r"^(?:\d+[.)]\s*|[-*•]\s*)?(?P<team_a>.+?)\s+(?:vs\.?|v\.?|versus)\s+(?P<team_b>.+?)[\s,:-]+"
+    r"(?P<score_a>\d{1,2})\s*[-:/]\s*(?P<score_b>\d{1,2})\b[\s,.;:-]*(?P<notes>.*)$",
+    re.IGNORECASE
+)
+BATCH_TEAM_SEPARATOR = re.compile(r"\s*(?:&|/|\+|,|\band\b)\s*", re.IGNORECASE)
+BATCH_MAX_MATCHES = 50
+
+def parse_match_lines(text, name_index):
+    """Match entries for a list with one known-player match per line, or None if any line needs the LLM"""
+    entries = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        found = BATCH_LINE_PATTERN.match(line.strip())
+        if not found:
+            return None
+        teams = [[name for name in BATCH_TEAM_SEPARATOR.split(found[team].strip()) if name] for team in ("team_a", "team_b")]
+        if not all(name.lower() in name_index for team in teams for name in team):
+            return None
+        entries.append({
+            "team_a": teams[0],
+            "team_b": teams[1],
+            "score_a": int(found["score_a"]),
+            "score_b": int(found["score_b"]),
+            "notes": found["notes"].strip()
+        })
+    return entries or None
+
+def extract_matches_with_llm(prompt, players):
+    """All matches described in a prompt from one LLM call, as entries with player IDs; or an "Error: ..." string"""
+    roster = [{"id": p["id"], "name": p["name"]} for p in players]
+    prompt_text = f"""You are BadmintonBuddy, an expert in turning descriptions of a badminton session into JSON match records.
+
+**Instructions**:
+- The description may cover several matches, as prose or as a list. Return every match, in the order described.
+- Map player names to IDs using the roster below, matching names case-insensitively.
+- Each team has 1 player (singles) or 2 players (doubles); both teams of a match have the same number of players.
+- Scores are non-negative integers. Add a short note per match from any details given, else an empty string.
+- Return *only* a JSON array with one object per match, with no additional text, markdown, code blocks, or comments:
+[{{"team_a": ["<player_id>", ...], "team_b": ["<player_id>", ...], "score_a": <integer>, "score_b": <integer>, "notes": "<note>"}}]
+- If a player is not in the roster or a match is missing teams or scores, return only a string starting with "Error: " naming the problem.
+
+**Roster**:
+{json.dumps(roster)}
+
+**Description**:
+{prompt}
+"""
+    logger.info(f"Processing batch prompt with {len(prompt)} characters")
+    model = ChatGoogleGenerativeAI(
+        model=st.session_state.llm_model,
+        google_api_key=st.session_state.api_key,
+        temperature=0.05
+    )
+    response_content = model.invoke([HumanMessage(content=prompt_text)]).content.strip()
+    logger.info(f"Raw LLM batch response: {response_content}")
+    if response_content.startswith("Error:"):
+        return response_content
+    try:
+        entries = json.loads(response_content.replace("```json", "").replace("```", "").strip())
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON parsing error: {str(e)}, response: {response_content}")
+        return f"Error: Invalid JSON response from LLM: {response_content}"
+    if isinstance(entries, dict):
+        entries = [entries]
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        return "Error: The LLM did not return a list of matches"
+    return entries
+
+def process_batch_match_prompt(prompt):
+    """Match records for a multi-match prompt, each paired with its validation error (or None).
+
+    Returns (records, source) with source "list" or "LLM", or an "Error: ..." string.
+    """
+    try:
+        players = get_all_available_players()
+        players_by_id = {p["id"]: p for p in players}
+        name_index = {p["name"].strip().lower(): p["id"] for p in players}
+        entries = parse_match_lines(prompt, name_index)
+        source = "list"
+        if entries is None:
+            source = "LLM"
+            entries = extract_matches_with_llm(prompt, players)
+            if isinstance(entries, str):
+                return entries
+        if not entries:
+            return "Error: No matches found in the prompt"
+        if len(entries) > BATCH_MAX_MATCHES:
+            return f"Error: At most {BATCH_MAX_MATCHES} matches can be recorded at once"
+
+        # One second apart, so the matches keep the order they were described in
+        now = datetime.datetime.now(pytz.timezone('Asia/Kolkata'))
+        records = []
+        for i, entry in enumerate(entries):
+            entry["timestamp"] = (now - datetime.timedelta(seconds=len(entries) - 1 - i)).strftime("%Y-%m-%d %H:%M:%S")
+            entry.pop("id", None)
+            record = build_match_record(entry, name_index)
+            records.append((record, validate_submitted_match(record) or validate_match_record(record, players_by_id)))
+        logger.info(f"Batch prompt gave {len(records)} matches from the {source}")
+        return records, source
+    except Exception as e:
+        logger.error(f"Batch prompt processing error: {str(e)}")
+        return f"Error: Failed to process prompt: {str(e)}"
+
+def validate_match_record(match_record, player_ids):
+    """Check a complete match record against the known player IDs; returns an "Error: ..." message or None"""
+    required_fields = ["id", "timestamp", "team_a", "team_b", "score_a", "score_b", "winning_team", "notes"]
+    if not all(field in match_record for field in required_fields):
+        return f"Error: Missing required fields in match record: {list(set(required_fields) - set(match_record.keys()))}"
+    
+    # Validate player IDs
+    for pid in match_record["team_a"] + match_record["team_b"]:
+        if pid not in player_ids:
+            return f"Error: Invalid player ID: {pid}"
+    
+    # Validate scores
+    if not (isinstance(match_record["score_a"], int) and isinstance(match_record["score_b"], int)):
+        return f"Error: Scores must be integers"
+    if match_record["score_a"] < 0 or match_record["score_b"] < 0:
+        return f"Error: Scores cannot be negative"
+    if match_record["winning_team"] not in ("A", "B"):
+        return f"Error: Winning team must be 'A' or 'B'"
     
+    # No need to check team size as handled by the propmt
+    # Validate team sizes based on match type
+    # expected_players = 1 if st.session_state.match_type == "singles" else 2
+    # if len(match_record["team_a"]) != expected_players or len(match_record["team_b"]) != expected_players:
+    #     return f"Error: Incorrect number of players per team. Expected {expected_players} per team."
+    return None
+    
+def append_match_record(match_record):
+    """Add a validated match to the session's history, player stats, ratings and tournaments"""
+    for pid in match_record["team_a"]:
+        update_player_stats(pid, match_record["score_a"], match_record["winning_team"] == "A")
+    for pid in match_record["team_b"]:
+        update_player_stats(pid, match_record["score_b"], match_record["winning_team"] == "B")
+    st.session_state.match_history.append(match_record)
+    update_ratings_for_match(match_record)
+    record_tournament_result(match_record)
+
+@data_transaction
 def record_prompt_match_result(match_record):
     """Append match record from prompt to match history and update stats"""
     try:
-        # Validate match record
-        required_fields = ["id", "timestamp", "team_a", "team_b", "score_a", "score_b", "winning_team", "notes"]
-        if not all(field in match_record for field in required_fields):
-            return f"Error: Missing required fields in match record: {list(set(required_fields) - set(match_record.keys()))}"
-        
-        # Validate player IDs
-        all_players = get_all_available_players()
-        player_ids = {p["id"] for p in all_players}
-        for pid in match_record["team_a"] + match_record["team_b"]:
-            if pid not in player_ids:
-                return f"Error: Invalid player ID: {pid}"
-        
-        # Validate scores
-        if not (isinstance(match_record["score_a"], int) and isinstance(match_record["score_b"], int)):
-            return f"Error: Scores must be integers"
-        if match_record["score_a"] < 0 or match_record["score_b"] < 0:
-            return f"Error: Scores cannot be negative"
-        
-        # No need to check team size as handled by the propmt
-        # Validate team sizes based on match type
-        # expected_players = 1 if st.session_state.match_type == "singles" else 2
-        # if len(match_record["team_a"]) != expected_players or len(match_record["team_b"]) != expected_players:
-        #     return f"Error: Incorrect number of players per team. Expected {expected_players} per team."
-        
-        # Update player stats
-        for pid in match_record["team_a"]:
-            update_player_stats(pid, match_record["score_a"], match_record["winning_team"] == "A")
-        for pid in match_record["team_b"]:
-            update_player_stats(pid, match_record["score_b"], match_record["winning_team"] == "B")
+        error = validate_match_record(match_record, {p["id"] for p in get_all_available_players()})
+        if error:
+            return error
         
-        # Append to match history
-        st.session_state.match_history.append(match_record)
+        append_match_record(match_record)
         
         # Save to file
         save_data()
@@ -495,9 +2247,36 @@ def record_prompt_match_result(match_record):
         push_to_gdrive(match_history=True)
         
         return "Success: Match recorded successfully"
+    except DataConflictError:
+        raise  # Retried by data_transaction on fresh data
     except Exception as e:
         return f"Error: Failed to record match: {str(e)}"
 
+@data_transaction
+def record_prompt_match_results(match_records):
+    """Append a batch of prompt matches with a single save and Drive sync"""
+    try:
+        player_ids = {p["id"] for p in get_all_available_players()}
+        recorded_ids = {m["id"] for m in st.session_state.match_history}
+        # Checked again at commit time with the same rules as the preview, so no tie or mismatched winner slips in
+        for i, match_record in enumerate(match_records):
+            error = validate_submitted_match(match_record) or validate_match_record(match_record, player_ids)
+            if error:
+                return f"Error: Match {i + 1}: {error[len('Error: '):]}"
+            if match_record["id"] in recorded_ids:
+                return f"Error: Match {i + 1} is already recorded"
+
+        for match_record in match_records:
+            append_match_record(match_record)
+        save_data()
+        push_to_gdrive(match_history=True)
+        logger.info(f"Recorded {len(match_records)} matches from a batch prompt")
+        return f"Success: Recorded {len(match_records)} matches"
+    except DataConflictError:
+        raise  # Retried by data_transaction on fresh data
+    except Exception as e:
+        return f"Error: Failed to record matches: {str(e)}"
+
 def verify_admin_password(password):
     """Verify admin password"""
     password_hash = hashlib.sha256(password.encode()).hexdigest()
@@ -513,6 +2292,12 @@ def check_admin_session_timeout():
             return True
     return False
 
+@data_transaction
+def change_admin_password(new_password):
+    """Store a new admin password hash shared by every session"""
+    st.session_state.admin_password_hash = hashlib.sha256(new_password.encode()).hexdigest()
+    save_data()
+
 def verify_super_admin_password(password):
     """Verify super admin password"""
     password_hash = hashlib.sha256(password.encode()).hexdigest()
@@ -570,9 +2355,21 @@ def admin_authentication():
                     elif len(new_password) < 6:
                         st.error("New password must be at least 6 characters")
                     else:
-                        st.session_state.admin_password_hash = hashlib.sha256(new_password.encode()).hexdigest()
-                        save_data()
+                        change_admin_password(new_password)
                         st.success("Password changed successfully")
+
+                st.subheader("Ingestion API Token", divider=True)
+                if st.session_state.config.get("ingest_api_enabled"):
+                    st.caption(f"Scorer devices and scripts POST matches to /api/matches?club={current_club()} "
+                               "with the header 'Authorization: Bearer <token>'.")
+                else:
+                    st.caption("The ingestion API is off. Set \"ingest_api_enabled\": true in config.json to start it.")
+                if st.button("Generate New Token" if st.session_state.api_token_hash else "Generate Token", key="generate_api_token"):
+                    st.session_state.new_api_token = generate_api_token()
+                new_api_token = st.session_state.pop("new_api_token", None)
+                if new_api_token:
+                    st.code(new_api_token)
+                    st.warning("Copy this token now; it is not shown again. Generating a new one revokes it.")
         else:
             st.info("Login to access admin features")
             admin_password = st.text_input("Admin Password", type="password", key="admin_pass")
@@ -613,7 +2410,19 @@ def admin_authentication():
                         if uploaded_file.name not in allowed_files:
                             st.error(f"Invalid file name. Allowed files: {', '.join(allowed_files)}")
                             continue
-                        file_path = os.path.join(os.getcwd(), uploaded_file.name)
+                        if uploaded_file.name == DATA_FILE:
+                            # Committed as a new version, so everything before it stays recoverable below
+                            restored_uploads = st.session_state.setdefault("restored_uploads", set())
+                            if uploaded_file.file_id not in restored_uploads:
+                                result = restore_uploaded_data(uploaded_file.getvalue())
+                                if result.startswith("Error"):
+                                    st.error(result)
+                                else:
+                                    restored_uploads.add(uploaded_file.file_id)
+                                    st.success(result)
+                            continue
+                        # Data, chat and visitor files belong to the current club; credentials and config are shared
+                        file_path = club_file(uploaded_file.name) if uploaded_file.name in CLUB_FILES else os.path.join(os.getcwd(), uploaded_file.name)
                         if os.path.exists(file_path):
                             backup_path = f"{file_path}.bak"
                             shutil.copy2(file_path, backup_path)
@@ -622,17 +2431,48 @@ def admin_authentication():
                             f.write(uploaded_file.getbuffer())
                         st.success(f"Restored {uploaded_file.name} to {file_path}")
                         logger.info(f"Restored {uploaded_file.name} to {file_path}")
-                        if uploaded_file.name == "badminton_data.json":
-                            load_data()
                 
                 if st.button("Sync Restored Files to Google Drive", key="sync_to_gdrive"):
                     success = upload_to_drive()
                     st.success("Files synced to Google Drive!" if success else "Sync failed. Check logs.")
 
+                # Snapshots plus the operation journal
+                st.subheader("Point-in-Time Recovery", divider=True)
+                recovery_points = get_recovery_points()
+                if not recovery_points:
+                    st.info("No snapshots yet. One is written in the background once data has been saved.")
+                else:
+                    st.caption(f"Data can be restored to any of {len(recovery_points)} versions since version {recovery_points[-1][0]}. "
+                               "A restore is replayed and verified in a scratch copy, then committed as a new version, so it can itself be undone.")
+                    restore_by = st.radio("Restore to", ["Operation", "Timestamp"], horizontal=True, key="restore_by")
+                    if restore_by == "Operation":
+                        point_labels = {version: f"v{version} · {timestamp} · {operation}" for version, timestamp, operation in recovery_points[:RECOVERY_POINTS_SHOWN]}
+                        target_version = st.selectbox("Version", list(point_labels), format_func=point_labels.get, key="restore_version")
+                        if st.button("Restore Version", key="restore_version_button"):
+                            result = restore_data_version(target_version)
+                            if result.startswith("Error"):
+                                st.error(result)
+                            else:
+                                st.success(result)
+                    else:
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            restore_date = st.date_input("Date", value=datetime.datetime.now(pytz.timezone('Asia/Kolkata')).date(), key="restore_date")
+                        with col2:
+                            restore_time = st.time_input("Time", value=datetime.time(23, 59), key="restore_time")
+                        if st.button("Restore as of Timestamp", key="restore_timestamp_button"):
+                            result = restore_data_as_of(f"{restore_date} {restore_time.strftime('%H:%M:%S')}")
+                            if result.startswith("Error"):
+                                st.error(result)
+                            else:
+                                st.success(result)
+
                 # List and Download Files
                 st.subheader("List and Download Files", divider=True)
                 try:
                     files = [f for f in os.listdir(os.getcwd()) if os.path.isfile(os.path.join(os.getcwd(), f))]
+                    if current_club() != DEFAULT_CLUB:
+                        files += [club_file(f) for f in os.listdir(club_dir()) if os.path.isfile(club_file(f))]
                     if not files:
                         st.info("No files found in the working directory.")
                     else:
@@ -651,7 +2491,7 @@ def admin_authentication():
                                 if st.download_button(
                                     label=f"Download {selected_file}",
                                     data=file_content,
-                                    file_name=selected_file,
+                                    file_name=os.path.basename(selected_file),
                                     mime=mime_type,
                                     key=f"download_{selected_file}"
                                 ):
@@ -664,6 +2504,73 @@ def admin_authentication():
                     logger.error(f"Error listing files in working directory: {str(e)}")
                     st.error(f"Failed to list files: {str(e)}")
 
+                # Clubs hosted by this deployment
+                st.subheader("Clubs", divider=True)
+                st.dataframe(pd.DataFrame([
+                    {"Club": name, "Idle (s)": round(idle)} for name, idle in get_club_registry().loaded()
+                ]), use_container_width=True, hide_index=True)
+                st.caption(f"Clubs load on first visit; beyond {CLUB_CACHE_SIZE} loaded clubs, or after {CLUB_IDLE_SECONDS // 60} idle minutes, the least recently used is unloaded.")
+                new_club_id = st.text_input("Club ID (used as ?club=...)", key="new_club_id")
+                new_club_name = st.text_input("Club Name", key="new_club_name")
+                new_club_folder = st.text_input("Google Drive Folder ID (optional)", key="new_club_folder")
+                if st.button("Add Club", key="add_club"):
+                    result = add_club(new_club_id, new_club_name, new_club_folder)
+                    if result.startswith("Error"):
+                        st.error(result)
+                    else:
+                        st.success(result)
+
+                # Season archiving
+                st.subheader("Seasons", divider=True)
+                if st.session_state.archived_seasons:
+                    st.dataframe(pd.DataFrame([{
+                        "Season": season["label"],
+                        "Matches": season["match_count"],
+                        "Segment": season["segment"],
+                        "Archived": season["archived_at"]
+                    } for season in st.session_state.archived_seasons]), use_container_width=True, hide_index=True)
+                current_season_start = season_bounds(datetime.datetime.now(pytz.timezone('Asia/Kolkata')).year)[0]
+                finished_seasons = [s for s in get_seasons() if s["season"] is None and s["end"] <= current_season_start]
+                if finished_seasons:
+                    oldest_season = finished_seasons[-1]
+                    st.caption(f"Archiving moves {oldest_season['label']} out of the live match history into a read-only segment file. "
+                               "Its totals stay in all-time statistics and it remains selectable as a stats period.")
+                    if st.button(f"Archive {oldest_season['label']}", key="archive_season"):
+                        result = archive_season(time.gmtime(oldest_season["start"]).tm_year)
+                        if result.startswith("Error"):
+                            st.error(result)
+                        else:
+                            st.success(result)
+                            st.rerun()
+                else:
+                    st.caption("Only the current season is live; finished seasons can be archived here.")
+
+                # Columnar snapshot export
+                st.subheader("Export Snapshot", divider=True)
+                export_format = st.selectbox(
+                    "Export format",
+                    options=EXPORT_FORMATS,
+                    help="Parquet and Feather need pyarrow; CSV is used when it is not installed.",
+                    key="export_format_select")
+                if st.button("Create Export", key="create_export"):
+                    result, zip_path = export_snapshot(export_format)
+                    if result.startswith("Error"):
+                        st.error(result)
+                    else:
+                        st.success(result)
+                        st.session_state.last_export = zip_path
+                last_export = st.session_state.get("last_export")
+                if last_export and os.path.exists(last_export):
+                    with open(last_export, "rb") as f:
+                        if st.download_button(
+                            label=f"Download {os.path.basename(last_export)}",
+                            data=f,
+                            file_name=os.path.basename(last_export),
+                            mime="application/zip",
+                            key="download_export"
+                        ):
+                            logger.info(f"Downloaded export: {last_export}")
+
                 # Add Gemini API Key and Model Configuration
                 st.subheader("Configure Gemini API Key and Model", divider=True)
                 current_api_key = st.session_state.api_key
@@ -696,6 +2603,40 @@ def admin_authentication():
                         logger.error(f"Error saving Gemini configuration: {str(e)}")
                         st.error(f"Failed to save Gemini configuration: {str(e)}")
                 
+                # Shared aggregate cache statistics
+                st.subheader("Aggregate Cache", divider=True)
+                cache_stats = get_aggregate_cache().stats()
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Hits", cache_stats["hits"])
+                col2.metric("Misses", cache_stats["misses"])
+                col3.metric("Hit Rate", f"{cache_stats['hit_rate']}%")
+                st.caption(f"{cache_stats['entries']} cached aggregates for data version {cache_stats['version']}")
+                if st.button("Clear Aggregate Cache", key="clear_aggregate_cache"):
+                    get_aggregate_cache().clear()
+                    logger.info("Aggregate cache cleared by Super Admin")
+                    st.success("Aggregate cache cleared!")
+
+                # Section rendering mode and timings
+                st.subheader("Rendering", divider=True)
+                lazy_sections = st.checkbox(
+                    "Render only the active section",
+                    value=lazy_sections_enabled(),
+                    help="When disabled, every tab and chart is computed on each rerun.",
+                    key="lazy_sections_toggle")
+                if lazy_sections != lazy_sections_enabled():
+                    st.session_state.config["lazy_sections"] = lazy_sections
+                    save_config(st.session_state.config)
+                    logger.info(f"Lazy section rendering set to: {lazy_sections}")
+                    st.rerun()
+                if st.session_state.get("section_timings"):
+                    st.dataframe(
+                        pd.DataFrame(
+                            [{"Section": name, "Last Render (ms)": round(ms, 1)} for name, ms in st.session_state.section_timings.items()]
+                        ),
+                        hide_index=True,
+                        use_container_width=True
+                    )
+
                 # Add toggle for enabling/disabling upload to Google Drive
                 st.session_state.config["upload_to_drive_enabled"] = os.getenv("UPLOAD_TO_DRIVE_ENABLED", st.session_state.config["upload_to_drive_enabled"])
                 st.subheader("Google Drive Upload Configuration", divider=True)
@@ -727,13 +2668,17 @@ def header_section():
     """App header section"""
     st.title("🏸 Badminton - XploreMeAtSports")
     st.markdown("Manage your badminton matches, teams, and stats!")
+    if current_club() != DEFAULT_CLUB:
+        st.caption(f"Club: {club_settings()['name']}")
 
     try:
-        matches_played = len(st.session_state.match_history)
+        # Archived seasons contribute their precomputed totals
+        matches_played = len(st.session_state.match_history) + archived_match_count()
         total_score = sum(match["score_a"] + match["score_b"] for match in st.session_state.match_history)
+        total_score += sum(season["total_points"] for season in st.session_state.archived_seasons)
         
         # Generate LLM stats
-        all_players = st.session_state.predefined_players + st.session_state.temp_players
+        all_players = get_all_available_players()
         llm_stats = generate_llm_stats(st.session_state.match_history, all_players)
         
         # Calculate average skill level
@@ -791,7 +2736,7 @@ def header_section():
 
 def footer_section():
     """App Footer section with visitor counter"""
-    visitor_file = 'visitor_count.json'
+    visitor_file = club_file('visitor_count.json')
     
     if 'visitor_counted' not in st.session_state:
         st.session_state.visitor_counted = False
@@ -845,6 +2790,21 @@ def footer_section():
         unsafe_allow_html=True
     )
 
+@data_transaction
+def add_predefined_player(name, skill_level):
+    """Add a player to the shared roster"""
+    new_player = {
+        "id": str(uuid.uuid4()),
+        "name": name,
+        "skill_level": skill_level,
+        "games_played": 0,
+        "wins": 0,
+        "points_scored": 0
+    }
+    st.session_state.predefined_players.append(new_player)
+    save_data()
+    return new_player
+
 def player_management_section():
     """Player management section"""
     st.header("🤾 Player Management")
@@ -867,16 +2827,7 @@ def player_management_section():
                 st.info("Admin login required to add players")
             if add_button:
                 if new_player_name:
-                    new_player = {
-                        "id": str(uuid.uuid4()),
-                        "name": new_player_name,
-                        "skill_level": new_player_skill,
-                        "games_played": 0,
-                        "wins": 0,
-                        "points_scored": 0
-                    }
-                    st.session_state.predefined_players.append(new_player)
-                    save_data()
+                    add_predefined_player(new_player_name, new_player_skill)
                     st.success(f"Added {new_player_name} to predefined players!")
                     st.rerun()
                 else:
@@ -922,14 +2873,496 @@ def player_management_section():
             st.success("Cleared all temporary players!")
             st.rerun()
 
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def timestamp_to_epoch(timestamp):
+    """Convert a stored match timestamp (IST wall-clock) to integer epoch seconds"""
+    return calendar.timegm(time.strptime(timestamp, TIMESTAMP_FORMAT))
+
+def date_to_epoch(date):
+    """Epoch seconds for midnight at the start of the given date"""
+    return calendar.timegm(date.timetuple()[:3] + (0, 0, 0))
+
+MATCH_INDEX_VERSIONS_KEPT = 4  # Indexes kept per club, for sessions that are a few versions behind
+
+class MatchTimeIndex:
+    """Match offsets of one match history sorted by integer epoch, for O(log n) date-range slices; never changes once built"""
+
+    def __init__(self, match_history, version, base=None):
+        self.version = version
+        self.history = tuple(match_history)
+        self.match_count = len(match_history)
+        self.tail_id = match_history[-1]["id"] if match_history else None
+        if base is not None:
+            # Only matches appended since the base index are parsed
+            self.epochs, self.offsets = list(base.epochs), list(base.offsets)
+            for offset in range(base.match_count, len(match_history)):
+                epoch = timestamp_to_epoch(match_history[offset]["timestamp"])
+                # Matches normally arrive in time order, so this is an O(1) append
+                position = bisect.bisect_right(self.epochs, epoch)
+                self.epochs.insert(position, epoch)
+                self.offsets.insert(position, offset)
+        else:
+            epochs = [timestamp_to_epoch(m["timestamp"]) for m in match_history]
+            self.offsets = sorted(range(len(match_history)), key=epochs.__getitem__)
+            self.epochs = [epochs[offset] for offset in self.offsets]
+
+    def range(self, start_epoch=None, end_epoch=None):
+        """Offsets of matches with start_epoch <= epoch < end_epoch, in time order"""
+        lo = bisect.bisect_left(self.epochs, start_epoch) if start_epoch is not None else 0
+        hi = bisect.bisect_left(self.epochs, end_epoch) if end_epoch is not None else len(self.epochs)
+        return self.offsets[lo:hi]
+
+    def latest_offset(self):
+        """Offset of the most recent match, or None"""
+        return self.offsets[-1] if self.offsets else None
+
+    def bounds(self):
+        """Epochs of the earliest and latest match, or None"""
+        return (self.epochs[0], self.epochs[-1]) if self.epochs else None
+
+def appends_to(history, match_history):
+    """Whether match_history is history with matches appended; edits replace records, so kept ones are the same objects"""
+    return history is not None and len(history) <= len(match_history) and all(a is b for a, b in zip(history, match_history))
+
+class MatchHistoryIndexes:
+    """Indexes of the last few match histories, each built once by build(match_history, version, base) and shared
+    by the sessions that hold that history; a new one extends the latest when matches were only appended"""
+
+    def __init__(self, build, seed=None, capacity=MATCH_INDEX_VERSIONS_KEPT):
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+        self.build = build
+        self.capacity = capacity
+        if seed is not None:
+            self._indexes[(seed.version, seed.match_count, seed.tail_id)] = seed
+
+    def get(self, match_history, version):
+        # A session inside a transaction holds a private history under the same version, hence count and tail
+        key = (version, len(match_history), match_history[-1]["id"] if match_history else None)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None and (index.history is match_history or len(index.history) == len(match_history)
+                                      and appends_to(index.history, match_history)):
+                return index
+            # An edited match keeps the count and tail, so the base is only extended if every earlier record is unchanged
+            latest = next(reversed(self._indexes.values()), None)
+            base = latest if latest is not None and appends_to(latest.history, match_history) else None
+            built = self.build(match_history, version, base)
+            if index is None:
+                # A private history edited under a shared version is served but not cached over the shared index
+                self._indexes[key] = built
+                while len(self._indexes) > self.capacity:
+                    self._indexes.popitem(last=False)
+            return built
+
+    def latest(self):
+        with self._lock:
+            return next(reversed(self._indexes.values()), None)
+
+def get_shared_match_time_index():
+    """Timestamp indexes shared by every session of the current club"""
+    return get_club_resource("match_time_index", lambda: MatchHistoryIndexes(MatchTimeIndex))
+
+def get_match_time_index():
+    """Timestamp index of this session's match history"""
+    return get_shared_match_time_index().get(st.session_state.match_history, st.session_state.data_version)
+
+SEGMENTS_DIR = 'segments'  # Archived seasons, one immutable gzip JSON segment file per season
+SEGMENT_CACHE_SIZE = 4  # Archived seasons kept in memory per club
+
+def season_bounds(year):
+    """Start and end epochs of the calendar-year season"""
+    return calendar.timegm((year, 1, 1, 0, 0, 0)), calendar.timegm((year + 1, 1, 1, 0, 0, 0))
+
+def get_seasons():
+    """Seasons with live matches, then archived seasons, newest first; "season" is the archived season ID or None"""
+    seasons = []
+    bounds = get_match_time_index().bounds()
+    if bounds:
+        for year in range(time.gmtime(bounds[1]).tm_year, time.gmtime(bounds[0]).tm_year - 1, -1):
+            start, end = season_bounds(year)
+            seasons.append({"label": f"Season {year}", "start": start, "end": end, "season": None})
+    for season in reversed(st.session_state.archived_seasons):
+        seasons.append({"label": f"{season['label']} (archived)", "start": season["start"], "end": season["end"], "season": season["id"]})
+    return seasons
+
+def count_player_results(matches):
+    """Games, wins and points per player ID over the given matches"""
+    totals = defaultdict(lambda: {"games_played": 0, "wins": 0, "points_scored": 0})
+    for match in matches:
+        for team, player_ids, score in (("A", match["team_a"], match["score_a"]), ("B", match["team_b"], match["score_b"])):
+            for pid in player_ids:
+                totals[pid]["games_played"] += 1
+                totals[pid]["points_scored"] += score
+                totals[pid]["wins"] += match["winning_team"] == team
+    return dict(totals)
+
+def write_season_segment(season, matches):
+    """Write an archived season's matches to its segment file; returns the file's SHA-256"""
+    content = gzip.compress(json.dumps({"season": season["id"], "matches": matches}).encode(), mtime=0)
+    path = club_file(season["segment"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_file_atomically(path, content)
+    return hashlib.sha256(content).hexdigest()
+
+def read_season_segment(path, season):
+    """Frozen matches of an archived season, checked against the checksum recorded when it was archived"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    if hashlib.sha256(content).hexdigest() != season["checksum"]:
+        raise ValueError(f"Segment {path} does not match the checksum recorded for {season['label']}")
+    return freeze(json.loads(gzip.decompress(content))["matches"])
+
+class SeasonSegments:
+    """Archived season matches, read from their segment files on first use; least recently used seasons are dropped"""
+
+    def __init__(self, capacity=SEGMENT_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._segments = OrderedDict()
+        self._ids = {}
+        self.capacity = capacity
+
+    def matches(self, season, path):
+        with self._lock:
+            matches = self._segments.pop(season["id"], None)
+            if matches is None:
+                matches = read_season_segment(path, season)
+                logger.info(f"Loaded {len(matches)} archived matches of {season['label']} from {path}")
+            self._segments[season["id"]] = matches
+            while len(self._segments) > self.capacity:
+                evicted, _ = self._segments.popitem(last=False)
+                self._ids.pop(evicted, None)
+            return matches
+
+    def match_ids(self, season, path):
+        """IDs of an archived season's matches, for checking imports against it"""
+        matches = self.matches(season, path)
+        with self._lock:
+            ids = self._ids.get(season["id"])
+            if ids is None:
+                ids = self._ids[season["id"]] = frozenset(match["id"] for match in matches)
+            return ids
+
+def segment_files(data_path):
+    """Segment files of the archived seasons listed in a data file"""
+    try:
+        with open(data_path, 'r') as f:
+            return [season["segment"] for season in json.load(f).get("archived_seasons", [])]
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading archived seasons from {data_path}: {str(e)}")
+        return []
+
+def get_season_segments():
+    """Archived season cache shared by every session of the current club"""
+    return get_club_resource("season_segments", SeasonSegments)
+
+def check_archived_match(record, archived_seasons, club):
+    """(already_archived, error) for a validated match: matches dated before the end of the archived seasons
+    are either already in a segment or would rewrite a closed season's totals and ratings"""
+    epoch = timestamp_to_epoch(record["timestamp"])
+    if not archived_seasons or epoch >= archived_seasons[-1]["end"]:
+        return False, None
+    season = next((s for s in archived_seasons if s["start"] <= epoch < s["end"]), None)
+    if season is not None:
+        segments = get_club_registry().get(club).get("season_segments", SeasonSegments)
+        if record["id"] in segments.match_ids(season, club_file(season["segment"], club)):
+            return True, None
+    return False, f"Error: Matches dated before {time.strftime('%Y-%m-%d', time.gmtime(archived_seasons[-1]['end']))} belong to archived seasons"
+
+def get_archived_season(season_id):
+    """Archived season record by ID, or None"""
+    return next((s for s in st.session_state.archived_seasons if s["id"] == season_id), None)
+
+def get_archived_matches(season_id):
+    """Matches of an archived season (empty if its segment file is missing or damaged)"""
+    season = get_archived_season(season_id)
+    if season is None:
+        return []
+    try:
+        return get_season_segments().matches(season, club_file(season["segment"]))
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading archived {season['label']}: {str(e)}")
+        st.error(f"Archived matches of {season['label']} could not be loaded; season totals are still shown.")
+        return []
+
+def archived_match_count():
+    """Matches held in archived segments"""
+    return sum(season["match_count"] for season in st.session_state.archived_seasons)
+
+@data_transaction
+def archive_season(year):
+    """Move a finished season's matches out of the live history into an immutable segment with precomputed totals"""
+    start, end = season_bounds(year)
+    ist = pytz.timezone('Asia/Kolkata')
+    if end > season_bounds(datetime.datetime.now(ist).year)[0]:
+        return "Error: Only finished seasons can be archived"
+    if get_archived_season(str(year)) is not None:
+        return f"Error: Season {year} is already archived"
+    index = get_match_time_index()
+    # Each season's ratings continue from the previous one, so seasons are archived oldest first
+    if index.range(None, start):
+        return f"Error: Archive the seasons before {year} first"
+    offsets = set(index.range(start, end))
+    if not offsets:
+        return f"Error: No live matches in Season {year}"
+
+    match_history = st.session_state.match_history
+    archived = [match for offset, match in enumerate(match_history) if offset in offsets]
+    remaining = [match for offset, match in enumerate(match_history) if offset not in offsets]
+    players = get_all_available_players()
+    season = {
+        "id": str(year),
+        "label": f"Season {year}",
+        "start": start,
+        "end": end,
+        "match_count": len(archived),
+        "total_points": sum(match["score_a"] + match["score_b"] for match in archived),
+        "segment": os.path.join(SEGMENTS_DIR, f"season_{year}.json.gz"),
+        "players": count_player_results(archived),
+        "end_ratings": replay_ratings(archived, players, archived_ratings())[0],
+        "archived_at": datetime.datetime.now(ist).strftime("%Y-%m-%d %H:%M:%S")
+    }
+    # The segment is written before the commit that references it; a retried commit simply rewrites it
+    season["checksum"] = write_season_segment(season, archived)
+    st.session_state.match_history = remaining
+    st.session_state.archived_seasons.append(season)
+    st.session_state.player_ratings = replay_ratings(remaining, players, season["end_ratings"])[0]
+    save_data()
+    push_to_gdrive(files=[DATA_FILE, season["segment"]])
+    logger.info(f"Archived Season {year}: {len(archived)} matches moved to {season['segment']}, {len(remaining)} live matches left")
+    return f"Success: Archived Season {year} ({len(archived)} matches)"
+
+def stats_period_selector():
+    """Sidebar selector for the period used by the statistics tabs and the chatbot"""
+    with st.sidebar:
+        st.header("Stats Period")
+        seasons = get_seasons()
+        options = ["All Time", "Last 7 Days", "Last 30 Days"] + [s["label"] for s in seasons] + ["Custom Range"]
+        if st.session_state.get("stats_period") not in (None, *options):
+            # The selected season was archived since the last run
+            del st.session_state["stats_period"]
+        period = st.selectbox("Show statistics for", options, key="stats_period")
+
+        today = datetime.datetime.now(pytz.timezone('Asia/Kolkata')).date()
+        start_epoch = end_epoch = season_id = None
+        if period == "Last 7 Days":
+            start_epoch = date_to_epoch(today - datetime.timedelta(days=6))
+        elif period == "Last 30 Days":
+            start_epoch = date_to_epoch(today - datetime.timedelta(days=29))
+        elif period == "Custom Range":
+            date_range = st.date_input("Date Range", value=(today - datetime.timedelta(days=29), today), key="stats_period_range")
+            if len(date_range) > 0:
+                start_epoch = date_to_epoch(date_range[0])
+                end_epoch = date_to_epoch((date_range[1] if len(date_range) > 1 else date_range[0]) + datetime.timedelta(days=1))
+        elif period != "All Time":
+            season = next(s for s in seasons if s["label"] == period)
+            start_epoch, end_epoch, season_id = season["start"], season["end"], season["season"]
+
+    st.session_state.stats_window = {"label": period, "start": start_epoch, "end": end_epoch, "season": season_id}
+
+def get_stats_window():
+    """Currently selected statistics window; "season" is set for archived seasons"""
+    return st.session_state.get("stats_window") or {"label": "All Time", "start": None, "end": None, "season": None}
+
+def stats_window_key():
+    """Cache key fragment for the selected statistics window"""
+    window = get_stats_window()
+    if window["season"]:
+        return f"archived {window['season']}"
+    return f"{window['start']}-{window['end']}"
+
+def get_window_offsets():
+    """Live match offsets in the selected window, in time order (None means the whole live history)"""
+    window = get_stats_window()
+    if window["season"]:
+        # Archived matches are no longer in the live history
+        return []
+    if window["start"] is None and window["end"] is None:
+        return None
+    return get_match_time_index().range(window["start"], window["end"])
+
+def get_window_matches():
+    """Matches in the selected statistics window; All Time covers the live (unarchived) history"""
+    window = get_stats_window()
+    if window["season"]:
+        return get_archived_matches(window["season"])
+    offsets = get_window_offsets()
+    if offsets is None:
+        return st.session_state.match_history
+    return [st.session_state.match_history[offset] for offset in offsets]
+
+def get_window_players(matches):
+    """Players with games, wins and points counted over the given window of matches"""
+    all_players = get_all_available_players()
+    if matches is st.session_state.match_history:
+        # Player totals are kept all-time, so they already include archived seasons
+        return all_players
+    window = get_stats_window()
+    # Archived seasons use the totals precomputed when they were archived
+    totals = get_archived_season(window["season"])["players"] if window["season"] else count_player_results(matches)
+    empty = {"games_played": 0, "wins": 0, "points_scored": 0}
+    return [dict(p, **totals.get(p["id"], empty)) for p in all_players]
+
+PLAYER_INDEX_FILE = 'badminton_index.json'
+
+class PlayerMatchIndex:
+    """Inverted index from player ID to match offsets, partners and opponents for one match history; never changes once built"""
+
+    def __init__(self, match_history, version, base=None):
+        if base is not None:
+            # Shares the base's per-player records; those of players in appended matches are copied before they change
+            self.matches, self.partners, self.opponents = dict(base.matches), dict(base.partners), dict(base.opponents)
+            start = base.match_count
+        else:
+            self.matches, self.partners, self.opponents = {}, {}, {}
+            start = 0
+        self._copied = set()
+        for offset in range(start, len(match_history)):
+            self._add(offset, match_history[offset])
+        del self._copied
+        self.version = version
+        self.history = tuple(match_history)
+        self.match_count = len(match_history)
+        self.tail_id = match_history[-1]["id"] if match_history else None
+
+    def _own(self, pid):
+        if pid not in self._copied:
+            self._copied.add(pid)
+            self.matches[pid] = list(self.matches.get(pid, []))
+            self.partners[pid] = {other: list(record) for other, record in self.partners.get(pid, {}).items()}
+            self.opponents[pid] = {other: list(record) for other, record in self.opponents.get(pid, {}).items()}
+
+    def _add(self, offset, match):
+        for team, teammates, rivals in (("A", match["team_a"], match["team_b"]), ("B", match["team_b"], match["team_a"])):
+            won = int(match["winning_team"] == team)
+            for pid in teammates:
+                self._own(pid)
+                self.matches[pid].append(offset)
+                for partner_id in teammates:
+                    if partner_id != pid:
+                        record = self.partners[pid].setdefault(partner_id, [0, 0])
+                        record[0] += 1
+                        record[1] += won
+                for opponent_id in rivals:
+                    record = self.opponents[pid].setdefault(opponent_id, [0, 0])
+                    record[0] += 1
+                    record[1] += won
+
+    def to_dict(self, file_stamp):
+        return {
+            "data_version": self.version,
+            "match_count": self.match_count,
+            "tail_id": self.tail_id,
+            "file_stamp": list(file_stamp),
+            "matches": self.matches,
+            "partners": self.partners,
+            "opponents": self.opponents
+        }
+
+    @classmethod
+    def from_dict(cls, data, match_history):
+        """Index loaded from to_dict() output, for the match history it was saved for"""
+        index = cls([], data["data_version"])
+        index.history = tuple(match_history)
+        index.match_count = data["match_count"]
+        index.tail_id = data["tail_id"]
+        index.matches, index.partners, index.opponents = data["matches"], data["partners"], data["opponents"]
+        return index
+
+    def last_match_offset(self, player_id):
+        """Offset of the player's most recent match, or None"""
+        offsets = self.matches.get(player_id)
+        return offsets[-1] if offsets else None
+
+    def recent_match_offsets(self, player_id, count):
+        """Offsets of the player's last count matches"""
+        return self.matches.get(player_id, [])[-count:]
+
+    def profile(self, player_id, match_history, recent=10, min_games=2, top=3):
+        """Recent form, best partners and nemesis opponents for one player, independent of history size"""
+        offsets = self.matches.get(player_id, [])[-recent:]
+        partners = list(self.partners.get(player_id, {}).items())
+        opponents = list(self.opponents.get(player_id, {}).items())
+
+        recent_form = []
+        for offset in reversed(offsets):
+            match = match_history[offset]
+            team = "A" if player_id in match["team_a"] else "B"
+            recent_form.append({
+                "match": match,
+                "won": match["winning_team"] == team,
+                "points_for": match["score_a"] if team == "A" else match["score_b"],
+                "points_against": match["score_b"] if team == "A" else match["score_a"]
+            })
+
+        def ranked(records, key):
+            qualified = [(pid, games, wins) for pid, (games, wins) in records if games >= min_games]
+            return sorted(qualified, key=key)[:top]
+
+        return {
+            "games": len(self.matches.get(player_id, [])),
+            "recent_form": recent_form,
+            "best_partners": ranked(partners, lambda r: (-r[2] / r[1], -r[1])),
+            "nemeses": ranked(opponents, lambda r: (r[2] / r[1], -r[1]))
+        }
+
+def load_player_match_index(service):
+    """Player indexes seeded from the current club's persisted copy, if it was saved for the current data file"""
+    seed = None
+    index_file = club_file(PLAYER_INDEX_FILE)
+    if os.path.exists(index_file):
+        try:
+            with open(index_file, 'r') as f:
+                data = json.load(f)
+            # A Drive download or restore can replace the file without changing its version; its stamp changes
+            version, file_stamp = service.file_stamp()
+            snapshot_version, shared = service.snapshot()
+            if data["data_version"] == version == snapshot_version and file_stamp is not None and data["file_stamp"] == list(file_stamp):
+                seed = PlayerMatchIndex.from_dict(data, shared["match_history"])
+                logger.info(f"Loaded player index for data version {seed.version}")
+            else:
+                logger.info("Persisted player index is for another data file; rebuilding it")
+        except (json.JSONDecodeError, KeyError) as e:
+            logger.error(f"Ignoring unreadable player index: {str(e)}")
+    return MatchHistoryIndexes(PlayerMatchIndex, seed)
+
+def get_shared_player_match_index():
+    """Player indexes shared by every session of the current club"""
+    service = get_data_service()  # Resolved first: the club's resources are locked while the factory runs
+    return get_club_resource("player_match_index", lambda: load_player_match_index(service))
+
+def get_player_match_index():
+    """Player index of this session's match history"""
+    return get_shared_player_match_index().get(st.session_state.match_history, st.session_state.data_version)
+
+def save_player_match_index():
+    """Persist the player index next to the data file, with the stamp of the file it matches (done with each snapshot)"""
+    try:
+        index = get_player_match_index()
+        service = get_data_service()
+        version, file_stamp = service.file_stamp()
+        if version != index.version or file_stamp is None:
+            return  # Another commit already replaced the file; the index is saved again with a later snapshot
+        # Serialized outside the service lock; written only if the data file is still the one it was built for
+        service.write_derived_file(club_file(PLAYER_INDEX_FILE), json.dumps(index.to_dict(file_stamp)), version, file_stamp)
+    except Exception as e:
+        logger.error(f"Error saving player index: {str(e)}")
+
+def format_player_profile(player_id):
+    """Short text summary of a player's profile, used as chatbot context"""
+    names_by_id = get_player_names_by_id()
+    profile = get_player_match_index().profile(player_id, st.session_state.match_history)
+    form = "".join("W" if r["won"] else "L" for r in profile["recent_form"])
+    partners = ", ".join(f"{names_by_id.get(pid, '?')} ({wins}/{games} wins)" for pid, games, wins in profile["best_partners"])
+    nemeses = ", ".join(f"{names_by_id.get(pid, '?')} ({wins}/{games} wins)" for pid, games, wins in profile["nemeses"])
+    return (f"{names_by_id.get(player_id, '?')}: {profile['games']} games, rating {round(get_player_rating(player_id))}, "
+            f"recent form (newest first) {form or 'n/a'}, best partners {partners or 'n/a'}, toughest opponents {nemeses or 'n/a'}")
+
 def get_most_recent_match():
-    """Get the most recent match from match history"""
-    if st.session_state.match_history:
-        sorted_matches = sorted(st.session_state.match_history, 
-                               key=lambda x: datetime.datetime.strptime(x["timestamp"], "%Y-%m-%d %H:%M:%S"), 
-                               reverse=True)
-        return sorted_matches[0]
-    return None
+    """Get the most recent match from match history in O(1) via the timestamp index"""
+    offset = get_match_time_index().latest_offset()
+    return st.session_state.match_history[offset] if offset is not None else None
 
 def team_formation_section():
     """Team formation and match management section"""
@@ -938,7 +3371,7 @@ def team_formation_section():
     all_players = get_all_available_players()
     player_names = [p["name"] for p in all_players]
     
-    col1, col2 = st.columns([1, 3])
+    col1, col2, _ = st.columns([1, 1, 2])
     with col1:
         match_type_display = st.selectbox(
             "Match Type:",
@@ -948,6 +3381,13 @@ def team_formation_section():
         )
         st.session_state.match_type = match_type_display.lower()
         logger.info(f"Match type set to: {st.session_state.match_type}")
+    with col2:
+        balance_mode = st.selectbox(
+            "Team Balancing:",
+            options=list(RATING_SOURCES) + ["Random"],
+            help="Split the selected players into the most evenly matched teams using ratings or skill levels.",
+            key="team_balance_mode"
+        )
     
     st.subheader("Select Available Players", divider=True)
     available_players = []
@@ -974,11 +3414,15 @@ def team_formation_section():
     with col1:
         if st.button("Generate Random Teams", key="gen_teams", disabled=len(combined_players) < min_players_required):
             logger.info(f"Generating teams with {len(combined_players)} available players")
-            team_a, team_b = generate_random_teams(combined_players)
+            team_a, team_b = generate_random_teams(
+                combined_players,
+                previous_teams=st.session_state.current_teams,
+                rating_source=None if balance_mode == "Random" else balance_mode
+            )
             if team_a and team_b:
                 st.session_state.current_teams = {"team_a": team_a, "team_b": team_b}
                 st.success("Teams generated successfully!")
-                st.rerun()
+                rerun_section()
             else:
                 st.error(f"Not enough players. Need at least {min_players_required} players.")
     
@@ -1000,7 +3444,7 @@ def team_formation_section():
                 
                 st.session_state.current_teams = {"team_a": team_a_players, "team_b": team_b_players}
                 st.success("Teams loaded for rematch from last match!")
-                st.rerun()
+                rerun_section()
             else:
                 st.error("No previous match found for rematch.")
         
@@ -1014,6 +3458,26 @@ def team_formation_section():
             st.subheader("Team B", divider=True)
             for player in st.session_state.current_teams["team_b"]:
                 st.write(f"• {player['name']}")
+
+        current_a = st.session_state.current_teams["team_a"]
+        current_b = st.session_state.current_teams["team_b"]
+        probabilities, margins = predict_matchups([(current_a, current_b)])
+        current_probability = probabilities[0]
+        prediction = f"Predicted chance of Team A winning: {current_probability:.0%}"
+        if margins is not None:
+            expected_a, expected_b = expected_score_line(current_probability, margins[0])
+            prediction += f" · Expected score: {expected_a}-{expected_b}"
+        st.caption(prediction)
+        if len(current_a) == 2 and len(current_b) == 2:
+            suggested_a, suggested_b, suggested_probability = suggest_doubles_pairings(current_a + current_b)[0]
+            current_pairs = {frozenset(p["id"] for p in current_a), frozenset(p["id"] for p in current_b)}
+            if frozenset(p["id"] for p in suggested_a) not in current_pairs and abs(suggested_probability - 0.5) < abs(current_probability - 0.5):
+                st.info(f"More balanced pairing: {' & '.join(p['name'] for p in suggested_a)} vs "
+                        f"{' & '.join(p['name'] for p in suggested_b)} ({suggested_probability:.0%} for Team A)")
+                if st.button("Use Suggested Pairing", key="use_suggested_pairing"):
+                    st.session_state.current_teams = {"team_a": suggested_a, "team_b": suggested_b}
+                    logger.info(f"Applied suggested pairing: {[p['name'] for p in suggested_a]} vs {[p['name'] for p in suggested_b]}")
+                    rerun_section()
     elif last_match:
         st.subheader("Last Match Teams", divider=True)
         
@@ -1022,8 +3486,7 @@ def team_formation_section():
         winner = "A" if score_a > score_b else "B"
         st.markdown(f"**Last Match Score:** Team A - {score_a}  |  Team B - {score_b}  |  Winner: Team {winner}")
         
-        match_time = datetime.datetime.strptime(last_match["timestamp"], "%Y-%m-%d %H:%M:%S")
-        st.markdown(f"**Played on:** {match_time.strftime('%Y-%m-%d at %H:%M')}")
+        st.markdown(f"**Played on:** {last_match['timestamp'][:10]} at {last_match['timestamp'][11:16]}")
         
         col1, col2 = st.columns(2)
         with col1:
@@ -1047,6 +3510,286 @@ def team_formation_section():
         waiting_text = ", ".join([p["name"] for p in st.session_state.waiting_queue])
         st.info(f"Waiting: {waiting_text}")
 
+def session_planner_section():
+    """Plan a whole session of rounds across several courts"""
+    st.header("🗓️ Session Planner")
+    all_players = get_all_available_players()
+    names_by_id = get_player_names_by_id()
+
+    plan = st.session_state.get("session_plan")
+    if plan and "planner_attendees" not in st.session_state:
+        # Widget state is dropped while another section is shown; restore it from the plan
+        st.session_state.planner_attendees = [pid for pid in plan["attendees"] if pid in names_by_id]
+    attendees = st.multiselect(
+        "Attendees:",
+        options=[p["id"] for p in all_players],
+        format_func=lambda pid: names_by_id.get(pid, pid),
+        key="planner_attendees"
+    )
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        courts = st.number_input("Courts", min_value=1, max_value=12, value=2, key="planner_courts")
+    with col2:
+        session_minutes = st.number_input("Session Length (minutes)", min_value=15, max_value=600, value=180, step=15, key="planner_minutes")
+    with col3:
+        match_minutes = st.number_input("Minutes per Round", min_value=5, max_value=60, value=SESSION_MATCH_MINUTES, step=5, key="planner_match_minutes")
+    with col4:
+        planner_match_type = st.selectbox("Match Type", options=["Doubles", "Singles"], key="planner_match_type").lower()
+
+    players_per_court = 4 if planner_match_type == "doubles" else 2
+    if st.button("Plan Session", key="plan_session", disabled=len(attendees) < players_per_court):
+        plan = new_session_plan(attendees, int(courts), int(session_minutes), int(match_minutes), planner_match_type)
+        st.session_state.session_plan = plan
+        st.success(f"Planned {len(plan['rounds'])} rounds for {len(attendees)} players.")
+
+    if not plan:
+        st.info(f"Select at least {players_per_court} attendees and click 'Plan Session'.")
+        return
+
+    if set(attendees) != set(plan["attendees"]):
+        if len(attendees) < players_per_court:
+            st.warning(f"At least {players_per_court} attendees are needed to replan the session.")
+            return
+        arrived = [names_by_id.get(pid, pid) for pid in attendees if pid not in plan["attendees"]]
+        left = [names_by_id.get(pid, pid) for pid in plan["attendees"] if pid not in attendees]
+        replan_session(plan, attendees)
+        logger.info(f"Replanned session after arrivals {arrived} and departures {left}")
+        st.info(f"Replanned remaining rounds (arrived: {', '.join(arrived) or 'none'}; left: {', '.join(left) or 'none'}).")
+
+    summary = session_plan_summary(plan)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Rounds Played", f"{plan['completed']}/{len(plan['rounds'])}")
+    col2.metric("Sit-out Variance", f"{summary['sit_out_variance']:.2f}")
+    col3.metric("Repeated Partners", summary["repeated_partners"])
+    col4.metric("Repeated Opponents", summary["repeated_opponents"])
+
+    if plan["completed"] < len(plan["rounds"]):
+        current = plan["rounds"][plan["completed"]]
+        st.subheader(f"Round {plan['completed'] + 1} (starts at +{plan['completed'] * plan['match_minutes']} min)", divider=True)
+        for court_number, court in enumerate(current["courts"], start=1):
+            col1, col2 = st.columns([4, 1])
+            team_a_names = " & ".join(names_by_id.get(pid, pid) for pid in court["team_a"])
+            team_b_names = " & ".join(names_by_id.get(pid, pid) for pid in court["team_b"])
+            col1.markdown(f"**Court {court_number}:** {team_a_names} vs {team_b_names}")
+            if col2.button("Play", key=f"play_court_{court_number}"):
+                st.session_state.match_type = plan["match_type"]
+                st.session_state.current_teams = {
+                    "team_a": [get_player_by_id(pid) for pid in court["team_a"]],
+                    "team_b": [get_player_by_id(pid) for pid in court["team_b"]]
+                }
+                st.success(f"Court {court_number} teams loaded for Match Recording.")
+        if current["sitting_out"]:
+            st.info(f"Sitting out: {', '.join(names_by_id.get(pid, pid) for pid in current['sitting_out'])}")
+        if st.button("Mark Round Complete", key="complete_round"):
+            plan["completed"] += 1
+            rerun_section()
+    else:
+        st.success("All rounds in this session have been played.")
+
+    st.subheader("Full Schedule", divider=True)
+    schedule_rows = []
+    for round_number, round_plan in enumerate(plan["rounds"], start=1):
+        for court_number, court in enumerate(round_plan["courts"], start=1):
+            schedule_rows.append({
+                "Round": round_number,
+                "Start (min)": (round_number - 1) * plan["match_minutes"],
+                "Court": court_number,
+                "Team A": " & ".join(names_by_id.get(pid, pid) for pid in court["team_a"]),
+                "Team B": " & ".join(names_by_id.get(pid, pid) for pid in court["team_b"]),
+                "Sitting Out": ", ".join(names_by_id.get(pid, pid) for pid in round_plan["sitting_out"]) if court_number == 1 else "",
+                "Status": "Played" if round_number <= plan["completed"] else ""
+            })
+    st.dataframe(pd.DataFrame(schedule_rows), use_container_width=True, hide_index=True)
+    st.dataframe(summary["table"], use_container_width=True, hide_index=True)
+
+def tournament_section():
+    """Create tournaments, follow standings and brackets, and send fixtures to Match Recording"""
+    st.header("🏆 Tournaments")
+    names_by_id = get_player_names_by_id()
+
+    with st.expander("Create Tournament", expanded=not st.session_state.tournaments):
+        if not st.session_state.is_admin:
+            st.info("Admin login required to create tournaments")
+        else:
+            name = st.text_input("Tournament Name", key="tournament_name")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                tournament_format = st.selectbox("Format", options=list(TOURNAMENT_FORMATS), format_func=TOURNAMENT_FORMATS.get, key="tournament_format")
+            with col2:
+                tournament_match_type = st.selectbox("Match Type", options=["Doubles", "Singles"], key="tournament_match_type").lower()
+            with col3:
+                swiss_rounds = st.number_input("Swiss Rounds (0 = automatic)", min_value=0, max_value=20, value=0, key="tournament_swiss_rounds",
+                                               disabled=tournament_format != "swiss")
+            player_ids = st.multiselect("Players", options=list(names_by_id), format_func=names_by_id.get, key="tournament_players")
+            if tournament_match_type == "doubles":
+                st.caption("Doubles teams pair the highest-rated remaining player with the lowest-rated one. Seeds follow team ratings.")
+            if st.button("Create Tournament", key="create_tournament"):
+                result = create_tournament(name, tournament_format, tournament_match_type, player_ids, int(swiss_rounds) or None)
+                if result.startswith("Error"):
+                    st.error(result)
+                else:
+                    st.success(result)
+
+    if not st.session_state.tournaments:
+        st.info("No tournaments yet.")
+        return
+
+    tournaments = st.session_state.tournaments
+    tournament_id = st.selectbox(
+        "Tournament",
+        options=sorted(tournaments, key=lambda tid: tournaments[tid]["created"], reverse=True),
+        format_func=lambda tid: f"{tournaments[tid]['name']} ({TOURNAMENT_FORMATS[tournaments[tid]['format']]}, {tournaments[tid]['status']})",
+        key="tournament_select"
+    )
+    tournament = tournaments[tournament_id]
+    entrant_names = {e["id"]: e["name"] for e in tournament["entrants"]}
+    entrant_names[BYE] = "Bye"
+
+    if tournament["champion"]:
+        st.success(f"🏆 Champion: {entrant_names[tournament['champion']]}")
+
+    st.subheader("Standings", divider=True)
+    st.dataframe(pd.DataFrame([{
+        "Rank": rank,
+        "Seed": row["seed"],
+        "Team": row["name"],
+        "Played": row["played"],
+        "Wins": row["wins"],
+        "Losses": row["losses"],
+        "Point Diff": row["points_for"] - row["points_against"],
+        "Points For": row["points_for"]
+    } for rank, row in enumerate(tournament_standings(tournament), start=1)]), use_container_width=True, hide_index=True)
+
+    ready = [f for f in tournament["fixtures"] if f["winner"] is None and f["entrant_a"] not in (None, BYE) and f["entrant_b"] not in (None, BYE)]
+    if ready:
+        st.subheader("Next Fixtures", divider=True)
+        st.caption("Results recorded in Match Recording for these teams update the tournament automatically.")
+        entrants = {e["id"]: e for e in tournament["entrants"]}
+        for fixture in ready:
+            col1, col2 = st.columns([4, 1])
+            col1.markdown(f"**{fixture['stage']} Round {fixture['round']}:** {entrant_names[fixture['entrant_a']]} vs {entrant_names[fixture['entrant_b']]}")
+            if col2.button("Play", key=f"play_fixture_{tournament['id']}_{fixture['id']}"):
+                st.session_state.match_type = tournament["match_type"]
+                st.session_state.current_teams = {
+                    "team_a": [get_player_by_id(pid) for pid in entrants[fixture["entrant_a"]]["player_ids"]],
+                    "team_b": [get_player_by_id(pid) for pid in entrants[fixture["entrant_b"]]["player_ids"]]
+                }
+                st.success("Fixture teams loaded for Match Recording.")
+
+    st.subheader("Fixtures", divider=True)
+    st.dataframe(pd.DataFrame([{
+        "Stage": f["stage"],
+        "Round": f["round"],
+        "Team A": entrant_names.get(f["entrant_a"], "TBD"),
+        "Team B": entrant_names.get(f["entrant_b"], "TBD"),
+        "Score": f"{f['score_a']}-{f['score_b']}" if f["score_a"] is not None else "",
+        "Winner": entrant_names.get(f["winner"], "")
+    } for f in tournament["fixtures"]]), use_container_width=True, hide_index=True)
+
+    if st.session_state.is_super_admin and st.button("Delete Tournament", key=f"delete_tournament_{tournament['id']}"):
+        delete_tournament(tournament["id"])
+        rerun_section()
+
+def scoreboard_html(live, recent):
+    """One HTML block with a card per live match and the latest results"""
+    def card(match, status):
+        score_a, score_b = rally_score(match["rallies"])
+        serving = match["rallies"][-1:].decode("ascii")  # The side that won the last rally serves
+        rows = "".join(
+            f"<tr><td style='padding: 4px 8px;'>{'🏸' if serving == team else ''}</td>"
+            f"<td style='padding: 4px 8px; font-size: 20px;'>{html.escape(' & '.join(p['name'] for p in match[f'team_{team.lower()}']))}</td>"
+            f"<td style='padding: 4px 16px; font-size: 32px; font-weight: bold; text-align: right;'>{score}</td></tr>"
+            for team, score in (("A", score_a), ("B", score_b))
+        )
+        court = f"Court {html.escape(match['court'])} · " if match["court"] else ""
+        return (f"<div style='padding: 10px; border: 1px solid #4169E1; border-radius: 8px; margin-bottom: 12px;'>"
+                f"<div style='color: gray;'>{court}{status}</div><table style='width: 100%;'>{rows}</table></div>")
+
+    if not live and not recent:
+        return "No matches in progress."
+    parts = [card(match, "🔴 Live") for match in live] or ["<p>No matches in progress.</p>"]
+    if recent:
+        parts.append("<h4>Recent Results</h4>")
+        parts.extend(card(match, "Final") for match in recent)
+    return "".join(parts)
+
+@st.fragment(run_every=SCOREBOARD_REFRESH_SECONDS)
+def live_scoreboard():
+    """Scoreboard fragment; each poll only reads the shared rendering of the current live version"""
+    st.markdown(get_live_matches().board(scoreboard_html), unsafe_allow_html=True)
+
+def scoreboard_page():
+    """Read-only spectator page (?view=scoreboard) that skips data loading and every app section"""
+    st.header("🏸 Live Scoreboard")
+    st.caption(f"Updates every {SCOREBOARD_REFRESH_SECONDS} seconds.")
+    live_scoreboard()
+
+def live_scoring_section():
+    """Live scoring: tap the side that won each rally; the match is recorded from its rally log"""
+    st.subheader("Live Scoring", divider=True)
+    if not st.session_state.is_admin:
+        st.info("Admin login required to score matches live")
+        return
+    live_matches = get_live_matches()
+    match = live_matches.get(st.session_state.get("live_match_id"))
+    if match is None:
+        in_progress = {m["id"]: m for m in live_matches.list()}
+        if in_progress:
+            resume_id = st.selectbox(
+                "Resume a live match", list(in_progress), key="live_resume_id",
+                format_func=lambda mid: f"{' & '.join(p['name'] for p in in_progress[mid]['team_a'])} vs "
+                                        f"{' & '.join(p['name'] for p in in_progress[mid]['team_b'])} "
+                                        f"({'-'.join(map(str, rally_score(in_progress[mid]['rallies'])))})"
+            )
+            if st.button("Resume Scoring", key="live_resume"):
+                st.session_state.live_match_id = resume_id
+                rerun_section()
+        teams = st.session_state.current_teams
+        if not (teams["team_a"] and teams["team_b"]):
+            st.warning("Generate teams first before starting live scoring.")
+            return
+        court = st.text_input("Court (optional)", key="live_court")
+        if st.button("Start Live Scoring", key="live_start"):
+            st.session_state.live_match_id = live_matches.start(teams["team_a"], teams["team_b"], court)
+            logger.info(f"Started live match {st.session_state.live_match_id}")
+            rerun_section()
+        return
+
+    score_a, score_b = rally_score(match["rallies"])
+    winner = rally_game_winner(score_a, score_b)
+    col1, col2 = st.columns(2)
+    for col, team, score in ((col1, "A", score_a), (col2, "B", score_b)):
+        with col:
+            st.metric(" & ".join(p["name"] for p in match[f"team_{team.lower()}"]), score)
+            if st.button(f"Point Team {team}", key=f"live_point_{team}", disabled=winner is not None, use_container_width=True):
+                live_matches.add_rally(match["id"], team)
+                rerun_section()
+    st.caption(f"Rallies: {match['rallies'].decode('ascii') or '-'}. Spectators can follow the score at `?view=scoreboard`.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Undo Last Rally", key="live_undo", disabled=not match["rallies"]):
+            live_matches.undo(match["id"])
+            rerun_section()
+    with col2:
+        if st.button("Discard Match", key="live_discard"):
+            live_matches.remove(match["id"])
+            st.session_state.live_match_id = None
+            logger.info(f"Discarded live match {match['id']} at {score_a}-{score_b}")
+            rerun_section()
+
+    if winner:
+        st.success(f"Team {winner} wins {score_a}-{score_b}")
+        live_notes = st.text_area("Match Notes (optional)", key="live_notes")
+        if st.button("Record Match", key="live_record"):
+            result = record_live_match(match["id"], live_notes)
+            if result.startswith("Error:"):
+                st.error(result)
+            else:
+                st.session_state.live_match_id = None
+                st.success(result)
+                st.rerun()
+
 def match_recording_section():
     """Match recording section with prompt input for admins"""
     st.header("✍️ Record Match Results")
@@ -1078,17 +3821,22 @@ def match_recording_section():
             if score_a == 0 and score_b == 0:
                 st.error("Please enter valid scores for the match.")
             else:
-                record_match_result(
+                result = record_match_result(
                     st.session_state.current_teams["team_a"],
                     st.session_state.current_teams["team_b"],
                     score_a,
                     score_b,
                     match_notes
                 )
-                st.success("Match recorded successfully!")
-                st.rerun()
+                if isinstance(result, str):
+                    st.error(result)
+                else:
+                    st.success("Match recorded successfully!")
+                    st.rerun()
     else:
         st.warning("Generate teams first before recording match results via form.")
+
+    live_scoring_section()
     
     # Prompt-Based Input for Admins
     st.subheader("Record Match via Prompt", divider=True)
@@ -1171,62 +3919,113 @@ def match_recording_section():
                         st.session_state.prompt_error = None
                         st.rerun()
 
+        with st.expander("Record Several Matches at Once"):
+            st.markdown("""
+            **Instructions**: Paste one match per line, or describe the whole session. A list like the one below
+            is read directly; anything else is sent to the AI in a single request.
+            
+            **Example**:
+            ```
+            Golu & Saurabh vs Pavan & Shraddha 21-18
+            Golu vs Pavan 19-21 close finish
+            ```
+            """)
+            batch_prompt = st.text_area("Matches", key="batch_match_prompt", height=150)
+            if 'pending_batch_records' not in st.session_state:
+                st.session_state.pending_batch_records = None
+            if st.button("Process Matches", key="process_batch_prompt", disabled=not batch_prompt):
+                with st.spinner("Processing matches..."):
+                    result = process_batch_match_prompt(batch_prompt)
+                    if isinstance(result, str):
+                        st.session_state.pending_batch_records = None
+                        st.error(result)
+                    else:
+                        st.session_state.pending_batch_records = result
+
+            if st.session_state.pending_batch_records:
+                records, source = st.session_state.pending_batch_records
+                names_by_id = {p["id"]: p["name"] for p in get_all_available_players()}
+                st.info(f"Review the {len(records)} matches read from the {source} below:")
+                st.dataframe(pd.DataFrame({
+                    "#": range(1, len(records) + 1),
+                    "Team A": [", ".join(names_by_id.get(pid, str(pid)) for pid in record["team_a"]) for record, _ in records],
+                    "Team B": [", ".join(names_by_id.get(pid, str(pid)) for pid in record["team_b"]) for record, _ in records],
+                    "Score": [f"{record['score_a']}-{record['score_b']}" for record, _ in records],
+                    "Winner": [f"Team {record['winning_team']}" if record["winning_team"] else "" for record, _ in records],
+                    "Notes": [str(record["notes"]) for record, _ in records],
+                    "Status": ["OK" if error is None else error[len("Error: "):] for _, error in records]
+                }), use_container_width=True, hide_index=True)
+                valid_records = [record for record, error in records if error is None]
+                if len(valid_records) < len(records):
+                    st.warning(f"{len(records) - len(valid_records)} matches have problems and will be skipped. Fix the text and process again to include them.")
+                if st.button(f"Confirm and Record {len(valid_records)} Matches", key="confirm_batch_record", disabled=not valid_records):
+                    record_result = record_prompt_match_results(valid_records)
+                    if record_result.startswith("Error:"):
+                        logger.error(f"Failed to record batch: {record_result}")
+                        st.error(record_result)
+                    else:
+                        st.session_state.pending_batch_records = None
+                        st.success(record_result)
+                        st.rerun()
+
+@data_transaction
 def delete_selected_matches(selected_rows):
     """Delete selected matches from match history and update player stats"""
     try:
         if not selected_rows:
             return "Error: No matches selected for deletion."
 
-        selected_match_ids = [row["Match ID"] for row in selected_rows]
+        selected_match_ids = {row["Match ID"] for row in selected_rows}
         logger.info(f"Deleting matches with IDs: {selected_match_ids}")
         # Validate match IDs
+        existing_match_ids = {m["id"] for m in st.session_state.match_history}
         for match_id in selected_match_ids:
-            if not any(m["id"] == match_id for m in st.session_state.match_history):
+            if match_id not in existing_match_ids:
                 return f"Error: Match ID {match_id} not found in match history."
+            error = revise_tournament_result(match_id)
+            if error:
+                return error
 
-        # Filter out deleted matches
-        new_match_history = [m for m in st.session_state.match_history if m["id"] not in selected_match_ids]
-
-        # Update player stats by resetting and recalculating
-        all_players = get_all_available_players()
-        for player in all_players:
-            player["games_played"] = 0
-            player["wins"] = 0
-            player["points_scored"] = 0
-
-        for match in new_match_history:
-            for pid in match["team_a"]:
-                update_player_stats(pid, match["score_a"], match["winning_team"] == "A")
-            for pid in match["team_b"]:
-                update_player_stats(pid, match["score_b"], match["winning_team"] == "B")
+        # Remove deleted matches' contributions from player stats, then filter them out
+        new_match_history = []
+        for match in st.session_state.match_history:
+            if match["id"] in selected_match_ids:
+                apply_match_stats(match, revert=True)
+            else:
+                new_match_history.append(match)
 
         # Update session state
         st.session_state.match_history = new_match_history
+        rebuild_ratings()
 
         # Save to file and upload to Google Drive
         save_data()
         push_to_gdrive(match_history=True)
         logger.info(f"Successfully deleted {len(selected_match_ids)} match(es)")
         return f"Success: Deleted {len(selected_match_ids)} match(es) successfully!"
+    except DataConflictError:
+        raise  # Retried by data_transaction on fresh data
     except Exception as e:
         logger.error(f"Error deleting matches: {str(e)}")
         return f"Error: Failed to delete matches: {str(e)}"
 
+@data_transaction
 def save_edited_match_history(edited_data, deleted_match_ids):
-    """Save edited match history to session state and update player stats, excluding deleted matches"""
+    """Apply edits from the match history editor, touching only changed and deleted matches"""
     try:
         logger.info(f"Saving edited match history, excluding deleted matches: {deleted_match_ids}")
-        # Filter out deleted matches
-        edited_data = [row for row in edited_data if row["Match ID"] not in deleted_match_ids]
+        deleted_match_ids = set(deleted_match_ids)
+        match_history = st.session_state.match_history
+        match_index = {m["id"]: i for i, m in enumerate(match_history)}
 
-        # Validate and process edited data
-        new_match_history = []
+        # Validate edited rows and collect the ones that actually changed
+        updated_matches = {}
         for row in edited_data:
             match_id = row["Match ID"]
-            # Find original match
-            original_match = next((m for m in st.session_state.match_history if m["id"] == match_id), None)
-            if not original_match:
+            if match_id not in match_index:
                 return f"Error: Match ID {match_id} not found in match history."
+            if match_id in deleted_match_ids:
+                continue
 
             # Validate editable fields
             score_a = row["Score A"]
@@ -1244,6 +4043,10 @@ def save_edited_match_history(edited_data, deleted_match_ids):
             if expected_winner and winning_team != expected_winner:
                 return f"Error: Winning team for match {match_id} does not match scores (Score A: {score_a}, Score B: {score_b})."
 
+            original_match = match_history[match_index[match_id]]
+            if (score_a, score_b, winning_team, notes) == (original_match["score_a"], original_match["score_b"], original_match["winning_team"], original_match["notes"]):
+                continue
+
             # Create updated match record
             updated_match = original_match.copy()
             updated_match.update({
@@ -1252,281 +4055,1275 @@ def save_edited_match_history(edited_data, deleted_match_ids):
                 "winning_team": winning_team,
                 "notes": notes
             })
-            new_match_history.append(updated_match)
+            if (score_a, score_b) != (original_match["score_a"], original_match["score_b"]):
+                updated_match.pop("rallies", None)  # The rally log no longer adds up to the score
+            updated_matches[match_id] = updated_match
 
-        # Update player stats by resetting and recalculating
-        all_players = get_all_available_players()
-        for player in all_players:
-            player["games_played"] = 0
-            player["wins"] = 0
-            player["points_scored"] = 0
-
-        for match in new_match_history:
-            for pid in match["team_a"]:
-                update_player_stats(pid, match["score_a"], match["winning_team"] == "A")
-            for pid in match["team_b"]:
-                update_player_stats(pid, match["score_b"], match["winning_team"] == "B")
+        for match_id in deleted_match_ids:
+            if match_id not in match_index:
+                return f"Error: Match ID {match_id} not found in match history."
 
-        # Update session state
-        st.session_state.match_history = new_match_history
+        if not updated_matches and not deleted_match_ids:
+            return "Success: No changes to save."
+
+        rescored = {
+            match_id for match_id, updated_match in updated_matches.items()
+            if (updated_match["score_a"], updated_match["score_b"], updated_match["winning_team"]) !=
+               tuple(match_history[match_index[match_id]][field] for field in ("score_a", "score_b", "winning_team"))
+        }
+
+        # Fixtures those matches completed are reopened or re-scored first, since a later round may forbid it
+        for match_id in [*deleted_match_ids, *rescored]:
+            error = revise_tournament_result(match_id, updated_matches.get(match_id) if match_id in rescored else None)
+            if error:
+                return error
+
+        # Adjust player stats for changed and deleted matches only
+        results_changed = bool(deleted_match_ids or rescored)
+        for match_id, updated_match in updated_matches.items():
+            if match_id in rescored:
+                apply_match_stats(match_history[match_index[match_id]], revert=True)
+                apply_match_stats(updated_match)
+            match_history[match_index[match_id]] = updated_match
+
+        if deleted_match_ids:
+            for match_id in deleted_match_ids:
+                apply_match_stats(match_history[match_index[match_id]], revert=True)
+            st.session_state.match_history = [m for m in match_history if m["id"] not in deleted_match_ids]
+
+        # Ratings depend on match order, so they are replayed only when a result changed
+        if results_changed:
+            rebuild_ratings()
 
         # Save to file and upload to Google Drive
         save_data()
         push_to_gdrive(match_history=True)
-        logger.info(f"Successfully updated {len(new_match_history)} matches")
+        logger.info(f"Successfully updated {len(updated_matches)} and deleted {len(deleted_match_ids)} match(es)")
         return "Success: Match history updated successfully!"
+    except DataConflictError:
+        raise  # Retried by data_transaction on fresh data
     except Exception as e:
         logger.error(f"Error saving edited match history: {str(e)}")
         return f"Error: Failed to save changes: {str(e)}"
 
-def statistics_section():
-    """Statistics and analytics section"""
-    st.header("📊 Statistics & Analytics")
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Player Stats", "Match History", "Team Analysis", "Performance Over Time", "Advanced Analytics"])
-
-    with tab1:
-        st.subheader("Player Performance", divider=True)
-        all_players = st.session_state.predefined_players + st.session_state.temp_players
-        if all_players:
-            df_players = pd.DataFrame(all_players)
-            df_players["win_rate"] = df_players.apply(
-                lambda x: round((x["wins"] / x["games_played"]) * 100, 1) if x["games_played"] > 0 else 0, axis=1
-            )
-            df_players["avg_points_per_game"] = df_players.apply(
-                lambda x: round(x["points_scored"] / x["games_played"], 1) if x["games_played"] > 0 else 0, axis=1
-            )
-            columns_to_display = ["name", "games_played", "wins", "win_rate", "points_scored", "avg_points_per_game"]
-            st.dataframe(df_players[columns_to_display].sort_values(by="win_rate", ascending=False), use_container_width=True)
-            if not df_players.empty and df_players["games_played"].sum() > 0:
+def build_player_stats_aggregates(players):
+    """Player table and charts for the Player Stats tab"""
+    df_players = pd.DataFrame(players)
+    if df_players.empty:
+        return {"table": df_players, "figures": []}
+    df_players["win_rate"] = df_players.apply(
+        lambda x: round((x["wins"] / x["games_played"]) * 100, 1) if x["games_played"] > 0 else 0, axis=1
+    )
+    df_players["avg_points_per_game"] = df_players.apply(
+        lambda x: round(x["points_scored"] / x["games_played"], 1) if x["games_played"] > 0 else 0, axis=1
+    )
+    df_players["rating"] = df_players["id"].map(lambda pid: round(get_player_rating(pid)))
+    columns_to_display = ["name", "rating", "games_played", "wins", "win_rate", "points_scored", "avg_points_per_game"]
+    table = df_players[columns_to_display].sort_values(by="win_rate", ascending=False)
+
+    figures = []
+    if df_players["games_played"].sum() > 0:
+        fig = px.bar(df_players[df_players["games_played"] > 0].sort_values("win_rate", ascending=False),
+                     x="name", y="win_rate", title="Win Rate by Player",
+                     labels={"win_rate": "Win Rate (%)", "name": "Player Name"})
+        fig.update_layout(xaxis_tickangle=-45)
+        figures.append(("Win Rate by Player", fig.to_dict()))
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=df_players["name"], y=df_players["games_played"], name="Games Played"))
+        fig.add_trace(go.Bar(x=df_players["name"], y=df_players["wins"], name="Wins"))
+        fig.update_layout(barmode='group', xaxis_tickangle=-45, title="Games Played vs Wins")
+        figures.append(("Games Played vs Wins", fig.to_dict()))
+    return {"table": table, "figures": figures}
+
+MATCH_HISTORY_PAGE_SIZES = [25, 50, 100, 200]
+
+def get_player_names_by_id():
+    """Map of player ID to name for all available players"""
+    return {p["id"]: p["name"] for p in get_all_available_players()}
+
+def build_match_rows(matches, names_by_id):
+    """Build match history table rows for the given matches"""
+    rows = []
+    for match in matches:
+        team_a_names = " & ".join(names_by_id[pid] for pid in match["team_a"] if pid in names_by_id)
+        team_b_names = " & ".join(names_by_id[pid] for pid in match["team_b"] if pid in names_by_id)
+        rows.append({
+            "Match ID": match["id"],
+            "Date": match["timestamp"],
+            "Team A": team_a_names + " 🏆" if match["winning_team"] == "A" else team_a_names,
+            "Team B": team_b_names + " 🏆" if match["winning_team"] == "B" else team_b_names,
+            "Score A": match["score_a"],
+            "Score B": match["score_b"],
+            "Score": f"{match['score_a']} - {match['score_b']}",
+            "Winner": match["winning_team"],
+            "Notes": match["notes"]
+        })
+    return rows
+
+def filter_match_offsets(player_ids, start_date, end_date, margin_range):
+    """Offsets into match history of matches passing the filters, newest first"""
+    player_ids = set(player_ids)
+    # Narrow the statistics window by the table's own date range, then slice the timestamp index once
+    window = get_stats_window()
+    start_epoch, end_epoch = window["start"], window["end"]
+    if start_date:
+        start_epoch = max(start_epoch or 0, date_to_epoch(start_date))
+    if end_date:
+        table_end = date_to_epoch(end_date + datetime.timedelta(days=1))
+        end_epoch = min(end_epoch, table_end) if end_epoch is not None else table_end
+    offsets = []
+    match_history = st.session_state.match_history
+    for offset in reversed(get_match_time_index().range(start_epoch, end_epoch)):
+        match = match_history[offset]
+        margin = abs(match["score_a"] - match["score_b"])
+        if not (margin_range[0] <= margin <= margin_range[1]):
+            continue
+        if player_ids and player_ids.isdisjoint(match["team_a"]) and player_ids.isdisjoint(match["team_b"]):
+            continue
+        offsets.append(offset)
+    return offsets
+
+def get_match_history_page(filters, page, page_size):
+    """Return (page DataFrame, total matching rows); filtered offsets and built pages are shared by all sessions"""
+    name = f"match_history@{stats_window_key()}:{filters}"
+    offsets = get_cached_aggregate(name, lambda: filter_match_offsets(*filters))
+
+    def build_page():
+        page_offsets = offsets[(page - 1) * page_size:page * page_size]
+        matches = [st.session_state.match_history[offset] for offset in page_offsets]
+        return pd.DataFrame(
+            build_match_rows(matches, get_player_names_by_id()),
+            columns=["Match ID", "Date", "Team A", "Team B", "Score A", "Score B", "Score", "Winner", "Notes"]
+        )
+
+    return get_cached_aggregate(f"{name}:page {page}x{page_size}", build_page), len(offsets)
+
+def build_match_arrays():
+    """Columnar NumPy view of match history used by vectorized analytics"""
+    match_history = st.session_state.match_history
+    player_ids = [p["id"] for p in get_all_available_players()]
+    player_index = {pid: i for i, pid in enumerate(player_ids)}
+    n = len(match_history)
+    # At least two columns, so partner lookups work on histories with no doubles matches
+    max_team_size = max([2] + [max(len(m["team_a"]), len(m["team_b"])) for m in match_history])
+
+    team_a = np.full((n, max_team_size), -1, dtype=np.int32)
+    team_b = np.full((n, max_team_size), -1, dtype=np.int32)
+    for i, match in enumerate(match_history):
+        for j, pid in enumerate(match["team_a"]):
+            team_a[i, j] = player_index.get(pid, -1)
+        for j, pid in enumerate(match["team_b"]):
+            team_b[i, j] = player_index.get(pid, -1)
+
+    # Reuse the epochs already parsed by the timestamp index
+    index = get_match_time_index()
+    epochs = np.empty(n, dtype=np.int64)
+    epochs[np.array(index.offsets, dtype=np.int64)] = index.epochs
+    return {
+        "player_ids": player_ids,
+        "epochs": epochs,
+        "score_a": np.fromiter((m["score_a"] for m in match_history), dtype=np.int32, count=n),
+        "score_b": np.fromiter((m["score_b"] for m in match_history), dtype=np.int32, count=n),
+        "a_won": np.fromiter((m["winning_team"] == "A" for m in match_history), dtype=bool, count=n),
+        "team_a": team_a,
+        "team_b": team_b,
+    }
+
+def get_match_arrays():
+    """Match arrays for the current data version"""
+    return get_cached_aggregate("match_arrays", build_match_arrays)
+
+def select_match_arrays(arrays, offsets):
+    """Restrict match arrays to the given match offsets (None keeps every match)"""
+    if offsets is None:
+        return arrays
+    offsets = np.asarray(offsets, dtype=np.int64)
+    return {key: value if key == "player_ids" else value[offsets] for key, value in arrays.items()}
+
+def build_score_distribution_aggregates(period, offsets=None):
+    """Pre-binned score distribution charts, independent of history size"""
+    arrays = select_match_arrays(get_match_arrays(), offsets)
+    winner_scores = np.maximum(arrays["score_a"], arrays["score_b"])
+    loser_scores = np.minimum(arrays["score_a"], arrays["score_b"])
+    margins = winner_scores - loser_scores
+    all_scores = np.concatenate([arrays["score_a"], arrays["score_b"]])
+
+    # Histograms of individual team scores and winning margins
+    score_counts = np.bincount(all_scores)
+    margin_counts = np.bincount(margins)
+    fig_hist = go.Figure()
+    fig_hist.add_trace(go.Bar(x=np.arange(len(score_counts)), y=score_counts, name="Team Scores"))
+    fig_hist.add_trace(go.Bar(x=np.arange(len(margin_counts)), y=margin_counts, name="Point Difference"))
+    fig_hist.update_layout(barmode='overlay', title="Score and Point Difference Histogram", xaxis_title="Points", yaxis_title="Matches")
+    fig_hist.update_traces(opacity=0.7)
+
+    # Per-period means
+    unit = "W" if period == "Week" else "M"
+    periods = arrays["epochs"].astype("datetime64[s]").astype(f"datetime64[{unit}]")
+    period_keys, inverse = np.unique(periods, return_inverse=True)
+    counts = np.bincount(inverse)
+    mean_winner = np.bincount(inverse, weights=winner_scores) / counts
+    mean_loser = np.bincount(inverse, weights=loser_scores) / counts
+    mean_margin = np.bincount(inverse, weights=margins) / counts
+    period_labels = np.datetime_as_string(period_keys.astype("datetime64[D]"))
+    fig_trend = go.Figure()
+    fig_trend.add_trace(go.Scatter(x=period_labels, y=np.round(mean_winner, 1), mode='lines+markers', name="Winning Score"))
+    fig_trend.add_trace(go.Scatter(x=period_labels, y=np.round(mean_loser, 1), mode='lines+markers', name="Losing Score"))
+    fig_trend.add_trace(go.Scatter(x=period_labels, y=np.round(mean_margin, 1), mode='lines+markers', name="Point Difference"))
+    fig_trend.add_trace(go.Bar(x=period_labels, y=counts, name="Matches", yaxis="y2", opacity=0.3))
+    fig_trend.update_layout(title=f"Average Scores per {period}", xaxis_title=period, yaxis_title="Points",
+                            yaxis2=dict(title="Matches", overlaying="y", side="right"))
+
+    # 2-D heatmap of winning vs losing score
+    max_score = int(winner_scores.max()) + 1 if len(winner_scores) else 1
+    heatmap = np.bincount(winner_scores * max_score + loser_scores, minlength=max_score * max_score).reshape(max_score, max_score)
+    min_winner = int(winner_scores.min()) if len(winner_scores) else 0
+    fig_heatmap = go.Figure(go.Heatmap(
+        z=heatmap[min_winner:], x=np.arange(max_score), y=np.arange(min_winner, max_score),
+        colorscale="Greens", hovertemplate="%{y} - %{x}: %{z} matches<extra></extra>"
+    ))
+    fig_heatmap.update_layout(title="Final Score Heatmap", xaxis_title="Losing Score", yaxis_title="Winning Score")
+
+    return {
+        "histogram_figure": fig_hist.to_dict(),
+        "trend_figure": fig_trend.to_dict(),
+        "heatmap_figure": fig_heatmap.to_dict(),
+        "periods": list(period_labels),
+        "period_unit": unit
+    }
+
+def score_drilldown_figure(period_start, unit, max_points=500):
+    """Raw per-match score bars for a single period window"""
+    arrays = get_match_arrays()
+    start = np.datetime64(period_start).astype(f"datetime64[{unit}]")
+    end = start + np.timedelta64(1, unit)
+    start_epoch = int(start.astype("datetime64[s]").astype(np.int64))
+    end_epoch = int(end.astype("datetime64[s]").astype(np.int64))
+    window = get_stats_window()
+    if window["start"] is not None:
+        start_epoch = max(start_epoch, window["start"])
+    if window["end"] is not None:
+        end_epoch = min(end_epoch, window["end"])
+    offsets = np.array(get_match_time_index().range(start_epoch, end_epoch)[-max_points:], dtype=np.int64)
+    labels = [st.session_state.match_history[i]["timestamp"] for i in offsets]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=labels, y=arrays["score_a"][offsets], name="Team A"))
+    fig.add_trace(go.Bar(x=labels, y=arrays["score_b"][offsets], name="Team B"))
+    fig.update_layout(barmode='group', xaxis_tickangle=-45, title=f"Match Scores from {period_start}", xaxis_type="category")
+    return fig
+
+SYNERGY_SHRINKAGE = 5  # Pseudo-games pulling small samples toward the rating-based expectation
+SYNERGY_RATING_SCALE = 4 * RATING_SCALE / math.log(10)  # Converts a win-rate edge near 50% into rating points
+
+def build_synergy_aggregates(offsets=None):
+    """Expected vs actual results for every partner pair, plus the player-vs-player win matrix"""
+    arrays = select_match_arrays(get_match_arrays(), offsets)
+    player_ids = arrays["player_ids"]
+    num_players = len(player_ids)
+    team_a, team_b = arrays["team_a"], arrays["team_b"]
+    valid_a, valid_b = team_a >= 0, team_b >= 0
+
+    # Rating-based expectation for every match, from the ratings the players had going into it
+    expected_a = get_pre_match_expectations()
+    if offsets is not None:
+        expected_a = expected_a[np.asarray(offsets, dtype=np.int64)]
+    margin_a = (arrays["score_a"] - arrays["score_b"]).astype(float)
+
+    # One row per doubles side: (partner 1, partner 2, won, expected, margin)
+    pair_a, pair_b = valid_a.sum(axis=1) == 2, valid_b.sum(axis=1) == 2
+    side_p1 = np.concatenate([np.minimum(team_a[pair_a, 0], team_a[pair_a, 1]), np.minimum(team_b[pair_b, 0], team_b[pair_b, 1])])
+    side_p2 = np.concatenate([np.maximum(team_a[pair_a, 0], team_a[pair_a, 1]), np.maximum(team_b[pair_b, 0], team_b[pair_b, 1])])
+    side_won = np.concatenate([arrays["a_won"][pair_a], ~arrays["a_won"][pair_b]]).astype(float)
+    side_expected = np.concatenate([expected_a[pair_a], 1 - expected_a[pair_b]])
+    side_margin = np.concatenate([margin_a[pair_a], -margin_a[pair_b]])
+
+    pairs = []
+    if len(side_p1):
+        # Expected point difference from the rating edge, fitted over all sides
+        edge = side_expected - 0.5
+        margin_slope = (edge * side_margin).sum() / max((edge ** 2).sum(), 1e-9)
+
+        pair_keys, inverse = np.unique(side_p1 * num_players + side_p2, return_inverse=True)
+        games = np.bincount(inverse)
+        wins = np.bincount(inverse, weights=side_won)
+        expected = np.bincount(inverse, weights=side_expected)
+        margins = np.bincount(inverse, weights=side_margin)
+        expected_margins = np.bincount(inverse, weights=margin_slope * edge)
+        # Shrink toward the expectation: with few games the synergy estimate stays near zero
+        win_synergy = (wins - expected) / (games + SYNERGY_SHRINKAGE)
+        margin_synergy = (margins - expected_margins) / (games + SYNERGY_SHRINKAGE)
+        for key, g, w, e, ws, ms in zip(pair_keys, games, wins, expected, win_synergy, margin_synergy):
+            pairs.append({
+                "player_ids": (player_ids[key // num_players], player_ids[key % num_players]),
+                "games": int(g),
+                "actual_win_rate": w / g,
+                "expected_win_rate": e / g,
+                "synergy": ws,
+                "point_diff_synergy": ms
+            })
+    pairs.sort(key=lambda p: p["synergy"], reverse=True)
+
+    # Player-vs-player win matrix over every (Team A player, Team B player) combination
+    opponent_games = np.zeros((num_players, num_players))
+    opponent_wins = np.zeros((num_players, num_players))
+    a_won = arrays["a_won"].astype(float)
+    for i in range(team_a.shape[1]):
+        for j in range(team_b.shape[1]):
+            mask = valid_a[:, i] & valid_b[:, j]
+            rows, cols = team_a[mask, i], team_b[mask, j]
+            np.add.at(opponent_games, (rows, cols), 1)
+            np.add.at(opponent_games, (cols, rows), 1)
+            np.add.at(opponent_wins, (rows, cols), a_won[mask])
+            np.add.at(opponent_wins, (cols, rows), 1 - a_won[mask])
+
+    return {
+        "pairs": pairs,
+        "pair_lookup": {frozenset(p["player_ids"]): p for p in pairs},
+        "opponent_games": opponent_games,
+        "opponent_wins": opponent_wins,
+        "player_ids": player_ids
+    }
+
+def build_synergy_figures(synergy, top=10):
+    """Synergy bar chart and opponent win-rate heatmap from synergy aggregates"""
+    names_by_id = get_player_names_by_id()
+    pairs = synergy["pairs"]
+    shown = pairs if len(pairs) <= 2 * top else pairs[:top] + pairs[-top:]
+    df_pairs = pd.DataFrame([{
+        "Pair": " & ".join(names_by_id.get(pid, pid) for pid in pair["player_ids"]),
+        "Games": pair["games"],
+        "Expected Win Rate (%)": round(pair["expected_win_rate"] * 100, 1),
+        "Actual Win Rate (%)": round(pair["actual_win_rate"] * 100, 1),
+        "Synergy (%)": round(pair["synergy"] * 100, 1),
+        "Point Diff Synergy": round(pair["point_diff_synergy"], 2)
+    } for pair in shown])
+
+    fig_synergy = None
+    if not df_pairs.empty:
+        fig_synergy = px.bar(df_pairs, x="Pair", y="Synergy (%)", color="Synergy (%)",
+                             color_continuous_scale="RdYlGn", color_continuous_midpoint=0,
+                             hover_data=["Games", "Expected Win Rate (%)", "Actual Win Rate (%)", "Point Diff Synergy"],
+                             title="Partner Synergy (actual vs rating-expected win rate)")
+        fig_synergy.update_layout(xaxis_tickangle=-45)
+        fig_synergy = fig_synergy.to_dict()
+
+    games = synergy["opponent_games"]
+    played = games.sum(axis=1) > 0
+    names = [names_by_id.get(pid, pid) for pid, keep in zip(synergy["player_ids"], played) if keep]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        win_rates = np.round(synergy["opponent_wins"] / games * 100, 1)[np.ix_(played, played)]
+    fig_opponents = go.Figure(go.Heatmap(z=win_rates, x=names, y=names, colorscale="RdBu", zmid=50,
+                                         customdata=games[np.ix_(played, played)],
+                                         hovertemplate="%{y} vs %{x}<br>Win Rate: %{z}%<br>Games: %{customdata}<extra></extra>"))
+    fig_opponents.update_layout(title="Opponent Win Matrix (row player's win rate)", xaxis_title="Opponent", yaxis_title="Player")
+    return {"table": df_pairs, "synergy_figure": fig_synergy, "opponent_figure": fig_opponents.to_dict()}
+
+def get_pair_synergy(player_id_1, player_id_2):
+    """Shrunk win-rate synergy of a partner pair over all-time history (0 if they never partnered)"""
+    pair = get_cached_aggregate("synergy", build_synergy_aggregates)["pair_lookup"].get(frozenset((player_id_1, player_id_2)))
+    return pair["synergy"] if pair else 0.0
+
+def team_strength(team, rating_source=None):
+    """Effective team rating: mean player rating plus the pair's synergy in rating points"""
+    rating_source = rating_source or RATING_SOURCES["Ratings"]
+    strength = sum(rating_source(p) for p in team) / len(team)
+    if len(team) == 2:
+        strength += get_pair_synergy(team[0]["id"], team[1]["id"]) * SYNERGY_RATING_SCALE
+    return strength
+
+# Win-probability model
+WIN_MODEL_FEATURES = ["Rating Difference", "Synergy Difference", "Form Difference"]
+WIN_MODEL_FORM_GAMES = 5  # Recent matches per player behind the form feature
+WIN_MODEL_MIN_MATCHES = 30  # With fewer matches the Elo expectation is used instead
+WIN_MODEL_REFIT_MATCHES = 20  # New matches recorded before the shared model is refit
+WIN_MODEL_L2 = 1.0  # Ridge penalty that keeps coefficients stable on short histories
+WINNING_SCORE = 21
+
+def matchup_features(team_a_ids, team_b_ids, rating_of, synergy_of, form_of):
+    """Feature row for Team A against Team B: rating, pair synergy and recent form differences"""
+    def team_synergy(team):
+        return synergy_of(team[0], team[1]) if len(team) == 2 else 0.0
+    return [
+        (sum(map(rating_of, team_a_ids)) / len(team_a_ids) - sum(map(rating_of, team_b_ids)) / len(team_b_ids)) / RATING_SCALE,
+        team_synergy(team_a_ids) - team_synergy(team_b_ids),
+        sum(map(form_of, team_a_ids)) / len(team_a_ids) - sum(map(form_of, team_b_ids)) / len(team_b_ids)
+    ]
+
+def build_win_model_features():
+    """Pre-match features for every recorded match, with win and point-margin labels for Team A.
+
+    Ratings, pair synergy and form are all replayed in match order, so each row only
+    uses results from before that match.
+    """
+    players_by_id = {p["id"]: p for p in get_all_available_players()}
+    ratings = dict(archived_ratings())
+    recent = defaultdict(lambda: deque(maxlen=WIN_MODEL_FORM_GAMES))
+    pair_results = defaultdict(lambda: [0, 0.0])  # Pair -> [games, wins minus rating-expected wins]
+
+    def rating_of(pid):
+        if pid not in ratings:
+            ratings[pid] = initial_rating(players_by_id.get(pid))
+        return ratings[pid]
+
+    def synergy_of(pid_1, pid_2):
+        games, excess = pair_results.get(frozenset((pid_1, pid_2)), (0, 0.0))
+        return excess / (games + SYNERGY_SHRINKAGE)
+
+    def form_of(pid):
+        results = recent[pid]
+        return sum(results) / len(results) - 0.5 if results else 0.0
+
+    rows, won, margins = [], [], []
+    for match in st.session_state.match_history:
+        if not match["team_a"] or not match["team_b"]:
+            continue
+        rows.append(matchup_features(match["team_a"], match["team_b"], rating_of, synergy_of, form_of))
+        won.append(match["winning_team"] == "A")
+        margins.append(match["score_a"] - match["score_b"])
+        expected_a = expected_score(sum(map(rating_of, match["team_a"])) / len(match["team_a"]),
+                                    sum(map(rating_of, match["team_b"])) / len(match["team_b"]))
+        for team, expected, team_won in ((match["team_a"], expected_a, won[-1]), (match["team_b"], 1 - expected_a, not won[-1])):
+            if len(team) == 2:
+                pair = pair_results[frozenset(team)]
+                pair[0] += 1
+                pair[1] += team_won - expected
+        apply_match_ratings(match, ratings, players_by_id=players_by_id)
+        for pid in match["team_a"]:
+            recent[pid].append(match["winning_team"] == "A")
+        for pid in match["team_b"]:
+            recent[pid].append(match["winning_team"] == "B")
+    return {
+        "X": np.array(rows, dtype=float).reshape(-1, len(WIN_MODEL_FEATURES)),
+        "won": np.array(won, dtype=float),
+        "margin": np.array(margins, dtype=float)
+    }
+
+class WinProbabilityModel:
+    """Logistic win model and linear margin model over matchup features, fitted with NumPy"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.coefficients = np.zeros(len(WIN_MODEL_FEATURES))
+        self.margin_coefficients = np.zeros(len(WIN_MODEL_FEATURES))
+        self.data_version = None
+        self.match_count = None
+        self.accuracy = None
+        self.fitted_at = None
+
+    def needs_refit(self, data_version, service):
+        """Refit after any edit or removal of matches since the fitted version, or once enough matches were added"""
+        if self.data_version is None:
+            return True
+        if data_version <= self.data_version:
+            return False  # This session is behind the fit; a newer model is fine for it
+        _, changes = service.changes_since(self.data_version)
+        if changes is None:
+            return True  # The change log no longer reaches back, or the file was replaced
+        added = 0
+        for change in changes:
+            if change["version"] > data_version:
+                break
+            history_change = change["records"].get("match_history")
+            if history_change is None:
+                continue
+            if "replaced" in history_change or history_change["removed"] or history_change["updated"]:
+                return True
+            added += len(history_change["added"])
+        return added >= WIN_MODEL_REFIT_MATCHES
+
+    def fit(self, X, won, margin, match_count, data_version, iterations=25):
+        """Newton-Raphson (IRLS) fit warm-started from the previous coefficients, plus a ridge margin fit"""
+        start = time.perf_counter()
+        with self._lock:
+            penalty = WIN_MODEL_L2 * np.eye(X.shape[1])
+            w = self.coefficients.copy()
+            for _ in range(iterations):
+                p = 1 / (1 + np.exp(-X @ w))
+                gradient = X.T @ (won - p) - WIN_MODEL_L2 * w
+                hessian = (X.T * (p * (1 - p))) @ X + penalty
+                step = np.linalg.solve(hessian, gradient)
+                w += step
+                if np.abs(step).max() < 1e-6:
+                    break
+            self.coefficients = w
+            self.margin_coefficients = np.linalg.solve(X.T @ X + penalty, X.T @ margin)
+            self.accuracy = float(((X @ w > 0) == (won > 0.5)).mean()) if len(won) else None
+            self.match_count = match_count
+            self.data_version = data_version
+            self.fitted_at = time.time()
+        logger.info(f"Fitted win model on {len(won)} matches in {(time.perf_counter() - start) * 1000:.1f} ms, coefficients {np.round(w, 3).tolist()}")
+
+    def predict(self, X):
+        """Team A win probabilities and expected point margins for a batch of feature rows"""
+        with self._lock:
+            w, m = self.coefficients, self.margin_coefficients
+        return 1 / (1 + np.exp(-X @ w)), X @ m
+
+def get_shared_win_model():
+    """Win model shared by every session of the current club"""
+    return get_club_resource("win_model", WinProbabilityModel)
+
+def get_win_model():
+    """Fitted win model, refit once enough new matches arrive; None while history is too short"""
+    match_count = len(st.session_state.match_history)
+    if match_count < WIN_MODEL_MIN_MATCHES:
+        return None
+    model = get_shared_win_model()
+    if model.needs_refit(st.session_state.data_version, get_data_service()):
+        features = get_cached_aggregate("win_model_features", build_win_model_features)
+        model.fit(features["X"], features["won"], features["margin"], match_count, st.session_state.data_version)
+    return model
+
+def recent_form(player_id, index, match_history):
+    """Win rate over the player's last few matches, centred on zero"""
+    offsets = index.recent_match_offsets(player_id, WIN_MODEL_FORM_GAMES)
+    if not offsets:
+        return 0.0
+    wins = sum(match_history[o]["winning_team"] == ("A" if player_id in match_history[o]["team_a"] else "B") for o in offsets)
+    return wins / len(offsets) - 0.5
+
+def predict_matchups(matchups):
+    """Batch Team A win probabilities and expected margins (None without a fitted model) for (team_a, team_b) player lists"""
+    model = get_win_model()
+    if model is None:
+        probabilities = np.array([expected_score(team_strength(team_a), team_strength(team_b)) for team_a, team_b in matchups])
+        return probabilities, None
+    # Resolve shared state once per batch; per-matchup work is then plain dict lookups
+    # The index is built for this very history, and synergy uses pre-match ratings like the training features
+    index = get_player_match_index()
+    match_history = st.session_state.match_history
+    pair_lookup = get_cached_aggregate("synergy", build_synergy_aggregates)["pair_lookup"]
+    ratings = st.session_state.player_ratings
+    players_by_id = {p["id"]: p for team_a, team_b in matchups for p in team_a + team_b}
+
+    def rating_of(pid):
+        rating = ratings.get(pid)
+        return rating if rating is not None else initial_rating(players_by_id[pid])
+
+    def synergy_of(pid_1, pid_2):
+        pair = pair_lookup.get(frozenset((pid_1, pid_2)))
+        return pair["synergy"] if pair else 0.0
+
+    X = np.array([
+        matchup_features([p["id"] for p in team_a], [p["id"] for p in team_b], rating_of, synergy_of,
+                         lambda pid: recent_form(pid, index, match_history))
+        for team_a, team_b in matchups
+    ], dtype=float)
+    return model.predict(X)
+
+def expected_score_line(probability, margin):
+    """Expected final score for Team A and Team B: the favourite reaches 21, the other trails by the expected margin"""
+    loser_score = min(max(WINNING_SCORE - int(round(abs(margin))), 0), WINNING_SCORE - 2)
+    return (WINNING_SCORE, loser_score) if probability >= 0.5 else (loser_score, WINNING_SCORE)
+
+def suggest_doubles_pairings(players):
+    """All ways to split four players into two pairs, most evenly matched first, as (team_a, team_b, win probability of A)"""
+    first = players[0]
+    splits = []
+    for partner in players[1:]:
+        splits.append(([first, partner], [p for p in players[1:] if p is not partner]))
+    probabilities, _ = predict_matchups(splits)
+    return sorted(((team_a, team_b, p) for (team_a, team_b), p in zip(splits, probabilities)), key=lambda split: abs(split[2] - 0.5))
+
+# Monte Carlo ladder simulation
+SIMULATION_ELEMENT_BUDGET = 1_000_000  # Array elements per simulated session batch (seasons x matches x players); bounds memory
+SIMULATION_STRENGTH_SD = 200  # Rating uncertainty of a player with no games, shrinking with 1/sqrt(games)
+
+def simulation_chunk_size(model):
+    """Seasons simulated together, so one session's arrays stay within the element budget"""
+    return max(1, SIMULATION_ELEMENT_BUDGET // (model["matches_per_session"] * len(model["strengths"])))
+
+def simulate_ladder_chunk(model, simulations, seed):
+    """Finish-position counts (player x position) for a batch of simulated seasons.
+
+    Sessions are simulated one at a time and their games and wins accumulated, so memory
+    does not grow with the number of sessions.
+    """
+    rng = np.random.default_rng(seed)
+    num_players = len(model["strengths"])
+    matches, team_size = model["matches_per_session"], model["team_size"]
+    per_match = team_size * 2
+    sims = np.arange(simulations)
+    # Distinct splits of the picked players into two teams
+    splits = np.array([[0, *others, *[i for i in range(1, per_match) if i not in others]]
+                       for others in itertools.combinations(range(1, per_match), team_size - 1)])
+
+    # Each season draws its own strengths around the current ratings
+    strengths = model["strengths"] + rng.standard_normal((simulations, num_players)) * model["strength_sd"]
+    games = np.zeros((simulations, num_players))
+    wins = np.zeros((simulations, num_players))
+    for _ in range(model["sessions"]):
+        present = rng.random((simulations, num_players)) < model["attendance"]
+        enough_players = present.sum(axis=1) >= per_match
+
+        # Weighted sampling without replacement (exponential race): the largest log(u) / weight keys among those present play
+        keys = np.where(present[:, None, :], np.log(rng.random((simulations, matches, num_players))) / model["weights"], -np.inf)
+        picks = np.argpartition(-keys, per_match - 1, axis=2)[..., :per_match]
+        del keys
+        picks = np.take_along_axis(picks, splits[rng.integers(len(splits), size=picks.shape[:2])], axis=2)
+
+        picked_strengths = strengths[sims[:, None, None], picks]
+        strength_gap = picked_strengths[..., :team_size].mean(axis=2) - picked_strengths[..., team_size:].mean(axis=2)
+        a_won = rng.random(strength_gap.shape) < 1 / (1 + np.exp(-strength_gap))
+
+        played = np.broadcast_to(enough_players[:, None, None], picks.shape)
+        won = np.concatenate([np.repeat(a_won[..., None], team_size, axis=2), np.repeat(~a_won[..., None], team_size, axis=2)], axis=2)
+        flat = (sims[:, None, None] * num_players + picks)[played]
+        games += np.bincount(flat, minlength=simulations * num_players).reshape(simulations, num_players)
+        wins += np.bincount(flat, weights=won[played], minlength=simulations * num_players).reshape(simulations, num_players)
+
+    total_games = model["base_games"] + games
+    win_rate = np.where(total_games > 0, (model["base_wins"] + wins) / np.maximum(total_games, 1), -1.0)
+    # Ladder order: win rate, ties broken at random
+    order = np.lexsort((rng.random(win_rate.shape), -win_rate), axis=1)
+    positions = np.empty_like(order)
+    positions[sims[:, None], order] = np.arange(num_players)
+    counts = np.bincount((np.arange(num_players) * num_players + positions).ravel(), minlength=num_players * num_players)
+    return {"positions": counts.reshape(num_players, num_players), "win_rate_sum": np.clip(win_rate, 0, None).sum(axis=0)}
+
+def build_ladder_model(players, matches, sessions, matches_per_session, match_type):
+    """Per-player strengths, uncertainty, attendance and baseline record for the simulator"""
+    match_days = defaultdict(set)
+    for match in matches:
+        for pid in match["team_a"] + match["team_b"]:
+            match_days[pid].add(match["timestamp"][:10])
+    total_days = len({match["timestamp"][:10] for match in matches})
+    games = np.array([p["games_played"] for p in players], dtype=float)
+    logit_per_point = math.log(10) / RATING_SCALE
+    return {
+        "strengths": np.array([get_player_rating(p["id"]) for p in players]) * logit_per_point,
+        "strength_sd": SIMULATION_STRENGTH_SD / np.sqrt(games + 1) * logit_per_point,
+        "attendance": np.array([(len(match_days[p["id"]]) + 1) / (total_days + 2) for p in players]),
+        "weights": (games + 1) / (games + 1).sum(),
+        "base_games": games,
+        "base_wins": np.array([p["wins"] for p in players], dtype=float),
+        "sessions": sessions,
+        "matches_per_session": matches_per_session,
+        "team_size": 2 if match_type == "doubles" else 1
+    }
+
+def run_ladder_simulation(players, matches, simulations=10000, sessions=30, matches_per_session=6, match_type="doubles", seed=0):
+    """Simulate the rest of a season many times and return each player's finish-position distribution"""
+    start = time.perf_counter()
+    model = build_ladder_model(players, matches, sessions, matches_per_session, match_type)
+    chunk_size = simulation_chunk_size(model)
+    sizes = [min(chunk_size, simulations - i) for i in range(0, simulations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    results = [simulate_ladder_chunk(model, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    positions = sum(r["positions"] for r in results) / simulations
+    win_rate = sum(r["win_rate_sum"] for r in results) / simulations
+    logger.info(f"Simulated {simulations} seasons of {sessions} sessions in {len(sizes)} batches in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return {"positions": positions, "win_rate": win_rate, "player_names": [p["name"] for p in players]}
+
+def build_ladder_simulation_aggregates(players, matches, params):
+    """Finish-position table and heatmap for a ladder simulation"""
+    result = run_ladder_simulation(players, matches, **params)
+    positions = result["positions"]
+    num_players = len(players)
+    table = pd.DataFrame({
+        "Player": result["player_names"],
+        "Finish 1st (%)": np.round(positions[:, 0] * 100, 1),
+        "Top 3 (%)": np.round(positions[:, :3].sum(axis=1) * 100, 1),
+        "Expected Position": np.round(positions @ np.arange(1, num_players + 1), 2),
+        "Projected Win Rate (%)": np.round(result["win_rate"] * 100, 1)
+    }).sort_values("Expected Position")
+    order = table.index.to_numpy()
+    fig = go.Figure(go.Heatmap(
+        z=np.round(positions[order] * 100, 1),
+        x=[f"#{k}" for k in range(1, num_players + 1)],
+        y=[result["player_names"][i] for i in order],
+        colorscale="Greens",
+        hovertemplate="%{y} finishes %{x}: %{z}%<extra></extra>"
+    ))
+    fig.update_layout(title="Finish Position Probability (%)", xaxis_title="Ladder Position", yaxis=dict(autorange="reversed"))
+    return {"table": table, "figure": fig.to_dict()}
+
+def match_history_filters():
+    """Filter and pagination widgets for the match history table"""
+    all_players = get_all_available_players()
+    names_by_id = {p["id"]: p["name"] for p in all_players}
+    max_margin = max((abs(m["score_a"] - m["score_b"]) for m in st.session_state.match_history[-1000:]), default=30)
+    max_margin = max(max_margin, 30)
+
+    col1, col2, col3 = st.columns([2, 2, 2])
+    with col1:
+        player_ids = st.multiselect("Players", options=list(names_by_id.keys()),
+                                    format_func=lambda pid: names_by_id.get(pid, pid), key="history_filter_players")
+    with col2:
+        date_range = st.date_input("Date Range", value=(), key="history_filter_dates")
+    with col3:
+        margin_range = st.slider("Point Difference", 0, max_margin, (0, max_margin), key="history_filter_margin")
+
+    start_date = date_range[0] if len(date_range) > 0 else None
+    end_date = date_range[1] if len(date_range) > 1 else start_date
+    return (tuple(sorted(player_ids)), start_date, end_date, margin_range)
+
+def build_team_aggregates(matches):
+    """Team stats table and charts for the Team Analysis tab"""
+    team_stats = defaultdict(lambda: {"matches": 0, "wins": 0, "total_points": 0})
+    for match in matches:
+        team_a_key = " & ".join(sorted([get_player_by_id(pid)["name"] for pid in match["team_a"] if get_player_by_id(pid)]))
+        team_stats[team_a_key]["matches"] += 1
+        team_stats[team_a_key]["total_points"] += match["score_a"]
+        if match["winning_team"] == "A":
+            team_stats[team_a_key]["wins"] += 1
+        team_b_key = " & ".join(sorted([get_player_by_id(pid)["name"] for pid in match["team_b"] if get_player_by_id(pid)]))
+        team_stats[team_b_key]["matches"] += 1
+        team_stats[team_b_key]["total_points"] += match["score_b"]
+        if match["winning_team"] == "B":
+            team_stats[team_b_key]["wins"] += 1
+    team_data = []
+    for team_key, stats in team_stats.items():
+        win_rate = round((stats["wins"] / stats["matches"]) * 100, 1) if stats["matches"] > 0 else 0
+        avg_points = round(stats["total_points"] / stats["matches"], 1) if stats["matches"] > 0 else 0
+        team_data.append({
+            "Team": team_key,
+            "Matches": stats["matches"],
+            "Wins": stats["wins"],
+            "Win Rate (%)": win_rate,
+            "Avg Points": avg_points
+        })
+
+    df_teams = pd.DataFrame(team_data).sort_values(by="Win Rate (%)", ascending=False)
+
+    fig_win_rates = px.bar(df_teams.head(10),
+                           x="Team", y="Win Rate (%)", title="Win Rates",
+                           labels={"Win Rate (%)": "Win Rate (%)", "Team": "Team Composition"})
+    fig_win_rates.update_layout(xaxis_tickangle=-45)
+
+    df_by_matches = df_teams.sort_values(by="Matches", ascending=False)
+    fig_games = go.Figure()
+    fig_games.add_trace(go.Bar(x=df_by_matches["Team"], y=df_by_matches["Matches"], name="Games Played"))
+    fig_games.add_trace(go.Bar(x=df_by_matches["Team"], y=df_by_matches["Wins"], name="Wins"))
+    fig_games.update_layout(barmode='group', xaxis_tickangle=-45, title="Games Played vs Wins")
+    return {"table": df_teams, "win_rate_figure": fig_win_rates.to_dict(), "games_figure": fig_games.to_dict()}
+
+def build_performance_aggregates(matches):
+    """Rating history and per-player performance charts for the Performance Over Time tab"""
+    window = get_stats_window()
+    start_key = time.strftime(TIMESTAMP_FORMAT, time.gmtime(window["start"])) if window["start"] is not None else ""
+    end_key = time.strftime(TIMESTAMP_FORMAT, time.gmtime(window["end"])) if window["end"] is not None else "9999"
+    names_by_id = get_player_names_by_id()
+
+    if window["season"]:
+        # An archived season is replayed from the ratings the season before it ended with
+        seasons = st.session_state.archived_seasons
+        position = next(i for i, season in enumerate(seasons) if season["id"] == window["season"])
+        rating_history = replay_ratings(matches, get_all_available_players(), archived_ratings(seasons[:position]))[1]["players"]
+    else:
+        rating_history = get_rating_history()
+    fig = go.Figure()
+    for pid, data in rating_history.items():
+        if pid in names_by_id:
+            points = [(ts, rating) for ts, rating in zip(data["timestamps"], data["ratings"]) if start_key <= ts < end_key]
+            if points:
+                timestamps, ratings = zip(*points)
+                fig.add_trace(go.Scatter(x=pd.to_datetime(list(timestamps)), y=list(ratings), mode='lines', name=names_by_id[pid]))
+    fig.update_layout(title="Player Ratings Over Time", xaxis_title="Date", yaxis_title="Rating")
+    figures = [fig.to_dict()]
+
+    # Running totals within the window; matches arrive in time order
+    player_performance = defaultdict(lambda: {"dates": [], "cumulative_wins": [], "cumulative_points": []})
+    for match in matches:
+        timestamp = pd.Timestamp(match["timestamp"])
+        for team, score in (("A", match["score_a"]), ("B", match["score_b"])):
+            for pid in match["team_a"] if team == "A" else match["team_b"]:
+                if pid in names_by_id:
+                    data = player_performance[names_by_id[pid]]
+                    previous_wins = data["cumulative_wins"][-1] if data["cumulative_wins"] else 0
+                    previous_points = data["cumulative_points"][-1] if data["cumulative_points"] else 0
+                    data["dates"].append(timestamp)
+                    data["cumulative_wins"].append(previous_wins + (match["winning_team"] == team))
+                    data["cumulative_points"].append(previous_points + score)
+    for player_name, data in player_performance.items():
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=data["dates"], y=data["cumulative_wins"], mode='lines+markers', name='Cumulative Wins'))
+        fig.add_trace(go.Scatter(x=data["dates"], y=data["cumulative_points"], mode='lines+markers', name='Cumulative Points'))
+        fig.update_layout(title=f"{player_name}'s Performance Over Time", xaxis_title="Date", yaxis_title="Cumulative Count")
+        figures.append(fig.to_dict())
+    return {"figures": figures}
+
+def build_advanced_aggregates(matches, players):
+    """Skill, consistency and head-to-head charts for the Advanced Analytics tab"""
+    df_players = pd.DataFrame(players)
+    df_players["win_rate"] = df_players.apply(
+        lambda x: round((x["wins"] / x["games_played"]) * 100, 1) if x["games_played"] > 0 else 0, axis=1
+    )
+    fig_skill = px.box(df_players, x="skill_level", y="win_rate", title="Win Rate Distribution by Skill Level",
+                       labels={"win_rate": "Win Rate (%)", "skill_level": "Skill Level"})
+    df_players["points_std_dev"] = df_players.apply(
+        lambda x: np.std(x["points_scored"]) if x["games_played"] > 1 else 0, axis=1
+    )
+    fig_consistency = px.bar(df_players, x="name", y="points_std_dev", title="Player Consistency",
+                             labels={"points_std_dev": "Standard Deviation of Points Scored", "name": "Player Name"})
+    fig_consistency.update_layout(xaxis_tickangle=-45)
+
+    head_to_head = defaultdict(lambda: {"wins": 0, "losses": 0})
+    for match in matches:
+        for pid_a in match["team_a"]:
+            for pid_b in match["team_b"]:
+                player_a = get_player_by_id(pid_a)
+                player_b = get_player_by_id(pid_b)
+                if player_a and player_b:
+                    key = tuple(sorted([player_a["name"], player_b["name"]]))
+                    if match["winning_team"] == "A":
+                        head_to_head[key]["wins"] += 1
+                    else:
+                        head_to_head[key]["losses"] += 1
+    head_to_head_data = []
+    for players, stats in head_to_head.items():
+        win_rate = round((stats["wins"] / (stats["wins"] + stats["losses"])) * 100, 1) if (stats["wins"] + stats["losses"]) > 0 else 0
+        head_to_head_data.append({
+            "Players": f"{players[0]} vs {players[1]}",
+            "Win Rate (%)": win_rate
+        })
+    df_head_to_head = pd.DataFrame(head_to_head_data)
+    fig_head_to_head = px.bar(df_head_to_head, x="Players", y="Win Rate (%)", title="Head-to-Head Win Rates",
+                              labels={"Win Rate (%)": "Win Rate (%)", "Players": "Players Matchup"})
+    fig_head_to_head.update_layout(xaxis_tickangle=-45)
+    return {
+        "skill_figure": fig_skill.to_dict(),
+        "consistency_figure": fig_consistency.to_dict(),
+        "head_to_head_figure": fig_head_to_head.to_dict()
+    }
+
+
+def rally_statistics(rally_logs):
+    """Per-match rally statistics for many non-empty rally logs at once.
+
+    The logs are concatenated into one byte array and every statistic is computed with array
+    operations over it, using each match's start offset, so thousands of matches take milliseconds.
+    """
+    lengths = np.fromiter(map(len, rally_logs), dtype=np.int64, count=len(rally_logs))
+    events = np.frombuffer("".join(rally_logs).encode("ascii"), dtype=np.uint8)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    ends = starts + lengths - 1
+    match_of_rally = np.repeat(np.arange(len(rally_logs)), lengths)
+
+    # Running score after each rally: cumulative counts less the count before the match started
+    won_a = events == RALLY_TEAMS[0]
+    total_a = np.cumsum(won_a)
+    score_a = total_a - np.repeat(total_a[starts] - won_a[starts], lengths)
+    score_b = (np.arange(len(events)) - starts[match_of_rally] + 1) - score_a
+    margin = score_a - score_b
+
+    # Runs of consecutive rallies won by the same side, restarting at each match
+    run_start = np.ones(len(events), dtype=bool)
+    run_start[1:] = events[1:] != events[:-1]
+    run_start[starts] = True
+    run_starts = np.flatnonzero(run_start)
+    run_lengths = np.diff(np.append(run_starts, len(events)))
+    first_run = np.searchsorted(run_starts, starts)
+    longest_a = np.maximum.reduceat(np.where(won_a[run_starts], run_lengths, 0), first_run)
+    longest_b = np.maximum.reduceat(np.where(won_a[run_starts], 0, run_lengths), first_run)
+
+    # Comeback depth: the largest deficit the eventual winner came back from
+    a_won = margin[ends] > 0
+    comeback = np.where(a_won, np.maximum.reduceat(-margin, starts), np.maximum.reduceat(margin, starts)).clip(min=0)
+
+    # Game points: rallies a side started one point from winning the game
+    before_a, before_b = score_a - won_a, score_b - ~won_a
+    game_point_a = ((before_a >= WINNING_SCORE - 1) & (before_a > before_b)) | (before_a == RALLY_POINT_CAP - 1)
+    game_point_b = ((before_b >= WINNING_SCORE - 1) & (before_b > before_a)) | (before_b == RALLY_POINT_CAP - 1)
+
+    def per_match(values):
+        return np.bincount(match_of_rally, weights=values, minlength=len(rally_logs)).astype(int)
+
+    return {
+        "rallies": lengths,
+        "longest_run_a": longest_a,
+        "longest_run_b": longest_b,
+        "comeback_depth": comeback,
+        "game_points_a": per_match(game_point_a),
+        "game_points_won_a": per_match(game_point_a & won_a),
+        "game_points_b": per_match(game_point_b),
+        "game_points_won_b": per_match(game_point_b & ~won_a)
+    }
+
+def rally_momentum(rally_log, window=MOMENTUM_WINDOW):
+    """Team A's score margin after each rally and its net rallies won over the last window rallies"""
+    step = np.where(np.frombuffer(rally_log.encode("ascii"), dtype=np.uint8) == RALLY_TEAMS[0], 1, -1)
+    return np.cumsum(step), np.convolve(step, np.ones(window, dtype=int))[:len(step)]
+
+def build_rally_aggregates(matches):
+    """Rally statistics table and totals for the Rally Analytics tab"""
+    names_by_id = get_player_names_by_id()
+    stats = rally_statistics([m["rallies"] for m in matches])
+    game_points = stats["game_points_a"] + stats["game_points_b"]
+    converted = stats["game_points_won_a"] + stats["game_points_won_b"]
+    df = pd.DataFrame({
+        "Match ID": [m["id"] for m in matches],
+        "Date": [m["timestamp"] for m in matches],
+        "Team A": [", ".join(names_by_id.get(pid, pid) for pid in m["team_a"]) for m in matches],
+        "Team B": [", ".join(names_by_id.get(pid, pid) for pid in m["team_b"]) for m in matches],
+        "Score": [f"{m['score_a']}-{m['score_b']}" for m in matches],
+        "Rallies": stats["rallies"],
+        "Longest Run A": stats["longest_run_a"],
+        "Longest Run B": stats["longest_run_b"],
+        "Comeback Depth": stats["comeback_depth"],
+        "Game Points A": [f"{won}/{total}" for won, total in zip(stats["game_points_won_a"], stats["game_points_a"])],
+        "Game Points B": [f"{won}/{total}" for won, total in zip(stats["game_points_won_b"], stats["game_points_b"])]
+    })
+    return {
+        "table": df.iloc[::-1].reset_index(drop=True),
+        "longest_run": int(max(stats["longest_run_a"].max(), stats["longest_run_b"].max())),
+        "deepest_comeback": int(stats["comeback_depth"].max()),
+        "game_point_conversion": converted.sum() / game_points.sum() if game_points.sum() else None
+    }
+
+
+def player_stats_view(window_matches, window_players, window_key):
+    """Player stats tab"""
+    st.subheader("Player Performance", divider=True)
+    if window_players:
+        player_aggregates = get_cached_aggregate(f"player_stats@{window_key}", lambda: build_player_stats_aggregates(window_players))
+        st.dataframe(player_aggregates["table"], use_container_width=True)
+        if player_aggregates["figures"]:
+            cols = st.columns(2)
+            for col, (title, fig) in zip(cols, player_aggregates["figures"]):
+                with col:
+                    st.subheader(title, divider=True)
+                    st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("No player statistics available yet.")
+
+def match_history_view(window_matches, window_players, window_key):
+    """Match history tab"""
+    st.subheader("Match History", divider=True)
+    if get_stats_window()["season"]:
+        archived_match_history_view(window_matches)
+        return
+    if window_matches:
+        filters = match_history_filters()
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            page_size = st.selectbox("Rows per page", MATCH_HISTORY_PAGE_SIZES, key="history_page_size")
+        # Page count depends on the filtered row count, so the first page is fetched before the page selector
+        _, total_rows = get_match_history_page(filters, 1, page_size)
+        total_pages = max(1, math.ceil(total_rows / page_size))
+        with col2:
+            page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1, step=1, key="history_page")
+        page = min(page, total_pages)
+        df_matches, _ = get_match_history_page(filters, page, page_size)
+        st.caption(f"Showing {len(df_matches)} of {total_rows} matching matches ({len(st.session_state.match_history)} total)")
+
+        # Regular users see read-only table
+        st.dataframe(df_matches[["Match ID", "Date", "Team A", "Team B", "Score", "Winner", "Notes"]], use_container_width=True)
+
+        # Super Admin editable table with deletion
+        if st.session_state.is_super_admin:
+            with st.expander("Edit Match History (Super Admin Only)"):
+                st.info("Edit match details or select matches to delete below. Only Score A, Score B, Winner, and Notes can be modified. Only the current page is editable.")
+                # Prepare editable data with Delete column
+                editable_data = df_matches[["Match ID", "Date", "Team A", "Team B", "Score A", "Score B", "Winner", "Notes"]].copy()
+                editable_data["Delete"] = False  # Add checkbox column
+                # Configure column settings for st.data_editor
+                column_config = {
+                    "Match ID": st.column_config.TextColumn(disabled=True),
+                    "Date": st.column_config.TextColumn(disabled=True),
+                    "Team A": st.column_config.TextColumn(disabled=True),
+                    "Team B": st.column_config.TextColumn(disabled=True),
+                    "Score A": st.column_config.NumberColumn(min_value=0, format="%d", step=1),
+                    "Score B": st.column_config.NumberColumn(min_value=0, format="%d", step=1),
+                    "Winner": st.column_config.SelectboxColumn(options=["A", "B"]),
+                    "Notes": st.column_config.TextColumn(),
+                    "Delete": st.column_config.CheckboxColumn(label="Delete", help="Select to delete this match")
+                }
+                edited_df = st.data_editor(
+                    editable_data,
+                    column_config=column_config,
+                    num_rows="fixed",
+                    key=f"match_history_editor_{st.session_state.data_version}_{page_size}_{page}",
+                    use_container_width=True
+                )
+
+                # Handle deletion
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.subheader("Win Rate by Player", divider=True)
-                    fig = px.bar(df_players[df_players["games_played"] > 0].sort_values("win_rate", ascending=False),
-                                 x="name", y="win_rate", title="Win Rate by Player",
-                                 labels={"win_rate": "Win Rate (%)", "name": "Player Name"})
-                    fig.update_layout(xaxis_tickangle=-45)
-                    st.plotly_chart(fig, use_container_width=True)
+                    if st.button("Delete Selected Matches", key="delete_matches", disabled=not st.session_state.is_super_admin):
+                        selected_rows = edited_df[edited_df["Delete"] == True].to_dict('records')
+                        if selected_rows:
+                            # Confirmation prompt
+                            st.warning(f"Are you sure you want to delete {len(selected_rows)} match(es)? This action cannot be undone.")
+                            if st.button("Confirm Deletion", key="confirm_delete"):
+                                result = delete_selected_matches(selected_rows)
+                                if result.startswith("Error:"):
+                                    st.error(result)
+                                else:
+                                    st.success(result)
+                                    st.rerun()
+                        else:
+                            st.error("No matches selected for deletion.")
+
+                # Handle saving edits
                 with col2:
-                    st.subheader("Games Played vs Wins", divider=True)
-                    fig = go.Figure()
-                    fig.add_trace(go.Bar(x=df_players["name"], y=df_players["games_played"], name="Games Played"))
-                    fig.add_trace(go.Bar(x=df_players["name"], y=df_players["wins"], name="Wins"))
-                    fig.update_layout(barmode='group', xaxis_tickangle=-45, title="Games Played vs Wins")
-                    st.plotly_chart(fig, use_container_width=True)
+                    if st.button("Save Changes", key="save_match_history", disabled=not st.session_state.is_super_admin):
+                        deleted_match_ids = edited_df[edited_df["Delete"] == True]["Match ID"].tolist()
+                        result = save_edited_match_history(edited_df.to_dict('records'), deleted_match_ids)
+                        if result.startswith("Error:"):
+                            st.error(result)
+                        else:
+                            st.success(result)
+                            st.rerun()
+
+        # Score distribution plots
+        st.subheader("Match Score Distribution", divider=True)
+        period = st.radio("Group by", ["Week", "Month"], index=1, horizontal=True, key="score_period")
+        score_aggregates = get_cached_aggregate(f"score_distribution_{period}@{window_key}", lambda: build_score_distribution_aggregates(period, get_window_offsets()))
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(score_aggregates["histogram_figure"], use_container_width=True)
+        with col2:
+            st.plotly_chart(score_aggregates["heatmap_figure"], use_container_width=True)
+        st.plotly_chart(score_aggregates["trend_figure"], use_container_width=True)
+
+        # Raw points are only fetched for the selected window
+        periods = score_aggregates["periods"]
+        drilldown_period = st.selectbox(f"Show individual matches for {period.lower()} starting", ["None"] + periods[::-1], key="score_drilldown")
+        if drilldown_period != "None":
+            st.plotly_chart(score_drilldown_figure(drilldown_period, score_aggregates["period_unit"]), use_container_width=True)
+    else:
+        st.info("No match history available yet.")
+
+def archived_match_history_view(matches):
+    """Read-only, paged table of an archived season's matches"""
+    if not matches:
+        st.info("No matches available for this archived season.")
+        return
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        page_size = st.selectbox("Rows per page", MATCH_HISTORY_PAGE_SIZES, key="history_page_size")
+    total_pages = max(1, math.ceil(len(matches) / page_size))
+    with col2:
+        page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1, step=1, key="history_page")
+    page = min(page, total_pages)
+    page_matches = matches[::-1][(page - 1) * page_size:page * page_size]
+    df_matches = pd.DataFrame(build_match_rows(page_matches, get_player_names_by_id()))
+    st.caption(f"Showing {len(df_matches)} of {len(matches)} archived matches. Archived seasons are read-only.")
+    st.dataframe(df_matches[["Match ID", "Date", "Team A", "Team B", "Score", "Winner", "Notes"]], use_container_width=True)
+
+def team_analysis_view(window_matches, window_players, window_key):
+    """Team analysis tab"""
+    st.subheader("Team Analysis", divider=True)
+    if window_matches:
+        team_aggregates = get_cached_aggregate(f"team_stats@{window_key}", lambda: build_team_aggregates(window_matches))
+        st.dataframe(team_aggregates["table"], use_container_width=True)
+
+        st.subheader("Team Win Rates", divider=True)
+        st.plotly_chart(team_aggregates["win_rate_figure"], use_container_width=True)
+        st.plotly_chart(team_aggregates["games_figure"], use_container_width=True)
+
+        st.subheader("Partner Synergy", divider=True)
+        if get_stats_window()["season"]:
+            st.info("Partner synergy is computed from live seasons only.")
+            return
+        offsets = get_window_offsets()
+        synergy_key = "synergy" if offsets is None else f"synergy@{window_key}"
+        synergy_figures = get_cached_aggregate(
+            f"{synergy_key}_figures",
+            lambda: build_synergy_figures(get_cached_aggregate(synergy_key, lambda: build_synergy_aggregates(offsets)))
+        )
+        if synergy_figures["synergy_figure"]:
+            st.caption("Synergy compares a pair's win rate with what their individual ratings predict, shrunk toward zero for pairs with few games.")
+            st.plotly_chart(synergy_figures["synergy_figure"], use_container_width=True)
+            st.dataframe(synergy_figures["table"], use_container_width=True, hide_index=True)
         else:
-            st.info("No player statistics available yet.")
-
-    with tab2:
-        st.subheader("Match History", divider=True)
-        if st.session_state.match_history:
-            match_data = []
-            for match in st.session_state.match_history:
-                team_a_names = [get_player_by_id(pid)["name"] for pid in match["team_a"] if get_player_by_id(pid)]
-                team_b_names = [get_player_by_id(pid)["name"] for pid in match["team_b"] if get_player_by_id(pid)]
-                match_data.append({
-                    "Match ID": match["id"],
-                    "Date": match["timestamp"],
-                    "Team A": " & ".join(team_a_names) + " 🏆" if match["winning_team"]=="A" else " & ".join(team_a_names),
-                    "Team B": " & ".join(team_b_names) + " 🏆" if match["winning_team"]=="B" else " & ".join(team_b_names),
-                    "Score A": match["score_a"],
-                    "Score B": match["score_b"],
-                    "Score": f"{match['score_a']} - {match['score_b']}",
-                    "Winner": match["winning_team"],
-                    "Notes": match["notes"]
-                })
-            df_matches = pd.DataFrame(match_data)
-
-            # Regular users see read-only table
-            st.dataframe(df_matches[["Match ID", "Date", "Team A", "Team B", "Score", "Winner", "Notes"]], use_container_width=True)
-
-            # Super Admin editable table with deletion
-            if st.session_state.is_super_admin:
-                with st.expander("Edit Match History (Super Admin Only)"):
-                    st.info("Edit match details or select matches to delete below. Only Score A, Score B, Winner, and Notes can be modified.")
-                    # Prepare editable data with Delete column
-                    editable_data = df_matches[["Match ID", "Date", "Team A", "Team B", "Score A", "Score B", "Winner", "Notes"]].copy()
-                    editable_data["Delete"] = False  # Add checkbox column
-                    # Configure column settings for st.data_editor
-                    column_config = {
-                        "Match ID": st.column_config.TextColumn(disabled=True),
-                        "Date": st.column_config.TextColumn(disabled=True),
-                        "Team A": st.column_config.TextColumn(disabled=True),
-                        "Team B": st.column_config.TextColumn(disabled=True),
-                        "Score A": st.column_config.NumberColumn(min_value=0, format="%d", step=1),
-                        "Score B": st.column_config.NumberColumn(min_value=0, format="%d", step=1),
-                        "Winner": st.column_config.SelectboxColumn(options=["A", "B"]),
-                        "Notes": st.column_config.TextColumn(),
-                        "Delete": st.column_config.CheckboxColumn(label="Delete", help="Select to delete this match")
-                    }
-                    edited_df = st.data_editor(
-                        editable_data,
-                        column_config=column_config,
-                        num_rows="fixed",
-                        key="match_history_editor",
-                        use_container_width=True
-                    )
-
-                    # Handle deletion
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("Delete Selected Matches", key="delete_matches", disabled=not st.session_state.is_super_admin):
-                            selected_rows = edited_df[edited_df["Delete"] == True].to_dict('records')
-                            if selected_rows:
-                                # Confirmation prompt
-                                st.warning(f"Are you sure you want to delete {len(selected_rows)} match(es)? This action cannot be undone.")
-                                if st.button("Confirm Deletion", key="confirm_delete"):
-                                    result = delete_selected_matches(selected_rows)
-                                    if result.startswith("Error:"):
-                                        st.error(result)
-                                    else:
-                                        st.success(result)
-                                        st.rerun()
-                            else:
-                                st.error("No matches selected for deletion.")
-
-                    # Handle saving edits
-                    with col2:
-                        if st.button("Save Changes", key="save_match_history", disabled=not st.session_state.is_super_admin):
-                            deleted_match_ids = edited_df[edited_df["Delete"] == True]["Match ID"].tolist()
-                            result = save_edited_match_history(edited_df.to_dict('records'), deleted_match_ids)
-                            if result.startswith("Error:"):
-                                st.error(result)
-                            else:
-                                st.success(result)
-                                st.rerun()
-
-            # Score distribution plot
-            st.subheader("Match Score Distribution", divider=True)
-            scores_data = []
-            for match in st.session_state.match_history:
-                scores_data.append({
-                    "Match": f"Match {len(scores_data) + 1}",
-                    "Team A": match["score_a"],
-                    "Team B": match["score_b"]
-                })
-            df_scores = pd.DataFrame(scores_data)
-            fig = px.bar(df_scores, x="Match", y=["Team A", "Team B"], title="Match Score Distribution", barmode='group')
-            fig.update_layout(xaxis_tickangle=-45)
+            st.info("No doubles partnerships recorded yet.")
+        st.plotly_chart(synergy_figures["opponent_figure"], use_container_width=True)
+    else:
+        st.info("No team statistics available yet.")
+
+def performance_view(window_matches, window_players, window_key):
+    """Performance over time tab"""
+    st.subheader("Player Performance Over Time", divider=True)
+    if window_matches:
+        performance_aggregates = get_cached_aggregate(f"performance@{window_key}", lambda: build_performance_aggregates(window_matches))
+        for fig in performance_aggregates["figures"]:
             st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("No performance data available yet.")
+
+def advanced_analytics_view(window_matches, window_players, window_key):
+    """Advanced analytics tab"""
+    st.subheader("Advanced Analytics")
+    if window_matches:
+        advanced_aggregates = get_cached_aggregate(f"advanced@{window_key}", lambda: build_advanced_aggregates(window_matches, window_players))
+        st.subheader("Skill Level vs. Performance", divider=True)
+        st.plotly_chart(advanced_aggregates["skill_figure"], use_container_width=True)
+        st.subheader("Player Consistency", divider=True)
+        st.plotly_chart(advanced_aggregates["consistency_figure"], use_container_width=True)
+        st.subheader("Head-to-Head Matchups", divider=True)
+        st.plotly_chart(advanced_aggregates["head_to_head_figure"], use_container_width=True)
+
+        st.subheader("Win Prediction Model", divider=True)
+        model = get_win_model()
+        if model is None:
+            st.info(f"The win prediction model needs at least {WIN_MODEL_MIN_MATCHES} matches; Elo ratings are used until then.")
         else:
-            st.info("No match history available yet.")
-
-    with tab3:
-        st.subheader("Team Analysis", divider=True)
-        if st.session_state.match_history:
-            team_stats = defaultdict(lambda: {"matches": 0, "wins": 0, "total_points": 0})
-            for match in st.session_state.match_history:
-                team_a_key = " & ".join(sorted([get_player_by_id(pid)["name"] for pid in match["team_a"] if get_player_by_id(pid)]))
-                team_stats[team_a_key]["matches"] += 1
-                team_stats[team_a_key]["total_points"] += match["score_a"]
-                if match["winning_team"] == "A":
-                    team_stats[team_a_key]["wins"] += 1
-                team_b_key = " & ".join(sorted([get_player_by_id(pid)["name"] for pid in match["team_b"] if get_player_by_id(pid)]))
-                team_stats[team_b_key]["matches"] += 1
-                team_stats[team_b_key]["total_points"] += match["score_b"]
-                if match["winning_team"] == "B":
-                    team_stats[team_b_key]["wins"] += 1
-            team_data = []
-            for team_key, stats in team_stats.items():
-                win_rate = round((stats["wins"] / stats["matches"]) * 100, 1) if stats["matches"] > 0 else 0
-                avg_points = round(stats["total_points"] / stats["matches"], 1) if stats["matches"] > 0 else 0
-                team_data.append({
-                    "Team": team_key,
-                    "Matches": stats["matches"],
-                    "Wins": stats["wins"],
-                    "Win Rate (%)": win_rate,
-                    "Avg Points": avg_points
-                })
-                
-            df_teams = pd.DataFrame(team_data)
-            st.dataframe(df_teams.sort_values(by="Win Rate (%)", ascending=False), use_container_width=True)
-            
-
-            st.subheader("Team Win Rates", divider=True)
-            
-            fig = px.bar(df_teams.sort_values(by="Win Rate (%)", ascending=False).head(10),
-                          x="Team", y="Win Rate (%)", title="Win Rates",
-                          labels={"Win Rate (%)": "Win Rate (%)", "Team": "Team Composition"})
-            fig.update_layout(xaxis_tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
-
-            df_teams.sort_values(by="Matches", ascending=False, inplace=True)
+            st.caption(f"Logistic model fitted on {model.match_count} matches (all time), refit after match edits or every {WIN_MODEL_REFIT_MATCHES} new matches. "
+                       f"Training accuracy: {model.accuracy:.0%}")
+            st.dataframe(pd.DataFrame({
+                "Feature": WIN_MODEL_FEATURES,
+                "Win Coefficient": np.round(model.coefficients, 3),
+                "Margin Coefficient (points)": np.round(model.margin_coefficients, 2)
+            }), use_container_width=True, hide_index=True)
+    else:
+        st.info("No advanced analytics data available yet.")
+
+def rally_analytics_view(window_matches, window_players, window_key):
+    """Rally analytics tab, for matches scored live"""
+    st.subheader("Rally Analytics", divider=True)
+    rally_matches = [m for m in window_matches if m.get("rallies")]
+    if not rally_matches:
+        st.info("No live-scored matches yet. Use Live Scoring under Match Recording to record matches rally by rally.")
+        return
+    aggregates = get_cached_aggregate(f"rally@{window_key}", lambda: build_rally_aggregates(rally_matches))
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Live-Scored Matches", len(rally_matches))
+    col2.metric("Longest Run", aggregates["longest_run"])
+    col3.metric("Deepest Comeback", aggregates["deepest_comeback"])
+    conversion = aggregates["game_point_conversion"]
+    col4.metric("Game Point Conversion", f"{conversion:.0%}" if conversion is not None else "-")
+    st.dataframe(aggregates["table"], use_container_width=True, hide_index=True)
+
+    st.subheader("Momentum", divider=True)
+    matches_by_id = {m["id"]: m for m in rally_matches}
+    table = aggregates["table"]
+    labels = dict(zip(table["Match ID"], table["Date"] + ": " + table["Team A"] + " vs " + table["Team B"] + " (" + table["Score"] + ")"))
+    match_id = st.selectbox("Match", list(labels), format_func=labels.get, key="rally_momentum_match")
+    margin, momentum = rally_momentum(matches_by_id[match_id]["rallies"])
+    rally_numbers = np.arange(1, len(margin) + 1)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=rally_numbers, y=margin, mode='lines', name='Score Margin (Team A)'))
+    fig.add_trace(go.Bar(x=rally_numbers, y=momentum, name=f'Momentum (last {MOMENTUM_WINDOW} rallies)', opacity=0.4))
+    fig.update_layout(title="Momentum by Rally", xaxis_title="Rally", yaxis_title="Points (Team A minus Team B)")
+    st.plotly_chart(fig, use_container_width=True)
+
+def player_profile_view(window_matches, window_players, window_key):
+    """Player profile tab, served from the player index (always all live seasons)"""
+    st.subheader("Player Profile", divider=True)
+    all_players = get_all_available_players()
+    if not all_players:
+        st.info("No players available yet.")
+        return
+    names_by_id = {p["id"]: p["name"] for p in all_players}
+    player_id = st.selectbox("Player", list(names_by_id), format_func=names_by_id.get, key="profile_player")
+    player = get_player_by_id(player_id)
+    profile = get_player_match_index().profile(player_id, st.session_state.match_history)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Rating", round(get_player_rating(player_id)))
+    col2.metric("Games Played", player["games_played"])
+    col3.metric("Wins", player["wins"])
+    col4.metric("Win Rate", f"{round(player['wins'] / player['games_played'] * 100, 1) if player['games_played'] else 0}%")
+
+    st.subheader("Recent Form", divider=True)
+    if profile["recent_form"]:
+        st.markdown(" ".join("🟢" if r["won"] else "🔴" for r in profile["recent_form"]) + "  *(newest first)*")
+        form_data = []
+        for r in profile["recent_form"]:
+            match = r["match"]
+            team = match["team_a"] if player_id in match["team_a"] else match["team_b"]
+            rivals = match["team_b"] if player_id in match["team_a"] else match["team_a"]
+            form_data.append({
+                "Date": match["timestamp"],
+                "Result": "Won" if r["won"] else "Lost",
+                "Score": f"{r['points_for']} - {r['points_against']}",
+                "Partner": " & ".join(names_by_id.get(pid, "?") for pid in team if pid != player_id) or "-",
+                "Opponents": " & ".join(names_by_id.get(pid, "?") for pid in rivals)
+            })
+        st.dataframe(pd.DataFrame(form_data), hide_index=True, use_container_width=True)
+    else:
+        st.info(f"{player['name']} has not played any matches yet.")
 
-            fig = go.Figure()
-            fig.add_trace(go.Bar(x=df_teams["Team"], y=df_teams["Matches"], name="Games Played"))
-            fig.add_trace(go.Bar(x=df_teams["Team"], y=df_teams["Wins"], name="Wins"))
-            fig.update_layout(barmode='group', xaxis_tickangle=-45, title="Games Played vs Wins")
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No team statistics available yet.")
-
-    with tab4:
-        st.subheader("Player Performance Over Time", divider=True)
-        if st.session_state.match_history:
-            player_performance = defaultdict(lambda: {"dates": [], "cumulative_wins": [], "cumulative_points": []})
-            for match in st.session_state.match_history:
-                timestamp = pd.to_datetime(match["timestamp"])
-                for pid in match["team_a"] + match["team_b"]:
-                    player = get_player_by_id(pid)
-                    if player:
-                        player_performance[player["name"]]["dates"].append(timestamp)
-                        player_performance[player["name"]]["cumulative_wins"].append(player["wins"])
-                        player_performance[player["name"]]["cumulative_points"].append(player["points_scored"])
-            for player_name, data in player_performance.items():
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(x=data["dates"], y=data["cumulative_wins"], mode='lines+markers', name='Cumulative Wins'))
-                fig.add_trace(go.Scatter(x=data["dates"], y=data["cumulative_points"], mode='lines+markers', name='Cumulative Points'))
-                fig.update_layout(title=f"{player_name}'s Performance Over Time", xaxis_title="Date", yaxis_title="Cumulative Count")
-                st.plotly_chart(fig, use_container_width=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Best Partners", divider=True)
+        if profile["best_partners"]:
+            st.dataframe(pd.DataFrame([
+                {"Partner": names_by_id.get(pid, "?"), "Games": games, "Wins": wins, "Win Rate (%)": round(wins / games * 100, 1)}
+                for pid, games, wins in profile["best_partners"]
+            ]), hide_index=True, use_container_width=True)
         else:
-            st.info("No performance data available yet.")
-
-    with tab5:
-        st.subheader("Advanced Analytics")
-        if st.session_state.match_history:
-            df_players = pd.DataFrame(all_players)
-            df_players["win_rate"] = df_players.apply(
-                lambda x: round((x["wins"] / x["games_played"]) * 100, 1) if x["games_played"] > 0 else 0, axis=1
-            )
-            st.subheader("Skill Level vs. Performance", divider=True)
-            fig = px.box(df_players, x="skill_level", y="win_rate", title="Win Rate Distribution by Skill Level",
-                          labels={"win_rate": "Win Rate (%)", "skill_level": "Skill Level"})
-            st.plotly_chart(fig, use_container_width=True)
-            st.subheader("Player Consistency", divider=True)
-            df_players["points_std_dev"] = df_players.apply(
-                lambda x: np.std(x["points_scored"]) if x["games_played"] > 1 else 0, axis=1
-            )
-            fig = px.bar(df_players, x="name", y="points_std_dev", title="Player Consistency",
-                         labels={"points_std_dev": "Standard Deviation of Points Scored", "name": "Player Name"})
-            fig.update_layout(xaxis_tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
-            st.subheader("Head-to-Head Matchups", divider=True)
-            head_to_head = defaultdict(lambda: {"wins": 0, "losses": 0})
-            for match in st.session_state.match_history:
-                for pid_a in match["team_a"]:
-                    for pid_b in match["team_b"]:
-                        player_a = get_player_by_id(pid_a)
-                        player_b = get_player_by_id(pid_b)
-                        if player_a and player_b:
-                            key = tuple(sorted([player_a["name"], player_b["name"]]))
-                            if match["winning_team"] == "A":
-                                head_to_head[key]["wins"] += 1
-                            else:
-                                head_to_head[key]["losses"] += 1
-            head_to_head_data = []
-            for players, stats in head_to_head.items():
-                win_rate = round((stats["wins"] / (stats["wins"] + stats["losses"])) * 100, 1) if (stats["wins"] + stats["losses"]) > 0 else 0
-                head_to_head_data.append({
-                    "Players": f"{players[0]} vs {players[1]}",
-                    "Win Rate (%)": win_rate
-                })
-            df_head_to_head = pd.DataFrame(head_to_head_data)
-            fig = px.bar(df_head_to_head, x="Players", y="Win Rate (%)", title="Head-to-Head Win Rates",
-                         labels={"Win Rate (%)": "Win Rate (%)", "Players": "Players Matchup"})
-            fig.update_layout(xaxis_tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
+            st.info("Not enough games with any partner yet.")
+    with col2:
+        st.subheader("Nemesis Opponents", divider=True)
+        if profile["nemeses"]:
+            st.dataframe(pd.DataFrame([
+                {"Opponent": names_by_id.get(pid, "?"), "Games": games, "Wins": wins, "Win Rate (%)": round(wins / games * 100, 1)}
+                for pid, games, wins in profile["nemeses"]
+            ]), hide_index=True, use_container_width=True)
         else:
-            st.info("No advanced analytics data available yet.")
+            st.info("Not enough games against any opponent yet.")
+
+def season_simulator_view(window_matches, window_players, window_key):
+    """Season simulator tab: Monte Carlo ladder projections from the selected window"""
+    st.subheader("Season Simulator", divider=True)
+    players = [p for p in window_players if p["games_played"] > 0]
+    if len(players) < 2:
+        st.info("Not enough match data in this period to simulate the ladder.")
+        return
+    st.caption(f"Projects the win-rate ladder for {get_stats_window()['label']} by simulating future sessions from current ratings, "
+               "attendance and how often each player plays.")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sessions = st.number_input("Future Sessions", min_value=1, max_value=200, value=30, key="simulation_sessions")
+    with col2:
+        matches_per_session = st.number_input("Matches per Session", min_value=1, max_value=30, value=6, key="simulation_matches")
+    with col3:
+        simulations = st.select_slider("Simulations", options=[1000, 5000, 10000, 50000, 100000], value=10000, key="simulation_count")
+    with col4:
+        simulation_match_type = st.selectbox("Match Type", options=["Doubles", "Singles"], key="simulation_match_type").lower()
+
+    params = {"simulations": simulations, "sessions": int(sessions), "matches_per_session": int(matches_per_session),
+              "match_type": simulation_match_type, "seed": 0}
+    if st.button("Run Simulation", key="run_simulation"):
+        st.session_state.simulation_params = params
+    if st.session_state.get("simulation_params") != params:
+        st.info("Set the options and click 'Run Simulation'.")
+        return
+    params_key = "-".join(str(value) for value in params.values())
+    with st.spinner("Simulating seasons..."):
+        simulation = get_cached_aggregate(f"ladder_simulation@{window_key}:{params_key}",
+                                          lambda: build_ladder_simulation_aggregates(players, window_matches, params))
+    st.dataframe(simulation["table"], use_container_width=True, hide_index=True)
+    st.plotly_chart(simulation["figure"], use_container_width=True)
+
+STATS_VIEWS = {
+    "Player Stats": player_stats_view,
+    "Match History": match_history_view,
+    "Team Analysis": team_analysis_view,
+    "Performance Over Time": performance_view,
+    "Advanced Analytics": advanced_analytics_view,
+    "Rally Analytics": rally_analytics_view,
+    "Player Profile": player_profile_view,
+    "Season Simulator": season_simulator_view
+}
+
+def statistics_section():
+    """Statistics and analytics section"""
+    st.header("📊 Statistics & Analytics")
+    window = get_stats_window()
+    window_key = stats_window_key()
+    window_matches = get_window_matches()
+    window_players = get_window_players(window_matches)
+    if window["label"] != "All Time":
+        st.caption(f"Showing {len(window_matches)} matches for **{window['label']}**. Change the period in the sidebar.")
+    elif st.session_state.archived_seasons:
+        st.caption(f"Player totals include {archived_match_count()} matches from archived seasons; match-level views cover the "
+                   f"{len(window_matches)} live matches. Pick an archived season in the sidebar to browse it.")
+
+    if lazy_sections_enabled():
+        # Only the selected view is computed and rendered
+        view_name = st.radio("View", list(STATS_VIEWS), horizontal=True, key="active_stats_view", label_visibility="collapsed")
+        with section_timer(f"Statistics / {view_name}"):
+            STATS_VIEWS[view_name](window_matches, window_players, window_key)
+    else:
+        tabs = st.tabs(list(STATS_VIEWS))
+        for tab, (view_name, view) in zip(tabs, STATS_VIEWS.items()):
+            with tab, section_timer(f"Statistics / {view_name}"):
+                view(window_matches, window_players, window_key)
 
 def chatbot_section():
     """Chatbot interaction section"""
@@ -1548,11 +5345,11 @@ def chatbot_section():
             message_placeholder = st.empty()
             message_placeholder.markdown("Thinking...")
             try:
-                # Generate LLM stats
-                all_players = st.session_state.predefined_players + st.session_state.temp_players
-                match_records = st.session_state.match_history
+                # Use the statistics period selected in the sidebar
+                match_records = get_window_matches()
+                all_players = get_window_players(match_records)
                 # calling LLM
-                response_content = process_query(user_query, all_players, match_records)
+                response_content = process_query(user_query, all_players, match_records, get_stats_window()["label"])
                 log_chat_question_answer(user_query, response_content)
                 message_placeholder.markdown(response_content)
                 st.session_state.chat_history.append({"role": "assistant", "content": response_content})
@@ -1561,7 +5358,7 @@ def chatbot_section():
                 message_placeholder.markdown(f"Error processing your query: {str(e)}")
                 st.error("Failed to get a response from the model. Please check the logs.")
 
-def process_query(user_query, players, match_history):
+def process_query(user_query, players, match_history, period_label="All Time"):
     """Process the user query with the LLM"""
     try:
         # Prepare player stats summary
@@ -1571,6 +5368,7 @@ def process_query(user_query, players, match_history):
             avg_points = player["points_scored"] / player["games_played"] if player["games_played"] > 0 else 0
             player_stats.append({
                 "name": player["name"],
+                "rating": round(get_player_rating(player["id"])),
                 "games_played": player["games_played"],
                 "wins": player["wins"],
                 "points_scored": player["points_scored"],
@@ -1591,6 +5389,13 @@ def process_query(user_query, players, match_history):
             } for match in match_history
         ]
 
+        # Profiles of players mentioned in the question, served from the player index
+        # Whole-name matches anywhere in the question, so multi-word names are found too
+        player_profiles = [
+            format_player_profile(p["id"]) for p in get_all_available_players()
+            if p["name"].strip() and re.search(rf"(?<!\w){re.escape(p['name'].strip().lower())}(?!\w)", user_query.lower())
+        ]
+
         last_five_questions = []
         user_messages = [msg for msg in reversed(st.session_state.chat_history) if msg["role"] == "user"]
         for i in range(min(5, len(user_messages))):
@@ -1636,10 +5441,13 @@ def process_query(user_query, players, match_history):
 **User's Current Question**:
 {user_ask}
 
-**Historic Match Data**:
+**Historic Match Data** (period: {period_label}):
 {match_summary}
 
-**Individual Performances**:
+**Profiles of Players Mentioned in the Question** (all-time):
+{player_profiles}
+
+**Individual Performances** (`rating` is an Elo-style rating that accounts for opponent and partner strength; higher is better):
 {player_stats}
 
 Give your answer in a clear, buddy-like way, using headings or bullet points if needed, and toss in some fun where it fits!""")
@@ -1653,6 +5461,8 @@ Give your answer in a clear, buddy-like way, using headings or bullet points if
         prompt = prompt_template.format(
             last_questions="\n".join(last_five_questions) if last_five_questions else "No previous questions.",
             user_ask=user_query,
+            period_label=period_label,
+            player_profiles="\n".join(player_profiles) if player_profiles else "No specific player mentioned.",
             match_summary = json.dumps(match_summary, indent=2),
             player_stats = json.dumps(player_stats, indent=2)
 
@@ -1664,6 +5474,168 @@ Give your answer in a clear, buddy-like way, using headings or bullet points if
     except Exception as e:
         return f"An error occurred: {str(e)}"
 
+# Columnar snapshot export for offline analysis
+EXPORT_DIR = 'exports'
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_FORMATS = ["Parquet", "Feather", "CSV"]
+EXPORT_SCHEMAS = {
+    "players": [("player_id", "string"), ("name", "string"), ("skill_level", "int"), ("is_temporary", "bool"),
+                ("games_played", "int"), ("wins", "int"), ("points_scored", "int"), ("rating", "float")],
+    "matches": [("match_id", "string"), ("timestamp", "string"), ("epoch", "int"), ("match_type", "string"),
+                ("score_a", "int"), ("score_b", "int"), ("winning_team", "string"), ("margin", "int"), ("notes", "string")],
+    "participants": [("match_id", "string"), ("player_id", "string"), ("team", "string"), ("won", "bool"), ("points", "int")],
+    "player_summary": [("player_id", "string"), ("name", "string"), ("rating", "float"), ("games_played", "int"),
+                       ("wins", "int"), ("win_rate", "float"), ("avg_points_per_game", "float")],
+    "pair_synergy": [("player_id_1", "string"), ("player_id_2", "string"), ("games", "int"), ("actual_win_rate", "float"),
+                     ("expected_win_rate", "float"), ("synergy", "float"), ("point_diff_synergy", "float")],
+    "opponent_matrix": [("player_id", "string"), ("opponent_id", "string"), ("games", "int"), ("wins", "int")],
+}
+
+def iter_export_chunks(rows, chunk_size):
+    """Group an iterable of rows into lists of at most chunk_size rows"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_player_rows():
+    """Normalized players table rows"""
+    temp_ids = {p["id"] for p in st.session_state.temp_players}
+    for player in get_all_available_players():
+        yield {
+            "player_id": player["id"],
+            "name": player["name"],
+            "skill_level": player.get("skill_level"),
+            "is_temporary": player["id"] in temp_ids,
+            "games_played": player["games_played"],
+            "wins": player["wins"],
+            "points_scored": player["points_scored"],
+            "rating": get_player_rating(player["id"])
+        }
+
+def iter_match_rows():
+    """Normalized matches table rows, one per match"""
+    for match in st.session_state.match_history:
+        yield {
+            "match_id": match["id"],
+            "timestamp": match["timestamp"],
+            "epoch": timestamp_to_epoch(match["timestamp"]),
+            "match_type": "singles" if len(match["team_a"]) == 1 and len(match["team_b"]) == 1 else "doubles",
+            "score_a": match["score_a"],
+            "score_b": match["score_b"],
+            "winning_team": match["winning_team"],
+            "margin": abs(match["score_a"] - match["score_b"]),
+            "notes": match.get("notes", "")
+        }
+
+def iter_participant_rows():
+    """Normalized participants table rows, one per player per match"""
+    for match in st.session_state.match_history:
+        for team, player_ids, points in (("A", match["team_a"], match["score_a"]), ("B", match["team_b"], match["score_b"])):
+            for pid in player_ids:
+                yield {"match_id": match["id"], "player_id": pid, "team": team, "won": match["winning_team"] == team, "points": points}
+
+def iter_aggregate_tables():
+    """Precomputed aggregate tables as (name, rows) pairs"""
+    yield "player_summary", [{
+        "player_id": p["id"],
+        "name": p["name"],
+        "rating": get_player_rating(p["id"]),
+        "games_played": p["games_played"],
+        "wins": p["wins"],
+        "win_rate": p["wins"] / p["games_played"] if p["games_played"] else 0.0,
+        "avg_points_per_game": p["points_scored"] / p["games_played"] if p["games_played"] else 0.0
+    } for p in get_all_available_players()]
+
+    synergy = get_cached_aggregate("synergy", build_synergy_aggregates)
+    yield "pair_synergy", [{
+        "player_id_1": pair["player_ids"][0],
+        "player_id_2": pair["player_ids"][1],
+        "games": pair["games"],
+        "actual_win_rate": pair["actual_win_rate"],
+        "expected_win_rate": pair["expected_win_rate"],
+        "synergy": pair["synergy"],
+        "point_diff_synergy": pair["point_diff_synergy"]
+    } for pair in synergy["pairs"]]
+
+    player_ids = synergy["player_ids"]
+    rows, cols = np.nonzero(synergy["opponent_games"])
+    yield "opponent_matrix", [{
+        "player_id": player_ids[i],
+        "opponent_id": player_ids[j],
+        "games": int(synergy["opponent_games"][i, j]),
+        "wins": int(synergy["opponent_wins"][i, j])
+    } for i, j in zip(rows, cols)]
+
+def arrow_schema(columns):
+    """pyarrow schema for an export table"""
+    types = {"string": pa.string(), "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+def write_export_table(directory, name, rows, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write one table chunk by chunk and return (file name, row count)"""
+    columns = EXPORT_SCHEMAS[name]
+    row_count = 0
+    if export_format == "CSV":
+        file_name = f"{name}.csv"
+        with open(os.path.join(directory, file_name), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=[column for column, _ in columns])
+            writer.writeheader()
+            for chunk in iter_export_chunks(rows, chunk_size):
+                writer.writerows(chunk)
+                row_count += len(chunk)
+        return file_name, row_count
+
+    schema = arrow_schema(columns)
+    file_name = f"{name}.parquet" if export_format == "Parquet" else f"{name}.feather"
+    path = os.path.join(directory, file_name)
+    writer = pq.ParquetWriter(path, schema) if export_format == "Parquet" else pa.ipc.new_file(path, schema)
+    try:
+        for chunk in iter_export_chunks(rows, chunk_size):
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            row_count += len(chunk)
+    finally:
+        writer.close()
+    return file_name, row_count
+
+def export_snapshot(export_format="Parquet", chunk_size=EXPORT_CHUNK_SIZE):
+    """Export players, matches, participants and aggregates as a zipped snapshot, returning (message, zip path)"""
+    if export_format not in EXPORT_FORMATS:
+        return f"Error: Unsupported export format {export_format}", None
+    requested_format = export_format
+    if export_format != "CSV" and pa is None:
+        logger.warning(f"pyarrow is not installed, exporting CSV instead of {export_format}")
+        export_format = "CSV"
+
+    ist = pytz.timezone('Asia/Kolkata')
+    snapshot_name = f"snapshot_v{st.session_state.data_version}_{datetime.datetime.now(ist).strftime('%Y%m%d_%H%M%S')}"
+    snapshot_dir = os.path.join(club_dir(), EXPORT_DIR, snapshot_name)
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        start = time.perf_counter()
+        tables = [("players", iter_player_rows()), ("matches", iter_match_rows()), ("participants", iter_participant_rows())]
+        tables.extend(iter_aggregate_tables())
+        manifest = {"data_version": st.session_state.data_version, "format": export_format, "tables": {}}
+        for name, rows in tables:
+            file_name, row_count = write_export_table(snapshot_dir, name, rows, export_format, chunk_size)
+            manifest["tables"][name] = {"file": file_name, "rows": row_count, "columns": dict(EXPORT_SCHEMAS[name])}
+        with open(os.path.join(snapshot_dir, "manifest.json"), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        zip_path = shutil.make_archive(snapshot_dir, 'zip', snapshot_dir)
+        shutil.rmtree(snapshot_dir)
+        logger.info(f"Exported {export_format} snapshot to {zip_path} in {(time.perf_counter() - start) * 1000:.1f} ms")
+        fallback_note = f" (pyarrow not installed, exported CSV instead of {requested_format})" if export_format != requested_format else ""
+        return f"Success: Exported {manifest['tables']['matches']['rows']} matches to {os.path.basename(zip_path)}{fallback_note}", zip_path
+    except Exception as e:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        logger.error(f"Error exporting snapshot: {str(e)}")
+        return f"Error: Failed to export snapshot: {str(e)}", None
+
 def get_drive_service():
     """Get authenticated Google Drive service using a service account."""
     try:
@@ -1693,9 +5665,10 @@ def get_drive_service():
         logger.error(f"Error building Drive service: {str(e)}")
         return None
 
-def upload_to_drive(chat_history=False, match_history=False, files=None):
-    """Upload specified files to Google Drive."""
+def upload_to_drive(chat_history=False, match_history=False, files=None, club=None, config=None):
+    """Upload specified files to the club's Google Drive folder."""
     try:
+        club = club or current_club()
         if files:
             files_to_upload = files
         elif chat_history:
@@ -1703,7 +5676,8 @@ def upload_to_drive(chat_history=False, match_history=False, files=None):
         elif match_history:
             files_to_upload = ["badminton_data.json"]
         else:
-            files_to_upload = ["badminton_data.json", "chat_history.json", "visitor_count.json"]
+            files_to_upload = list(CLUB_FILES)
+        files_to_upload = [club_file(f, club) for f in files_to_upload]
 
         # adding badmintonbuddy.log each time
         files_to_upload.extend(["badmintonbuddy.log"])
@@ -1715,6 +5689,11 @@ def upload_to_drive(chat_history=False, match_history=False, files=None):
             logger.warning("No output files found to upload")
             return False
 
+        target_folder_id = club_settings(club, config)["drive_folder_id"]
+        if not target_folder_id:
+            logger.warning(f"No Google Drive folder configured for club '{club}', skipping upload")
+            return False
+
         drive_service = get_drive_service()
         if not drive_service:
             logger.error("Failed to get Google Drive service")
@@ -1722,12 +5701,12 @@ def upload_to_drive(chat_history=False, match_history=False, files=None):
 
         ist = pytz.timezone('Asia/Kolkata')
         timestamp = datetime.datetime.now(ist).strftime("%Y-%m-%d %H:%M:%S")
-        target_folder_id = '1u5w1ESII4eCx9CE6LGp-ehPJd3rTriZf'
 
         uploaded_files = []
         for file_path in files_to_upload:
             file_name = os.path.basename(file_path)
-            query = f"name = '{file_name}' and trashed = false"
+            # Clubs use the same file names, so files are only matched inside the club's own folder
+            query = f"name = '{file_name}' and '{target_folder_id}' in parents and trashed = false"
 
             response = drive_service.files().list(
                 q=query,
@@ -1747,24 +5726,12 @@ def upload_to_drive(chat_history=False, match_history=False, files=None):
 
             if response.get('files'):
                 file_id = response['files'][0]['id']
-                current_parents = response['files'][0].get('parents', [])
-
-                if target_folder_id not in current_parents:
-                    logger.info(f"Moving {file_name} to target folder")
-                    file = drive_service.files().update(
-                        fileId=file_id,
-                        addParents=target_folder_id,
-                        removeParents=','.join(current_parents),
-                        media_body=media,
-                        fields='id, parents'
-                    ).execute()
-                else:
-                    logger.info(f"Updating existing file: {file_name}")
-                    file = drive_service.files().update(
-                        fileId=file_id,
-                        media_body=media,
-                        fields='id'
-                    ).execute()
+                logger.info(f"Updating existing file: {file_name}")
+                file = drive_service.files().update(
+                    fileId=file_id,
+                    media_body=media,
+                    fields='id'
+                ).execute()
             else:
                 logger.info(f"Uploading new file: {file_name}")
                 file = drive_service.files().create(
@@ -1781,22 +5748,312 @@ def upload_to_drive(chat_history=False, match_history=False, files=None):
         logger.error(f"Google Drive upload error: {str(e)}")
         return False
 
-def push_to_gdrive(chat_history=False, match_history=False, visitor_count=False):
-    """Push data to Google Drive if enabled in config"""
+def push_to_gdrive(chat_history=False, match_history=False, visitor_count=False, files=None, club=None, config=None):
+    """Push data to Google Drive if enabled in config (club and config default to this session's, for use outside a session)"""
     try:
-        if not st.session_state.config["upload_to_drive_enabled"]:
+        config = config or st.session_state.config
+        club = club or current_club()
+        if not config["upload_to_drive_enabled"]:
             logger.info("Google Drive upload is disabled in configuration")
             return
-        if visitor_count:
-            upload_to_drive(files=["visitor_count.json"])
+        if files:
+            upload_to_drive(files=files, club=club, config=config)
+        elif visitor_count:
+            upload_to_drive(files=["visitor_count.json"], club=club, config=config)
         else:
-            upload_to_drive(chat_history=chat_history, match_history=match_history)
+            upload_to_drive(chat_history=chat_history, match_history=match_history, club=club, config=config)
     except Exception as e:
         logger.error(f"Failed to upload to GDrive: {str(e)}")
 
+def club_settings(club=None, config=None):
+    """Display name and Drive folder of a club; clubs other than the default are listed in config.json"""
+    club = club or current_club()
+    config = config or st.session_state.config
+    settings = {"name": "XploreMe@Sports", "drive_folder_id": DRIVE_FOLDER_ID} if club == DEFAULT_CLUB else {"name": club, "drive_folder_id": None}
+    settings.update(config.get("clubs", {}).get(club, {}))
+    return settings
+
+def select_club():
+    """Bind this session to the club in the ?club= query parameter; False if the club is unknown"""
+    requested = st.query_params.get("club", DEFAULT_CLUB).strip().lower()
+    if requested != DEFAULT_CLUB and requested not in st.session_state.config.get("clubs", {}):
+        # The club may have been added from another session since this one loaded its config
+        st.session_state.config = load_config()
+        if requested not in st.session_state.config.get("clubs", {}):
+            st.error(f"Unknown club '{requested}'. A super admin can add it under Super Admin Settings.")
+            return False
+    if st.session_state.get("club", requested) != requested:
+        # Data, teams, logins and chat all belong to the previous club, so the session starts over
+        st.session_state.clear()
+        st.rerun()
+    st.session_state.club = requested
+    return True
+
+def add_club(club_id, name, drive_folder_id=""):
+    """Register a club in config.json so that ?club=<club_id> serves its own data"""
+    club_id = club_id.strip().lower()
+    if not CLUB_ID_PATTERN.match(club_id):
+        return "Error: Club ID must be up to 40 lowercase letters, digits, '-' or '_'"
+    clubs = st.session_state.config.setdefault("clubs", {})
+    if club_id == DEFAULT_CLUB or club_id in clubs:
+        return f"Error: Club '{club_id}' already exists"
+    clubs[club_id] = {"name": name.strip() or club_id, "drive_folder_id": drive_folder_id.strip() or None}
+    save_config(st.session_state.config)
+    club_dir(club_id)
+    logger.info(f"Added club '{club_id}'")
+    return f"Success: Added club '{club_id}', open it with ?club={club_id}"
+
+# Local ingestion API for scorer devices and scripts
+INGEST_API_HOST = "127.0.0.1"
+INGEST_API_PORT = 8502
+INGEST_MAX_BATCH = 1000
+INGEST_MAX_BODY = 5 * 1024 * 1024
+TIMESTAMP_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+
+def build_match_record(entry, name_index):
+    """Complete match record from a submitted match; players may be given by ID or by name"""
+    def resolve(player):
+        return name_index.get(str(player).strip().lower(), player)
+
+    team_a = [resolve(p) for p in entry.get("team_a", [])]
+    team_b = [resolve(p) for p in entry.get("team_b", [])]
+    score_a, score_b = entry.get("score_a"), entry.get("score_b")
+    winning_team = entry.get("winning_team")
+    if winning_team is None and isinstance(score_a, int) and isinstance(score_b, int) and score_a != score_b:
+        winning_team = "A" if score_a > score_b else "B"
+    record = {
+        "id": str(entry.get("id") or uuid.uuid4()),
+        "timestamp": entry.get("timestamp") or datetime.datetime.now(pytz.timezone('Asia/Kolkata')).strftime("%Y-%m-%d %H:%M:%S"),
+        "team_a": team_a,
+        "team_b": team_b,
+        "score_a": score_a,
+        "score_b": score_b,
+        "winning_team": winning_team,
+        "notes": entry.get("notes", "")
+    }
+    if entry.get("rallies"):
+        record["rallies"] = entry["rallies"]
+    return record
+
+def validate_submitted_match(match_record):
+    """Checks for matches submitted from outside the app, on top of validate_match_record; "Error: ..." or None"""
+    team_a, team_b = match_record["team_a"], match_record["team_b"]
+    if not (isinstance(team_a, list) and isinstance(team_b, list)) or not 1 <= len(team_a) == len(team_b) <= 2:
+        return "Error: Both teams need 1 player (singles) or 2 players (doubles)"
+    if set(team_a) & set(team_b):
+        return "Error: A player cannot be on both teams"
+    score_a, score_b = match_record["score_a"], match_record["score_b"]
+    # bool is a subclass of int, so true/false would otherwise pass as scores
+    if not all(isinstance(score, int) and not isinstance(score, bool) for score in (score_a, score_b)):
+        return "Error: Scores must be integers"
+    if score_a == score_b:
+        return "Error: A match cannot end in a tie"
+    if match_record["winning_team"] != ("A" if score_a > score_b else "B"):
+        return "Error: Winning team does not match the scores"
+    # The pattern pins the layout; fromisoformat (much faster than strptime on bulk imports) checks the values
+    try:
+        if not TIMESTAMP_PATTERN.match(match_record["timestamp"]):
+            raise ValueError
+        datetime.datetime.fromisoformat(match_record["timestamp"])
+    except (TypeError, ValueError):
+        return f"Error: Timestamp must look like 2025-01-31 18:30:00"
+    return validate_rallies(match_record)
+
+def ingest_matches(club, entries, config, operation="api_ingest", sync=True, validated=False):
+    """Validate and record a batch of matches for a club with one commit and (unless sync=False) one Drive sync.
+
+    Returns (message, payload). Nothing is recorded unless every match is valid; matches whose
+    ID is already recorded, live or archived, are skipped, so a device can safely resend a batch.
+    Other matches dated inside an archived season are rejected; back-dated matches are merged into
+    the history in time order and the ratings replayed. validated=True
+    takes entries as complete records that the caller already checked.
+    """
+    service = get_club_data_service(club)
+    for attempt in range(DATA_COMMIT_RETRIES):
+        base_version, shared = service.snapshot()
+        players = thaw(shared["predefined_players"])
+        players_by_id = {p["id"]: p for p in players}
+        name_index = {p["name"].strip().lower(): p["id"] for p in players}
+        recorded_ids = {m["id"] for m in shared["match_history"]}
+        records, skipped = [], []
+        for i, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                return f"Error: Match {i + 1}: expected a JSON object", None
+            record = entry if validated else build_match_record(entry, name_index)
+            if record["id"] in recorded_ids:
+                skipped.append(record["id"])
+                continue
+            error = None if validated else validate_submitted_match(record) or validate_match_record(record, players_by_id)
+            if error:
+                return f"Error: Match {i + 1}: {error[len('Error: '):]}", None
+            # An export with archived seasons can be imported again; their matches are already counted
+            already_archived, error = check_archived_match(record, shared["archived_seasons"], club)
+            if already_archived:
+                skipped.append(record["id"])
+                continue
+            if error:
+                return f"Error: Match {i + 1}: {error[len('Error: '):]}", None
+            recorded_ids.add(record["id"])
+            records.append(record)
+        if not records:
+            return "Success: No new matches", {"recorded": [], "skipped": skipped, "data_version": base_version}
+
+        tournaments = thaw(shared["tournaments"])
+        for pid, totals in count_player_results(records).items():
+            for stat, value in totals.items():
+                players_by_id[pid][stat] += value
+        for record in records:
+            record_tournament_result(record, tournaments)
+        # Ratings, indexes and running totals read the history in time order, so back-dated matches are merged
+        # into place (the timestamp format sorts as text) and the ratings replayed; newer ones are simply appended
+        timestamp = operator.itemgetter("timestamp")
+        records.sort(key=timestamp)
+        match_history = shared["match_history"]
+        if not match_history or records[0]["timestamp"] >= match_history[-1]["timestamp"]:
+            match_history = [*match_history, *records]
+            ratings = thaw(shared["player_ratings"])
+            for record in records:
+                apply_match_ratings(record, ratings, players_by_id=players_by_id)
+        else:
+            match_history = list(heapq.merge(match_history, records, key=timestamp))
+            ratings = replay_ratings(match_history, players, archived_ratings(shared["archived_seasons"]))[0]
+            logger.info(f"Merged back-dated matches into the history of club '{club}' and replayed its ratings")
+        data = dict(shared, predefined_players=players, match_history=match_history,
+                    player_ratings=ratings, tournaments=tournaments)
+        version = service.commit(base_version, data, operation)
+        if version is not None:
+            if sync:
+                push_to_gdrive(match_history=True, club=club, config=config)
+            logger.info(f"Ingested {len(records)} matches for club '{club}' as data version {version}")
+            return f"Success: Recorded {len(records)} matches", {"recorded": [r["id"] for r in records], "skipped": skipped, "data_version": version}
+        logger.warning(f"Retrying ingestion of {len(records)} matches after a conflicting commit")
+    return f"Error: Ingestion conflicted with other writers {DATA_COMMIT_RETRIES} times", None
+
+def club_api_stats(club):
+    """Per-player statistics and match counts of a club, as served by the ingestion API"""
+    version, data = get_club_data_service(club).snapshot()
+    ratings = data["player_ratings"]
+    return {
+        "club": club,
+        "data_version": version,
+        "live_matches": len(data["match_history"]),
+        "archived_matches": sum(season["match_count"] for season in data["archived_seasons"]),
+        "players": [{
+            "id": p["id"],
+            "name": p["name"],
+            "games_played": p["games_played"],
+            "wins": p["wins"],
+            "points_scored": p["points_scored"],
+            "rating": round(ratings.get(p["id"], initial_rating(p)), 1)
+        } for p in data["predefined_players"]]
+    }
+
+@data_transaction
+def generate_api_token():
+    """Create a new ingestion API token for this club; only its hash is stored, replacing any previous token"""
+    token = secrets.token_urlsafe(32)
+    st.session_state.api_token_hash = hashlib.sha256(token.encode()).hexdigest()
+    save_data()
+    logger.info(f"Generated a new ingestion API token for club '{current_club()}'")
+    return token
+
+class IngestRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints: GET /api/health, GET /api/stats, POST /api/matches (?club=<id>, Bearer token)"""
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _club(self):
+        """Requested club once the token is checked, or None after replying with an error"""
+        config = load_config()
+        club = parse_qs(urlparse(self.path).query).get("club", [DEFAULT_CLUB])[0].strip().lower()
+        if club != DEFAULT_CLUB and club not in config.get("clubs", {}):
+            self._reply(404, {"error": f"Unknown club '{club}'"})
+            return None, config
+        token_hash = get_club_data_service(club).snapshot()[1]["api_token_hash"]
+        auth = self.headers.get("Authorization", "")
+        token = auth[len("Bearer "):] if auth.startswith("Bearer ") else ""
+        if not token_hash or not hmac.compare_digest(hashlib.sha256(token.encode()).hexdigest(), token_hash):
+            self._reply(401, {"error": "A valid admin API token is required"})
+            return None, config
+        return club, config
+
+    def do_GET(self):
+        route = urlparse(self.path).path
+        if route == "/api/health":
+            self._reply(200, {"status": "ok"})
+        elif route == "/api/stats":
+            club, _ = self._club()
+            if club:
+                self._reply(200, club_api_stats(club))
+        else:
+            self._reply(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/api/matches":
+            self._reply(404, {"error": "Not found"})
+            return
+        club, config = self._club()
+        if not club:
+            return
+        # The body is left unread on these errors, so the connection is closed after the reply
+        length = self.headers.get("Content-Length", "0").strip()
+        if not (length.isascii() and length.isdigit()):
+            self.close_connection = True
+            self._reply(400, {"error": "Content-Length must be a non-negative integer"})
+            return
+        length, max_body = int(length), int(config.get("ingest_api_max_body", INGEST_MAX_BODY))
+        if length > max_body:
+            self.close_connection = True
+            self._reply(413, {"error": f"Request body is larger than {max_body} bytes"})
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self._reply(400, {"error": "Request body is not valid JSON"})
+            return
+        # A single match or {"matches": [...]}
+        entries = body.get("matches") if isinstance(body, dict) and "matches" in body else [body]
+        if not isinstance(entries, list) or not 0 < len(entries) <= INGEST_MAX_BATCH:
+            self._reply(400, {"error": f"Send one match or 1 to {INGEST_MAX_BATCH} matches"})
+            return
+        try:
+            result, payload = ingest_matches(club, entries, config)
+        except Exception as e:
+            logger.error(f"Ingestion API error: {str(e)}")
+            self._reply(500, {"error": str(e)})
+            return
+        if result.startswith("Error"):
+            self._reply(409 if "conflicted" in result else 400, {"error": result})
+        else:
+            self._reply(201 if payload["recorded"] else 200, {"message": result, **payload})
+
+    def log_message(self, format, *args):
+        logger.info(f"Ingestion API {self.address_string()}: {format % args}")
+
+@st.cache_resource
+def start_ingest_api(host, port):
+    """Serve the ingestion API on a background thread, once per process"""
+    try:
+        server = ThreadingHTTPServer((host, port), IngestRequestHandler)
+    except OSError as e:
+        logger.error(f"Could not start the ingestion API on {host}:{port}: {str(e)}")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True, name="ingest-api").start()
+    logger.info(f"Ingestion API listening on http://{host}:{port}")
+    return server
+
 def load_config():
     """Load configuration from config.json, initialize with default if not exists"""
-    default_config = {"upload_to_drive_enabled": os.getenv("UPLOAD_TO_DRIVE_ENABLED", False)}
+    default_config = {
+        "upload_to_drive_enabled": os.getenv("UPLOAD_TO_DRIVE_ENABLED", False),
+        "lazy_sections": True
+    }
     try:
         if not os.path.exists(CONFIG_FILE):
             logger.info("Config file not found, creating with default values")
@@ -1830,10 +6087,13 @@ if 'config' not in st.session_state:
 def generate_llm_stats(match_history, players):
     """Generate player skill levels and interesting stats using LLM"""
     try:
-        # Check cache
-        if 'llm_stats_cache' in st.session_state and st.session_state.llm_stats_cache.get('match_count') == len(match_history):
+        # Check cache shared by all sessions
+        cache = get_aggregate_cache()
+        cache_key = aggregate_cache_key("llm_stats")
+        cached_stats = cache.get(cache_key, st.session_state.data_version)
+        if cached_stats is not None:
             logger.info("Using cached LLM stats")
-            return st.session_state.llm_stats_cache['stats']
+            return cached_stats
 
         # Prepare player stats summary
         player_stats = []
@@ -1915,10 +6175,7 @@ Your task is to:
                 raise ValueError("Invalid LLM output format")
             
             # Cache result
-            st.session_state.llm_stats_cache = {
-                'match_count': len(match_history),
-                'stats': llm_output
-            }
+            cache.put(cache_key, st.session_state.data_version, llm_output)
             return llm_output
         except json.JSONDecodeError as e:
             logger.error(f"JSON parsing error for LLM stats: {str(e)}, response: {response_content}")
@@ -1931,15 +6188,17 @@ Your task is to:
         return {"skills": {}, "interesting_stats": []}
 
 
-def download_from_drive():
-    """Download specified files from Google Drive during app startup."""
+def download_from_drive(club=None):
+    """Download the club's files from its Google Drive folder during app startup."""
     try:
-        files_to_download = [
-            "chat_history.json",
-            "badminton_data.json",
-            "visitor_count.json",
-            "badmintonbuddy.log"
-        ]
+        club = club or current_club()
+        target_folder_id = club_settings(club)["drive_folder_id"]
+        if not target_folder_id:
+            logger.info(f"No Google Drive folder configured for club '{club}', skipping download")
+            return False
+        files_to_download = list(CLUB_FILES)
+        if club == DEFAULT_CLUB:
+            files_to_download.append("badmintonbuddy.log")
         logger.info(f"Attempting to download files from Google Drive: {files_to_download}")
 
         drive_service = get_drive_service()
@@ -1947,11 +6206,10 @@ def download_from_drive():
             logger.error("Failed to get Google Drive service for download")
             return False
 
-        target_folder_id = '1u5w1ESII4eCx9CE6LGp-ehPJd3rTriZf'
         downloaded_files = []
 
         for file_name in files_to_download:
-            query = f"name = '{file_name}' and '{target_folder_id}' in parents and trashed = false"
+            query = f"name = '{os.path.basename(file_name)}' and '{target_folder_id}' in parents and trashed = false"
             response = drive_service.files().list(
                 q=query,
                 spaces='drive',
@@ -1962,7 +6220,8 @@ def download_from_drive():
                 file_id = response['files'][0]['id']
                 logger.info(f"Downloading {file_name} from Google Drive")
                 request = drive_service.files().get_media(fileId=file_id)
-                file_path = os.path.join(os.getcwd(), file_name)
+                file_path = club_file(file_name, club)
+                os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
                 
                 with open(file_path, 'wb') as f:
                     downloader = MediaIoBaseDownload(f, request)
@@ -1972,6 +6231,9 @@ def download_from_drive():
                         logger.debug(f"Download {file_name}: {int(status.progress() * 100)}%")
                 
                 downloaded_files.append(file_name)
+                if file_name == DATA_FILE:
+                    # Archived season segments it references follow it; they never change, so present ones are kept
+                    files_to_download.extend(f for f in segment_files(file_path) if not os.path.exists(club_file(f, club)))
             else:
                 logger.warning(f"File {file_name} not found on Google Drive, skipping")
 
@@ -1981,9 +6243,61 @@ def download_from_drive():
         logger.error(f"Google Drive download error: {str(e)}")
         return False
     
+def lazy_sections_enabled():
+    """Whether only the active section is rendered on each rerun"""
+    return bool(st.session_state.config.get("lazy_sections", True))
+
+@contextmanager
+def section_timer(name):
+    """Log how long a section took to compute and render"""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        if 'section_timings' not in st.session_state:
+            st.session_state.section_timings = {}
+        st.session_state.section_timings[name] = elapsed_ms
+        logger.info(f"Rendered section '{name}' in {elapsed_ms:.1f} ms")
+
+def rerun_section():
+    """Rerun only the current section when other sections are not on screen"""
+    if lazy_sections_enabled():
+        try:
+            st.rerun(scope="fragment")
+        except StreamlitAPIException:
+            pass  # Not a fragment rerun, fall back to a full rerun
+    st.rerun()
+
+def players_section():
+    """Players tab: player management and chatbot"""
+    player_management_section()
+    chatbot_section()
+
+APP_SECTIONS = {
+    "Players": players_section,
+    "Team Formation": team_formation_section,
+    "Session Planner": session_planner_section,
+    "Tournaments": tournament_section,
+    "Match Recording": match_recording_section,
+    "Statistics": statistics_section
+}
+
+@st.fragment
+def render_section(name):
+    """Render one app section as a fragment, so its widget interactions rerun only that section"""
+    with section_timer(name):
+        APP_SECTIONS[name]()
+
 def main():
     """Main app"""
 
+    if not select_club():
+        return
+    if st.query_params.get("view") == "scoreboard":
+        scoreboard_page()
+        return
+
     # Download files from Google Drive on startup
     if 'initial_download_done' not in st.session_state:
         logger.info("Performing initial download from Google Drive")
@@ -1994,21 +6308,25 @@ def main():
     if st.session_state.data_updated:
         st.session_state.data_updated = False
         st.rerun()
+    data_change_watcher()
+    if st.session_state.config.get("ingest_api_enabled"):
+        start_ingest_api(st.session_state.config.get("ingest_api_host", INGEST_API_HOST), int(st.session_state.config.get("ingest_api_port", INGEST_API_PORT)))
     
     admin_authentication()
-    header_section()
+    stats_period_selector()
+    with section_timer("Header"):
+        header_section()
     footer_section()
     
-    tab1, tab2, tab3, tab4 = st.tabs(["Players", "Team Formation", "Match Recording", "Statistics"])
-    with tab1:
-        player_management_section()
-        chatbot_section()
-    with tab2:
-        team_formation_section()
-    with tab3:
-        match_recording_section()
-    with tab4:
-        statistics_section()
+    if lazy_sections_enabled():
+        # Only the selected section is computed and rendered; st.tabs would render all of them
+        active_section = st.radio("Section", list(APP_SECTIONS), horizontal=True, key="active_section", label_visibility="collapsed")
+        render_section(active_section)
+    else:
+        tabs = st.tabs(list(APP_SECTIONS))
+        for tab, name in zip(tabs, APP_SECTIONS):
+            with tab:
+                render_section(name)
 
 if __name__ == "__main__":
     main()